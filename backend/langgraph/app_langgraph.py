@@ -14,7 +14,7 @@ Semantic Retrieval Behavior (Added v3):
 5. Assist endpoint /api/jira/assist/{ticket_key} supplies targeted guidance for unresolved tickets leveraging resolved references.
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks, Request, Query
+from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks, Request, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
@@ -36,14 +36,23 @@ import os
 from dotenv import load_dotenv, find_dotenv
 
 # LangGraph imports (relative)
-from .langgraph_workflow import DualDocumentProcessingWorkflow
+# Heavy modules (langgraph workflow, embedding backends, Qdrant client, rerankers) are
+# imported inside the service container loaders so startup does not wait on them.
 from .langgraph_state_schema import DocumentProcessingState
-from .embedding_service_factory import create_embedding_backend
-from .jira_qdrant_service import JiraQdrantService
-from .ticket_reranker_service import ticket_reranker_service
+from .service_container import ServiceContainer
+from .model_preload import preload_enabled, preload_models, get_preloaded
+from .shared_state import shared_state
+from .rerank_cascade import rerank_cascade
+from .qdrant_http import close_qdrant_http, qdrant_http_pool, qdrant_session
+from .payload_indexes import payload_index_reconcile_enabled, reconcile_all_rest
+from .payload_projection import ANALYSIS_FIELDS, POINT_ID_KEY, hydrate_payloads, payload_fields, projection_stats
+from .ticket_doc_store import DOC_REF_KEY, get_ticket_doc_store, resolve_doc_refs
+from .ticket_context import mentioned_ticket_keys, scroll_ticket_chunks
+from .ticket_collapse import collapse_by_ticket, ticket_collapse_mode
+from .vector_quantization import search_quantization_rest
 from .groq_client_async import AsyncGroqClient
 from .chat_context_service import ChatContextService
-import re, httpx
+import re
 
 # JIRA / services imports (relative)
 from .jira_service import JiraService
@@ -72,6 +81,17 @@ app = FastAPI(
     version="3.0.0"
 )
 
+# Global services (populated by the container as components finish loading)
+services = {}
+container = ServiceContainer(services)
+workflow_ready = False
+workflow_init_error: Optional[str] = None
+
+# Multi-worker mode (gunicorn_conf.py, preload_app): load model weights once in the master
+# before fork so workers share them copy-on-write; the loaders below reuse them
+if preload_enabled():
+    preload_models()
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -174,15 +194,16 @@ class JiraAnalyzeResponse(BaseModel):
 
 @app.get("/api/debug/last_prompt")
 async def debug_last_prompt():
-    if not _LAST_PROMPT_DEBUG:
+    # Shared across workers (Redis or file store), not per-process
+    data = await shared_state.aget('last_prompt')
+    if not data:
         return {"status": "empty"}
     # Redact overly long context for transport if needed
-    data = dict(_LAST_PROMPT_DEBUG)
     if len(data.get('final_context','')) > 15000:
         data['final_context'] = data['final_context'][:15000] + '... [TRUNCATED]'
     return data
 
-@app.get("/api/debug/embedding")
+@app.get("/api/debug/embedding", dependencies=[Depends(container.require('embedding'))])
 async def debug_embedding_backend():
     """Return current embedding backend diagnostics (model, dimension, batch size if available)."""
     emb = services.get('embedding')
@@ -197,12 +218,16 @@ async def debug_embedding_backend():
     device = safe(lambda: str(getattr(emb,'_device', 'unknown')))
     batch_size = safe(lambda: getattr(emb,'_batch_size', None))
     dimension = safe(lambda: emb.get_dimension() if hasattr(emb,'get_dimension') else None)
+    cache = safe(lambda: emb.cache_stats() if hasattr(emb,'cache_stats') else None)
+    microbatch = safe(lambda: emb.metrics() if emb.__class__.__name__ == 'EmbeddingMicroBatcher' else None)
     return {
         "ok": True,
         "model": model_name,
         "device": device,
         "batch_size": batch_size,
         "dimension": dimension,
+        "cache": cache,
+        "microbatch": microbatch,
         "class": emb.__class__.__name__,
     }
 
@@ -229,6 +254,20 @@ async def debug_embedding_backend_minimal():
     resp['class'] = emb.__class__.__name__
     return resp
 
+@app.get("/api/debug/reranker")
+async def debug_reranker_engine():
+    """Shared cross-encoder engine (queue depth, pair throughput, memory footprint) and cascade paths."""
+    from .cross_encoder_engine import get_cross_encoder_engine
+    return {"ok": True, "engine": get_cross_encoder_engine().stats(), "cascade": rerank_cascade.stats()}
+
+@app.get("/api/debug/qdrant-http")
+async def debug_qdrant_http():
+    """Pooled Qdrant HTTP client (requests, connections opened, pool size), payload bytes per retrieval path
+    and the ticket doc store size."""
+    store = get_ticket_doc_store()
+    return {"ok": True, "pool": qdrant_http_pool.stats(), "payload_bytes": projection_stats.stats(),
+            "ticket_doc_store": store.stats() if store is not None else None}
+
 class JiraSearchRequest(BaseModel):
     query: Optional[str] = None
     assignee: Optional[str] = None
@@ -262,77 +301,122 @@ class DeleteResponse(BaseModel):
     message: str
     timestamp: str
 
-# Global services
-services = {}
-workflow_ready = False
-workflow_init_error: Optional[str] = None
+def _load_groq():
+    client = AsyncGroqClient()
+    logger.info(f"✅ Groq client ready (model={client.model})")
+    return client
+
+def _load_embedding():
+    emb = get_preloaded('embedding')
+    if emb is None:
+        from .embedding_service_factory import create_embedding_backend
+        emb = create_embedding_backend()
+    if os.getenv('EMBEDDING_MICROBATCH', 'true').lower() in {'1', 'true', 'yes', 'on'}:
+        from .embedding_microbatcher import EmbeddingMicroBatcher
+        # Coalesce concurrent query embeddings (chat, assist) into shared encode calls
+        emb = EmbeddingMicroBatcher(emb)
+    try:
+        model_name = getattr(emb, 'model_name', 'unknown')
+        dim = getattr(emb, 'get_dimension', lambda: 'n/a')()
+        logger.info(f"🧠 Embedding backend initialized: model='{model_name}' dim={dim}")
+    except Exception as e:
+        logger.warning(f"Embedding backend introspection failed: {e}")
+    return emb
+
+def _load_qdrant():
+    from .jira_qdrant_service import JiraQdrantService
+    return JiraQdrantService()
+
+def _load_jira():
+    jira = JiraService()
+    services['jira_dashboard'] = JiraDashboard(jira)
+    services['team_analytics'] = TeamAnalyticsService(jira)
+    services['resolution_assist'] = ResolutionAssistService(
+        jira_service=jira,
+        ingestion_version="v3_resolved_flag_2025-09-30"  # Use the same version as in retrieval
+    )
+    return jira
+
+async def _load_reranker():
+    from .ticket_reranker_service import ticket_reranker_service
+    await ticket_reranker_service.initialize()  # no-op when preloaded in the master
+    if not ticket_reranker_service.is_initialized:
+        raise RuntimeError(ticket_reranker_service._init_error or "ticket reranker failed to initialize")
+    return ticket_reranker_service
+
+async def _load_chat_context():
+    chat_context = ChatContextService()
+    await chat_context.initialize()
+    logger.info("✅ Chat context service initialized")
+    return chat_context
+
+def _load_workflow():
+    """Build the LangGraph workflow off the event loop (its services load models synchronously)."""
+    global workflow_ready, workflow_init_error
+    from .langgraph_workflow import DualDocumentProcessingWorkflow
+    try:
+        logger.info("🏗️ Background: initializing full LangGraph workflow (embeddings, rerankers)...")
+        workflow = DualDocumentProcessingWorkflow()
+
+        async def _initialize():
+            try:
+                await workflow.initialize()
+            finally:
+                # Its Qdrant clients are bound to this short-lived loop; the app loop rebinds its own
+                await workflow.close()
+
+        asyncio.run(_initialize())
+        workflow_ready = True
+        return workflow
+    except Exception as wf_err:
+        workflow_init_error = str(wf_err)
+        raise
+
+async def _enable_semantic_assist():
+    """Upgrade resolution assist to semantic retrieval once embedding and Qdrant are up."""
+    for name in ('jira', 'embedding', 'qdrant'):
+        if not await container.wait_ready(name):
+            return
+    assist = services.get('resolution_assist')
+    if assist:
+        assist.embedding_service = services['embedding']
+        assist.qdrant_service = services['qdrant']
+        assist.semantic_enabled = True
+        logger.info("🔍 Resolution assist service enhanced with semantic search capabilities")
+
+async def _reconcile_payload_indexes():
+    """Migrate existing collections to the declared payload indexes (payload_indexes.py)."""
+    qdrant_url = os.getenv('QDRANT_URL', 'http://localhost:6333')
+    try:
+        async with qdrant_session(timeout=600.0) as client:
+            reports = await reconcile_all_rest(client, qdrant_url)
+        changed = [r['collection'] for r in reports if r.get('created') or r.get('replaced')]
+        logger.info(f"🗂️ Payload indexes checked for {len(reports)} collections (updated: {changed or 'none'})")
+    except Exception as e:
+        logger.warning(f"⚠️ Payload index reconcile skipped: {e}")
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize services with fast LLM availability, background workflow."""
-    global workflow_ready, workflow_init_error
+    """Register components and load them in the background; /health answers immediately."""
     try:
-        logger.info("🚀 Fast startup: initializing Groq client first...")
-        # Groq first for quick chat availability
-        try:
-            services['groq'] = AsyncGroqClient()
-            logger.info(f"✅ Groq client ready (model={services['groq'].model})")
-        except Exception as e:
-            logger.warning(f"⚠️ Groq client unavailable: {e}")
-
-        # Prepare workflow objects but initialize lazily in background
-        services['workflow'] = DualDocumentProcessingWorkflow()
-        services['embedding'] = create_embedding_backend()
-        try:
-            emb = services['embedding']
-            model_name = getattr(emb, 'model_name', 'unknown')
-            dim = getattr(emb, 'get_dimension', lambda: 'n/a')()
-            logger.info(f"🧠 Embedding backend initialized: model='{model_name}' dim={dim}")
-        except Exception as e:
-            logger.warning(f"Embedding backend introspection failed: {e}")
-        services['qdrant'] = JiraQdrantService()
-        services['chat_context'] = ChatContextService()
-        services['jira'] = JiraService()
-        services['jira_dashboard'] = JiraDashboard(services['jira'])
-        services['team_analytics'] = TeamAnalyticsService(services['jira'])
-        services['resolution_assist'] = ResolutionAssistService(
-            jira_service=services['jira'],
-            ingestion_version="v3_resolved_flag_2025-09-30"  # Use the same version as in retrieval
-        )
-        # Optional ticket reranker (lazy init)
+        container.register('groq', _load_groq)
+        container.register('embedding', _load_embedding)
+        container.register('qdrant', _load_qdrant)
+        container.register('jira', _load_jira)
+        container.register('chat_context', _load_chat_context)
+        container.register('workflow', _load_workflow)
+        # Optional ticket reranker
         if os.getenv('ENABLE_TICKET_RERANK', 'false').lower() in {'1','true','yes','on'}:
-            services['ticket_reranker'] = ticket_reranker_service
-            logger.info("🔎 Ticket reranker registered (will lazy initialize on first use)")
+            container.register('reranker', _load_reranker, registry_key='ticket_reranker')
+            logger.info("🔎 Ticket reranker registered (loading in background)")
         else:
+            container.disable('reranker', "disabled (set ENABLE_TICKET_RERANK=true to enable)")
             logger.info("⚙️ Ticket reranker disabled (set ENABLE_TICKET_RERANK=true to enable)")
-
-        async def _init_workflow():
-            global workflow_ready, workflow_init_error
-            try:
-                logger.info("🏗️ Background: initializing full LangGraph workflow (embeddings, rerankers)...")
-                await services['workflow'].initialize()
-                
-                # Initialize chat context service
-                if services.get('chat_context'):
-                    await services['chat_context'].initialize()
-                    logger.info("✅ Chat context service initialized")
-                
-                # Enhance resolution assist service with embedding and qdrant for semantic search
-                if services.get('resolution_assist') and services.get('embedding') and services.get('qdrant'):
-                    services['resolution_assist'].embedding_service = services['embedding']
-                    services['resolution_assist'].qdrant_service = services['qdrant']
-                    services['resolution_assist'].semantic_enabled = True
-                    logger.info("🔍 Resolution assist service enhanced with semantic search capabilities")
-                
-                workflow_ready = True
-                logger.info("✅ Background workflow initialization complete")
-            except Exception as wf_err:
-                workflow_init_error = str(wf_err)
-                logger.error(f"❌ Workflow initialization failed: {wf_err}")
-
-        # Kick off background task
-        asyncio.create_task(_init_workflow())
-        logger.info("✅ Fast startup complete (workflow initializing in background)")
+        container.start()
+        asyncio.create_task(_enable_semantic_assist())
+        if payload_index_reconcile_enabled():
+            asyncio.create_task(_reconcile_payload_indexes())
+        logger.info("✅ Fast startup complete (components loading in background)")
     except Exception as e:
         logger.error(f"❌ Startup sequence failed: {e}")
         raise
@@ -341,7 +425,14 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup services on shutdown"""
     logger.info("🔄 Shutting down LangGraph services...")
-    # Add cleanup logic if needed
+    for name in ('qdrant', 'workflow'):
+        service = services.get(name)
+        if service is not None and hasattr(service, 'close'):
+            try:
+                await service.close()
+            except Exception as e:
+                logger.warning(f"Closing {name} failed: {e}")
+    await close_qdrant_http()
 
 # Health check endpoint
 @app.get("/health")
@@ -353,8 +444,11 @@ async def health_check():
             groq_info = services['groq'].get_model_info()
         except Exception as e:
             groq_info = {"error": str(e)}
+    components = container.readiness()
     return {
         "status": "healthy",
+        "ready": all(c["state"] in ("ready", "disabled") for c in components.values()),
+        "components": components,
         "timestamp": datetime.now().isoformat(),
         "version": "3.0.0",
         "services": {
@@ -370,7 +464,7 @@ async def health_check():
     }
 
 # Document processing endpoints
-@app.post("/api/documents/upload", response_model=DocumentUploadResponse)
+@app.post("/api/documents/upload", response_model=DocumentUploadResponse, dependencies=[Depends(container.require('workflow'))])
 async def upload_document(file: UploadFile = File(...)):
     """Upload and process a document using LangGraph workflow"""
     try:
@@ -405,7 +499,7 @@ async def upload_document(file: UploadFile = File(...)):
         logger.error(f"Document upload error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/documents/process")
+@app.post("/api/documents/process", dependencies=[Depends(container.require('workflow'))])
 async def process_documents():
     """Trigger document processing for files in configured directories"""
     try:
@@ -434,7 +528,7 @@ async def process_documents():
         raise HTTPException(status_code=500, detail=str(e))
 
 # Search endpoints  
-@app.post("/api/search", response_model=SearchResponse)
+@app.post("/api/search", response_model=SearchResponse, dependencies=[Depends(container.require('workflow'))])
 async def search_documents(request: SearchRequest):
     """Search documents using LangGraph workflow"""
     try:
@@ -464,7 +558,7 @@ async def search_documents(request: SearchRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 # GET search endpoint for frontend compatibility
-@app.get("/api/search")
+@app.get("/api/search", dependencies=[Depends(container.require('workflow'))])
 async def search_documents_get(query: str, limit: int = 10, collection: str = None):
     """Search documents using GET method (frontend compatibility)"""
     try:
@@ -494,7 +588,7 @@ async def search_documents_get(query: str, limit: int = 10, collection: str = No
         logger.error(f"Search error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/search/similar/{query}")
+@app.get("/api/search/similar/{query}", dependencies=[Depends(container.require('workflow'))])
 async def search_similar(query: str, limit: int = 10, collection: str = None):
     """Search for similar documents"""
     try:
@@ -526,96 +620,77 @@ async def search_similar(query: str, limit: int = 10, collection: str = None):
 
 LATEST_INGESTION_VERSION = "v3_resolved_flag_2025-09-30"
 
-# In-memory record of last prompt assembly for debugging
-_LAST_PROMPT_DEBUG: Dict[str, Any] = {}
-
 async def retrieve_ticket_context(message: str, qdrant_url: str, max_tickets: int = 3, per_ticket_limit: int = 5):
     """Retrieve ticket chunks & sources from Qdrant given a user message.
     Returns (context_text, sources)."""
-    # Allow alphanumeric project keys (letters+digits) before dash
-    ticket_pattern = re.compile(r'[A-Z0-9]{2,10}-\d{1,7}')
-    mentioned = list(set(ticket_pattern.findall(message.upper())))[:max_tickets]
+    keys = mentioned_ticket_keys(message, max_tickets)
     sources: List[Dict[str, Any]] = []
-    if not mentioned:
+    if not keys:
         logger.info("Retrieval: no ticket pattern detected in message")
         return "", sources
-    logger.info(f"Retrieval: detected tickets={mentioned}")
+    logger.info(f"Retrieval: detected tickets={keys}")
     retrieved_blocks = []
+    collected = []  # (payload, chunk_body, score, variant)
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            seen_block_ids = set()
-            for tk in mentioned:
-                variants = {tk, tk.lower()}
-                for word in re.findall(r'[A-Za-z]{2,10}-\d{1,7}', message):
-                    if word.upper() == tk:
-                        variants.add(word)
-                logger.info(f"Retrieval: ticket {tk} variants={variants}")
-                variant_points_collected = 0
-                for v in variants:
-                    body = {
-                        "limit": per_ticket_limit,
-                        "with_payload": True,
-                        "filter": {"must": [
-                            {"key": "ticket_key", "match": {"value": v}},
-                            {"key": "ingestion_version", "match": {"value": LATEST_INGESTION_VERSION}}
-                        ]}
-                    }
-                    try:
-                        resp = await client.post(f"{qdrant_url}/collections/jira_tickets/points/scroll", json=body)
-                        if resp.status_code == 200:
-                            data = resp.json()
-                            points = data.get('result', {}).get('points', [])
-                            if points:
-                                logger.info(f"Retrieval: ticket={tk} variant={v} points={len(points)}")
-                            for p in points:
-                                payload = p.get('payload', {})
-                                # Prefer enriched chunk text field name variants
-                                chunk_body = payload.get('chunk_text') or payload.get('text','')
-                                block_id = f"{payload.get('ticket_key','')}::{hash(chunk_body[:120])}"
-                                if block_id in seen_block_ids:
-                                    continue
-                                seen_block_ids.add(block_id)
-                                # Attach enriched analyses if present
-                                l1 = payload.get('l1_l2_analysis')
-                                l3 = payload.get('l3_engineer_analysis')
-                                extra_sections = []
-                                if l1:
-                                    extra_sections.append(f"L1/L2: {str(l1)[:400]}")
-                                if l3:
-                                    extra_sections.append(f"L3: {str(l3)[:400]}")
-                                analyses_text = ("\n" + "\n".join(extra_sections)) if extra_sections else ""
-                                status = (payload.get('status') or '').title()
-                                resolved = status in {"Done","Closed","Resolved"}
-                                resolution_tag = "[RESOLVED]" if resolved else "[ACTIVE]"
-                                guidance_line = "Resolution context (do NOT propose new fix)." if resolved else "Active ticket context (you may propose troubleshooting steps)."
-                                block = (
-                                    f"{resolution_tag} Ticket: {payload.get('ticket_key','')} | Status: {status} | Priority: {payload.get('priority','')} | Assignee: {payload.get('assignee','')}\n"
-                                    f"Summary: {payload.get('summary','')}\n"
-                                    f"Guidance: {guidance_line}\n"
-                                    f"Snippet: {chunk_body[:600]}{analyses_text}\n---"
-                                )
-                                retrieved_blocks.append(block)
-                                sources.append({
-                                    "ticket_key": payload.get('ticket_key'),
-                                    "summary": payload.get('summary'),
-                                    "status": payload.get('status'),
-                                    "priority": payload.get('priority'),
-                                    "assignee": payload.get('assignee'),
-                                    "issue_type": payload.get('issue_type'),
-                                    "components": payload.get('components'),
-                                    "score": p.get('score'),
-                                    "variant": v,
-                                    "is_resolved": payload.get('is_resolved')
-                                })
-                                variant_points_collected += 1
-                                if variant_points_collected >= per_ticket_limit:
-                                    break
-                    except Exception as inner_e:
-                        logger.warning(f"Retrieval: ticket {tk} variant {v} error: {inner_e}")
-                if variant_points_collected == 0:
-                    logger.info(f"Retrieval: no points found for ticket {tk}")
+        # One MatchAny scroll over every variant of every mentioned ticket, grouped per ticket
+        async with qdrant_session(timeout=15.0) as client:
+            grouped, scrolls = await scroll_ticket_chunks(client, qdrant_url, keys, per_ticket_limit,
+                                                          LATEST_INGESTION_VERSION, payload_fields("ticket_context"))
+        seen_block_ids = set()
+        for tk, points in grouped.items():
+            if not points:
+                logger.info(f"Retrieval: no points found for ticket {tk}")
+                continue
+            logger.info(f"Retrieval: ticket={tk} points={len(points)}")
+            for p in points:
+                payload = p.get('payload', {})
+                # Prefer enriched chunk text field name variants
+                chunk_body = payload.get('chunk_text') or payload.get('text','')
+                block_id = f"{payload.get('ticket_key','')}::{hash(chunk_body[:120])}"
+                if block_id in seen_block_ids:
+                    continue
+                seen_block_ids.add(block_id)
+                collected.append((payload, chunk_body, p.get('score'), payload.get('ticket_key')))
+        logger.info(f"Retrieval: {len(keys)} tickets fetched in {scrolls} scroll request(s)")
     except Exception as e:
         logger.warning(f"Retrieval: augmentation error {e}")
+    # Analyses of doc-store chunks: one batched lookup by doc_ref for all collected chunks
+    doc_refs = [pl.get(DOC_REF_KEY) for pl, _, _, _ in collected if pl.get(DOC_REF_KEY)]
+    docs = await resolve_doc_refs(doc_refs, ANALYSIS_FIELDS)
+    for payload, chunk_body, score, v in collected:
+        doc = docs.get(payload.get(DOC_REF_KEY)) or {}
+        # Attach enriched analyses if present
+        l1 = payload.get('l1_l2_analysis') or doc.get('l1_l2_analysis')
+        l3 = payload.get('l3_engineer_analysis') or doc.get('l3_engineer_analysis')
+        extra_sections = []
+        if l1:
+            extra_sections.append(f"L1/L2: {str(l1)[:400]}")
+        if l3:
+            extra_sections.append(f"L3: {str(l3)[:400]}")
+        analyses_text = ("\n" + "\n".join(extra_sections)) if extra_sections else ""
+        status = (payload.get('status') or '').title()
+        resolved = status in {"Done","Closed","Resolved"}
+        resolution_tag = "[RESOLVED]" if resolved else "[ACTIVE]"
+        guidance_line = "Resolution context (do NOT propose new fix)." if resolved else "Active ticket context (you may propose troubleshooting steps)."
+        block = (
+            f"{resolution_tag} Ticket: {payload.get('ticket_key','')} | Status: {status} | Priority: {payload.get('priority','')} | Assignee: {payload.get('assignee','')}\n"
+            f"Summary: {payload.get('summary','')}\n"
+            f"Guidance: {guidance_line}\n"
+            f"Snippet: {chunk_body[:600]}{analyses_text}\n---"
+        )
+        retrieved_blocks.append(block)
+        sources.append({
+            "ticket_key": payload.get('ticket_key'),
+            "summary": payload.get('summary'),
+            "status": payload.get('status'),
+            "priority": payload.get('priority'),
+            "assignee": payload.get('assignee'),
+            "issue_type": payload.get('issue_type'),
+            "components": payload.get('components'),
+            "score": score,
+            "variant": v,
+            "is_resolved": payload.get('is_resolved')
+        })
     if retrieved_blocks:
         context_text = "[JIRA TICKET CONTEXT]\n" + "\n".join(retrieved_blocks[:12]) + "\n[END CONTEXT]"
         logger.info(f"Retrieval: assembled blocks={len(retrieved_blocks)} sources={len(sources)}")
@@ -641,7 +716,8 @@ async def semantic_ticket_search(
          - semantic_norm: semantic score normalized by max score
       3. Composite score = 0.55*semantic_norm + 0.25*token_overlap + 0.15*number_overlap_norm + 0.05*ticket_key_match
          (number_overlap_norm is number_overlap divided by max number_overlap (>=1) across candidates)
-      4. Return top_k candidates with added 'composite_score' and feature breakdown for debugging.
+      4. Collapse chunks to one candidate per ticket (TICKET_COLLAPSE_MODE) so the cross-encoder scores each ticket once.
+      5. Return top_k candidates with added 'composite_score' and feature breakdown for debugging.
 
     Rationale: reduces cases where close vector neighbors with similar wording but mismatched numeric identifiers outrank the correct ticket (e.g., mis-picking 8756 vs 9056).
     """
@@ -650,21 +726,26 @@ async def semantic_ticket_search(
 
     try:
         # --- Step 1: Semantic candidate retrieval ---
-        vector = embedding_service.get_embeddings([query])[0]
-        async with httpx.AsyncClient(timeout=20.0) as client:
+        vector = await embedding_service.get_embedding_async(query)
+        async with qdrant_session(timeout=20.0) as client:
             body = {
                 "vector": vector,
                 "limit": semantic_limit,
-                "with_payload": True,
+                "with_payload": payload_fields("semantic_search"),
                 "filter": {"must": [
                     {"key": "ingestion_version", "match": {"value": LATEST_INGESTION_VERSION}}
                 ]}
             }
+            quantization = search_quantization_rest()
+            if quantization:
+                # Oversample on the quantized vectors, rescore with the originals
+                body["params"] = {"quantization": quantization}
             resp = await client.post(f"{qdrant_url}/collections/jira_tickets/points/search", json=body)
             if resp.status_code != 200:
                 logger.warning(f"Semantic search HTTP {resp.status_code}: {resp.text[:160]}")
                 return []
             raw_hits = resp.json().get('result', [])
+            projection_stats.record("semantic_search", len(resp.content), len(raw_hits))
             if not raw_hits:
                 return []
 
@@ -696,6 +777,7 @@ async def semantic_ticket_search(
             number_overlap_values.append(number_overlap)
             candidates.append({
                 "payload": payload,
+                "point_id": h.get('id'),
                 "semantic_score": sem_score,
                 "semantic_norm": semantic_norm,
                 "token_overlap": token_overlap,
@@ -719,36 +801,56 @@ async def semantic_ticket_search(
             c['composite_score'] = composite
 
         candidates.sort(key=lambda x: x['composite_score'], reverse=True)
+        # One candidate per ticket (best chunk first): each ticket is cross-encoded once
+        collapse_mode = ticket_collapse_mode()
+        if collapse_mode != "off":
+            chunk_count = len(candidates)
+            candidates = collapse_by_ticket(candidates, lambda c: (c['payload'].get('ticket_key') or '').upper())
+            if len(candidates) < chunk_count:
+                logger.info(f"SemanticHybrid: collapsed {chunk_count} chunks into {len(candidates)} tickets")
         pre_rerank_top = candidates[: min(len(candidates), max(top_k*2, 12))]
 
         # --- Step 4 (optional): Cross-encoder reranking if enabled ---
         from math import isfinite  # already imported but safe
         rerank_used = False
         if 'ticket_reranker' in services:
+            # Cascade: skip on a decisive composite margin, size the rerank set to the latency budget
+            decision = rerank_cascade.decide([c['composite_score'] for c in candidates], top_k, len(pre_rerank_top))
             try:
-                reranker = services['ticket_reranker']
-                # Build lightweight docs list for reranker
-                docs_for_rerank = []
-                for cand in pre_rerank_top:
-                    pl = cand['payload']
-                    docs_for_rerank.append({
-                        'ticket_key': pl.get('ticket_key'),
-                        'summary': pl.get('summary'),
-                        'content': (pl.get('chunk_text') or pl.get('text') or '')[:600]
-                    })
-                # Perform reranking
-                reranked = await reranker.rerank_async(query, docs_for_rerank, top_k=top_k)
-                # Map rerank scores back
-                rerank_map = {r.get('ticket_key'): r.get('rerank_score') for r in reranked}
-                for cand in pre_rerank_top:
-                    tk = cand['payload'].get('ticket_key')
-                    if tk in rerank_map:
-                        cand['rerank_score'] = rerank_map[tk]
-                # Sort primarily by rerank_score then composite fallback
-                pre_rerank_top.sort(key=lambda c: (c.get('rerank_score', -1), c['composite_score']), reverse=True)
-                rerank_used = True
+                if decision.rerank:
+                    reranker = services['ticket_reranker']
+                    # Build lightweight docs list for reranker
+                    docs_for_rerank = []
+                    concat = collapse_mode == "concat" and hasattr(reranker, 'pack_spans')
+                    for cand in pre_rerank_top[:decision.pairs]:
+                        pl = cand['payload']
+                        spans = [m['payload'].get('chunk_text') or m['payload'].get('text') or '' for m in cand.get('chunks', [cand])]
+                        docs_for_rerank.append({
+                            'ticket_key': pl.get('ticket_key'),
+                            'summary': pl.get('summary'),
+                            'content': reranker.pack_spans(query, pl.get('summary') or '', spans) if concat else spans[0][:600]
+                        })
+                    # Perform reranking
+                    rerank_info: Dict[str, int] = {}
+                    reranked = await rerank_cascade.run(decision, reranker.rerank_async(
+                        query, docs_for_rerank, content_field='content', top_k=top_k,
+                        snippet_chars=None if concat else 400, info=rerank_info), info=rerank_info)
+                    # None when it overran the budget or the reranker fell back -> composite order
+                    if reranked is not None:
+                        # Map rerank scores back (only real scores)
+                        rerank_map = {r.get('ticket_key'): r['rerank_score'] for r in reranked
+                                      if r.get('rerank_score') is not None}
+                        for cand in pre_rerank_top:
+                            tk = cand['payload'].get('ticket_key')
+                            if tk in rerank_map:
+                                cand['rerank_score'] = rerank_map[tk]
+                        if rerank_map:
+                            # Sort primarily by rerank_score then composite fallback
+                            pre_rerank_top.sort(key=lambda c: (c.get('rerank_score', -1), c['composite_score']), reverse=True)
+                            rerank_used = True
             except Exception as rr_err:
                 logger.warning(f"SemanticHybrid: reranker failed {rr_err}")
+            rerank_cascade.record(decision)
         top_candidates = pre_rerank_top[:top_k]
 
         results: List[Dict[str, Any]] = []
@@ -758,13 +860,15 @@ async def semantic_ticket_search(
             # Preserve original semantic score field name for backward compatibility
             payload['score'] = c['semantic_score']
             payload['composite_score'] = c['composite_score']
+            payload[POINT_ID_KEY] = c.get('point_id')
             if 'rerank_score' in c:
                 payload['rerank_score'] = c['rerank_score']
             payload['_features'] = {
                 'semantic_norm': round(c['semantic_norm'], 4),
                 'token_overlap': round(c['token_overlap'], 4),
                 'number_overlap': c['number_overlap'],
-                'ticket_key_match': c['ticket_key_match']
+                'ticket_key_match': c['ticket_key_match'],
+                'ticket_chunks': len(c.get('chunks', [c]))
             }
             results.append(payload)
             debug_lines.append(
@@ -781,7 +885,7 @@ async def semantic_ticket_search(
         return []
 
 # Chat endpoint
-@app.post("/api/chat", response_model=ChatResponse)
+@app.post("/api/chat", response_model=ChatResponse, dependencies=[Depends(container.require('groq'))])
 async def chat_endpoint(request: ChatRequest):
     """Chat endpoint with optional streaming using Groq + RAG sources + conversation history."""
     try:
@@ -808,6 +912,8 @@ async def chat_endpoint(request: ChatRequest):
             if embedding_service:
                 sem_hits = await semantic_ticket_search(request.message, qdrant_url, embedding_service)
                 if sem_hits:
+                    # Analyses were left out of the search payload: fetch them for the hits used here
+                    await hydrate_payloads(qdrant_url, "jira_tickets", sem_hits[:6], ANALYSIS_FIELDS)
                     sem_blocks = []
                     for h in sem_hits[:6]:
                         # Build context with L3 engineer analysis (contains the actual solution!)
@@ -927,7 +1033,7 @@ async def chat_endpoint(request: ChatRequest):
 
         # Save debug info
         try:
-            _LAST_PROMPT_DEBUG.update({
+            await shared_state.aset('last_prompt', {
                 'session_id': session_id,
                 'user_message': request.message,
                 'chat_history': chat_history,
@@ -952,7 +1058,7 @@ async def chat_endpoint(request: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 # JIRA Assist Endpoint
-@app.get("/api/jira/assist/{ticket_key}", response_model=JiraAssistResponse)
+@app.get("/api/jira/assist/{ticket_key}", response_model=JiraAssistResponse, dependencies=[Depends(container.require('jira', 'groq'))])
 async def jira_assist(ticket_key: str, max_refs: int = 5):
         """Provide suggested resolution guidance for an unresolved ticket by leveraging resolved tickets.
         Steps:
@@ -999,10 +1105,10 @@ async def jira_assist(ticket_key: str, max_refs: int = 5):
         qdrant_url = os.getenv('QDRANT_URL', 'http://localhost:6333')
         refs: List[Dict[str, Any]] = []
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
+            async with qdrant_session(timeout=15.0) as client:
                 body = {
                     "limit": 200,
-                    "with_payload": True,
+                    "with_payload": payload_fields("resolved_refs"),
                     "filter": {"must": [
                         {"key": "is_resolved", "match": {"value": True}},
                         {"key": "ingestion_version", "match": {"value": LATEST_INGESTION_VERSION}}
@@ -1011,6 +1117,7 @@ async def jira_assist(ticket_key: str, max_refs: int = 5):
                 resp = await client.post(f"{qdrant_url}/collections/jira_tickets/points/scroll", json=body)
                 if resp.status_code == 200:
                     points = resp.json().get('result', {}).get('points', [])
+                    projection_stats.record("resolved_refs", len(resp.content), len(points))
                     # Basic relevance heuristic: same project keyword overlap in summary
                     target_words = set(details.get('summary','').lower().split())
                     scored = []
@@ -1018,9 +1125,11 @@ async def jira_assist(ticket_key: str, max_refs: int = 5):
                         pl = p.get('payload', {})
                         summary = (pl.get('summary') or '').lower()
                         overlap = len(target_words & set(summary.split()))
-                        scored.append((overlap, pl))
+                        scored.append((overlap, p.get('id'), pl))
                     scored.sort(key=lambda x: x[0], reverse=True)
-                    for overlap, pl in scored[:max_refs]:
+                    top = [(overlap, {**pl, POINT_ID_KEY: pid}) for overlap, pid, pl in scored[:max_refs]]
+                    await hydrate_payloads(qdrant_url, "jira_tickets", [pl for _, pl in top], ANALYSIS_FIELDS)
+                    for overlap, pl in top:
                         refs.append({
                             "ticket_key": pl.get('ticket_key'),
                             "status": pl.get('status'),
@@ -1065,7 +1174,7 @@ async def jira_assist(ticket_key: str, max_refs: int = 5):
         )
 
 # Collections endpoint
-@app.get("/api/collections")
+@app.get("/api/collections", dependencies=[Depends(container.require('qdrant'))])
 async def list_collections():
     """List available collections"""
     try:
@@ -1117,7 +1226,7 @@ async def get_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 # JIRA Dashboard Endpoints
-@app.get("/api/jira/filters")
+@app.get("/api/jira/filters", dependencies=[Depends(container.require('jira'))])
 async def get_jira_filters():
     """Get JIRA filter options for dropdowns"""
     try:
@@ -1131,7 +1240,7 @@ async def get_jira_filters():
         logger.error(f"JIRA filters error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/jira/search")
+@app.post("/api/jira/search", dependencies=[Depends(container.require('jira'))])
 async def search_jira_tickets(request: JiraSearchRequest):
     """Search JIRA tickets with filters"""
     try:
@@ -1156,7 +1265,7 @@ async def search_jira_tickets(request: JiraSearchRequest):
         logger.error(f"JIRA search error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/jira/search")
+@app.get("/api/jira/search", dependencies=[Depends(container.require('jira'))])
 async def search_jira_tickets_get(
     page: int = 1, 
     limit: int = 20, 
@@ -1201,7 +1310,7 @@ async def search_jira_tickets_get(
         logger.error(f"JIRA search GET error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/jira/ticket/{ticket_key}")
+@app.get("/api/jira/ticket/{ticket_key}", dependencies=[Depends(container.require('jira'))])
 async def get_jira_ticket(ticket_key: str):
     """Get detailed JIRA ticket information"""
     try:
@@ -1221,7 +1330,7 @@ async def get_jira_ticket(ticket_key: str):
         logger.error(f"JIRA ticket details error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/jira/ticket")
+@app.post("/api/jira/ticket", dependencies=[Depends(container.require('jira'))])
 async def create_jira_ticket(request: JiraTicketRequest):
     """Create a new JIRA ticket"""
     try:
@@ -1246,7 +1355,7 @@ async def create_jira_ticket(request: JiraTicketRequest):
         logger.error(f"JIRA ticket creation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/jira/comment")
+@app.post("/api/jira/comment", dependencies=[Depends(container.require('jira'))])
 async def add_jira_comment(request: JiraCommentRequest):
     """Add comment to JIRA ticket"""
     try:
@@ -1273,7 +1382,7 @@ async def add_jira_comment(request: JiraCommentRequest):
         logger.error(f"JIRA comment error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/jira/dashboard/stats")
+@app.get("/api/jira/dashboard/stats", dependencies=[Depends(container.require('jira'))])
 async def get_jira_dashboard_stats():
     """Get JIRA dashboard statistics"""
     try:
@@ -1288,7 +1397,7 @@ async def get_jira_dashboard_stats():
         logger.error(f"JIRA dashboard stats error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/jira/dashboard")
+@app.get("/api/jira/dashboard", dependencies=[Depends(container.require('jira'))])
 async def get_jira_dashboard(project_filter: str = Query('ALL'), date_range: str = Query('7d')):
     """Aggregate dashboard data in shape expected by legacy frontend JiraPanel.
 
@@ -1323,7 +1432,7 @@ async def get_jira_dashboard(project_filter: str = Query('ALL'), date_range: str
         logger.error(f"JIRA dashboard aggregate error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/jira/projects")
+@app.get("/api/jira/projects", dependencies=[Depends(container.require('jira'))])
 async def get_jira_projects():
     """Return list of available JIRA projects (basic). Derives from recent tickets as fallback.
 
@@ -1385,7 +1494,7 @@ async def get_jira_status():
         }
 
 # Team Analytics Endpoints
-@app.get("/api/jira/team-analytics")
+@app.get("/api/jira/team-analytics", dependencies=[Depends(container.require('jira'))])
 async def get_team_analytics(
     date_range: str = Query("30d", alias="date_range"),  # accept ?date_range=
     custom_jql: str = None,
@@ -1565,7 +1674,7 @@ async def get_team_analytics(
         logger.error(f"Team analytics error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/jira/team-analytics/{assignee}")
+@app.get("/api/jira/team-analytics/{assignee}", dependencies=[Depends(container.require('jira'))])
 async def get_individual_analytics(assignee: str, date_range: str = "30d"):
     """Get individual team member analytics"""
     try:
@@ -1592,7 +1701,7 @@ async def get_individual_analytics(assignee: str, date_range: str = "30d"):
         raise HTTPException(status_code=500, detail=str(e))
 
 # New endpoint used by frontend (expects different shape)
-@app.get("/api/jira/individual-analysis/{assignee}")
+@app.get("/api/jira/individual-analysis/{assignee}", dependencies=[Depends(container.require('jira'))])
 async def get_individual_analysis_frontend(assignee: str, date_range: str = Query("30d", alias="date_range")):
     """Frontend specific individual analysis shape.
 
@@ -1665,7 +1774,7 @@ async def get_individual_analysis_frontend(assignee: str, date_range: str = Quer
         logger.error(f"Individual analysis (frontend) error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/jira/live/summary")
+@app.get("/api/jira/live/summary", dependencies=[Depends(container.require('jira'))])
 async def get_live_summary(project_filter: str = "ALL", date_range: str = "7d", quick_filter: str = None):
     """Get live JIRA dashboard summary data.
 
@@ -1727,7 +1836,7 @@ async def get_live_summary(project_filter: str = "ALL", date_range: str = "7d",
         logger.error(f"Live summary error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/jira/recent")
+@app.get("/api/jira/recent", dependencies=[Depends(container.require('jira'))])
 async def get_recent_activity(project_key: str = "MBSL3", limit: int = 20, quick_filter: str = None):
     """Fast recent activity endpoint used by dashboard RecentActivity component.
 
@@ -1781,7 +1890,7 @@ async def get_recent_activity(project_key: str = "MBSL3", limit: int = 20, quick
         raise HTTPException(status_code=500, detail=str(e))
 
 # JIRA Analysis Endpoint
-@app.post("/api/jira/analyze", response_model=JiraAnalyzeResponse)
+@app.post("/api/jira/analyze", response_model=JiraAnalyzeResponse, dependencies=[Depends(container.require('jira', 'groq'))])
 async def analyze_jira_ticket(request: JiraAnalyzeRequest):
     """
     Advanced AI-powered analysis of JIRA tickets for resolution guidance.
@@ -1877,7 +1986,7 @@ async def analyze_jira_ticket(request: JiraAnalyzeRequest):
 
         # Get retrieval method from debug info (use relative import to avoid ModuleNotFoundError)
         from .resolution_assist_service import get_last_assist_debug
-        debug_info = get_last_assist_debug()
+        debug_info = await get_last_assist_debug()
         retrieval_method = debug_info.get('retrieval_method', 'lexical')
 
         return JiraAnalyzeResponse(
@@ -2076,7 +2185,7 @@ async def get_analyze_debug():
     try:
         # Use relative import to match package context
         from .resolution_assist_service import get_last_assist_debug
-        debug_info = get_last_assist_debug()
+        debug_info = await get_last_assist_debug()
         return {
             "debug_info": debug_info,
             "timestamp": datetime.now().isoformat()
@@ -2089,7 +2198,7 @@ async def get_analyze_debug():
 # Chat Session Management Endpoints
 # ============================================================================
 
-@app.post("/api/chat/sessions", response_model=ChatSessionResponse)
+@app.post("/api/chat/sessions", response_model=ChatSessionResponse, dependencies=[Depends(container.require('chat_context'))])
 async def create_chat_session(request: ChatSessionRequest):
     """Create a new chat session"""
     try:
@@ -2115,7 +2224,7 @@ async def create_chat_session(request: ChatSessionRequest):
         logger.error(f"Create chat session error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/chat/sessions")
+@app.get("/api/chat/sessions", dependencies=[Depends(container.require('chat_context'))])
 async def list_chat_sessions(user_id: str = None, limit: int = 50):
     """List chat sessions for a user"""
     try:
@@ -2136,7 +2245,7 @@ async def list_chat_sessions(user_id: str = None, limit: int = 50):
         logger.error(f"List chat sessions error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/chat/sessions/{session_id}")
+@app.get("/api/chat/sessions/{session_id}", dependencies=[Depends(container.require('chat_context'))])
 async def get_chat_session(session_id: str):
     """Get chat session information"""
     try:
@@ -2156,7 +2265,7 @@ async def get_chat_session(session_id: str):
         logger.error(f"Get chat session error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/api/chat/sessions/{session_id}", response_model=DeleteResponse)
+@app.delete("/api/chat/sessions/{session_id}", response_model=DeleteResponse, dependencies=[Depends(container.require('chat_context'))])
 async def delete_chat_session(session_id: str):
     """Delete a chat session and all its messages"""
     try:
@@ -2181,7 +2290,7 @@ async def delete_chat_session(session_id: str):
         logger.error(f"Delete chat session error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/chat/sessions/{session_id}/history", response_model=ChatHistoryResponse)
+@app.get("/api/chat/sessions/{session_id}/history", response_model=ChatHistoryResponse, dependencies=[Depends(container.require('chat_context'))])
 async def get_chat_history(session_id: str, limit: int = 50):
     """Get chat history for a session"""
     try:
@@ -2202,7 +2311,7 @@ async def get_chat_history(session_id: str, limit: int = 50):
         logger.error(f"Get chat history error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/api/chat/messages/{message_id}", response_model=DeleteResponse)
+@app.delete("/api/chat/messages/{message_id}", response_model=DeleteResponse, dependencies=[Depends(container.require('chat_context'))])
 async def delete_chat_message(message_id: str):
     """Delete a specific chat message"""
     try:
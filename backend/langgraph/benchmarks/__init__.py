@@ -0,0 +1 @@
+# Benchmarks module for the backend
@@ -0,0 +1,95 @@
+"""Shared text corpora for the benchmark scripts.
+
+Either real ticket text (summary + description from a JIRA export in JSON) or a
+reproducible synthetic corpus with ticket-like (long-tailed, mostly short) and
+PDF-like (packed paragraph groups, clustered near the chunk budget) length
+distributions.
+"""
+from __future__ import annotations
+import json
+import random
+import os
+from typing import List, Optional
+
+_VOCAB = (
+    "login timeout error gateway payment retry failed user session token expired "
+    "database connection pool latency spike deployment rollback config mismatch "
+    "api response 500 null pointer exception queue backlog consumer lag cache miss "
+    "certificate renewal dns resolution kafka partition rebalance memory leak heap "
+    "customer reports intermittent failure after upgrade version release build "
+    "android ios app crash on startup push notification delayed sync conflict"
+).split()
+
+
+def synthetic_texts(n: int, seed: int = 0, min_words: int = 8, max_words: int = 400) -> List[str]:
+    """Ticket-like texts: mostly short, with a long tail (log-normal word counts)."""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(n):
+        words = int(min(max_words, max(min_words, rng.lognormvariate(3.6, 0.9))))
+        body = " ".join(rng.choice(_VOCAB) for _ in range(words))
+        texts.append(f"TKT-{i} {body}")
+    return texts
+
+
+def synthetic_pdf_texts(n: int, seed: int = 0, min_words: int = 60, max_words: int = 380) -> List[str]:
+    """PDF-chunk-like texts: sentence-structured paragraph groups, mostly close to the chunk budget."""
+    rng = random.Random(seed + 7919)
+    texts = []
+    for i in range(n):
+        words = int(min(max_words, max(min_words, rng.gauss(260, 70))))
+        sentences, remaining = [], words
+        while remaining > 0:
+            k = min(remaining, rng.randint(8, 24))
+            sentences.append(" ".join(rng.choice(_VOCAB) for _ in range(k)).capitalize() + ".")
+            remaining -= k
+        texts.append(f"Section {i}. " + " ".join(sentences))
+    return texts
+
+
+def synthetic_corpus(n: int, pdf_fraction: float = 0.3, seed: int = 0) -> List[str]:
+    """Ticket and PDF chunks mixed in ingestion-like proportions (shuffled reproducibly)."""
+    n_pdf = int(round(n * pdf_fraction))
+    texts = synthetic_texts(n - n_pdf, seed=seed) + synthetic_pdf_texts(n_pdf, seed=seed)
+    random.Random(seed).shuffle(texts)
+    return texts
+
+
+def ticket_texts(path: str, n: Optional[int] = None) -> List[str]:
+    """Summary + description of each ticket in a JSON export (list or {'tickets': [...]})."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("tickets") or data.get("issues") or []
+    texts = []
+    for t in data:
+        fields = t.get("fields", t) if isinstance(t, dict) else {}
+        summary = fields.get("summary") or ""
+        description = fields.get("description") or ""
+        text = f"{summary}\n{description}".strip()
+        if text:
+            texts.append(text)
+        if n and len(texts) >= n:
+            break
+    return texts
+
+
+def load_texts(path: Optional[str] = None, n: int = 512, seed: int = 0) -> List[str]:
+    return ticket_texts(path, n) if path else synthetic_texts(n, seed=seed)
+
+
+def ticket_chunk_texts(path: str, n: Optional[int] = None) -> List[str]:
+    """Chunk texts exactly as ingestion produces them (JIRATicketProcessor.create_ticket_chunks)."""
+    from ..jira_document_processor import JIRATicketProcessor
+    processor = JIRATicketProcessor(None, None, documents_path=os.path.dirname(os.path.abspath(path)))
+    processor.doc_store = None  # texts only: do not write the ticket doc store
+    texts: List[str] = []
+    for ticket in processor.parse_ticket_file(path):
+        texts.extend(c.text for c in processor.create_ticket_chunks(ticket))
+        if n and len(texts) >= n:
+            return texts[:n]
+    return texts
+
+
+def load_chunks(path: Optional[str] = None, n: int = 512, seed: int = 0) -> List[str]:
+    return ticket_chunk_texts(path, n) if path else synthetic_texts(n, seed=seed)
@@ -0,0 +1,27 @@
+"""Shared Qdrant helpers for the benchmark scripts (REST, httpx.AsyncClient)."""
+from __future__ import annotations
+from typing import Any, Dict
+
+
+async def segment_usage(client, qdrant_url: str, collection: str) -> Dict[str, Any]:
+    """Disk / RAM bytes summed over the collection's segments (Qdrant telemetry)."""
+    resp = await client.get(f"{qdrant_url}/telemetry", params={"details_level": 3})
+    resp.raise_for_status()
+    collections = resp.json().get("result", {}).get("collections", {}).get("collections", []) or []
+    usage = {"disk_bytes": 0, "ram_bytes": 0, "segments": 0}
+    for c in collections:
+        if c.get("id") != collection:
+            continue
+        for shard in c.get("shards", []) or []:
+            for segment in (shard.get("local") or {}).get("segments", []) or []:
+                info = segment.get("info", {})
+                usage["disk_bytes"] += int(info.get("disk_usage_bytes", 0))
+                usage["ram_bytes"] += int(info.get("ram_usage_bytes", 0))
+                usage["segments"] += 1
+    return usage
+
+
+def usage_mb(usage: Dict[str, Any]) -> Dict[str, Any]:
+    """segment_usage() with byte counts as MB (disk_mb, ram_mb)."""
+    return {k.replace("_bytes", "_mb"): round(v / 1024**2, 2) if k.endswith("_bytes") else v
+            for k, v in usage.items()}
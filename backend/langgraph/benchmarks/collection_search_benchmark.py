@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Collection Search Benchmark (sequential vs concurrent PDF + Jira search)
+========================================================================
+
+Creates two scratch collections (--pdf-n and --jira-n random unit vectors of --dim)
+and times the workflow search step for --queries query vectors both ways:
+- sequential: search the PDF collection, then the Jira collection (previous _search_node)
+- concurrent: JiraQdrantService.search_collections (both searches in flight at once)
+
+Reports p50 / p95 latency of each mode next to the p50 of each single-collection
+search, so the concurrent figure can be compared with max(pdf, jira) rather than
+their sum. Query embedding is excluded (it now happens once in both modes).
+Requires a reachable Qdrant (QDRANT_URL); the scratch collections are dropped.
+
+Usage:
+    python -m backend.langgraph.benchmarks.collection_search_benchmark
+    python -m backend.langgraph.benchmarks.collection_search_benchmark --pdf-n 50000 --jira-n 200000 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import numpy as np
+
+from ..jira_qdrant_service import JiraQdrantService
+
+
+def _unit_rows(rng, n, dim):
+    matrix = rng.standard_normal((n, dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix
+
+
+def _percentiles(samples):
+    return {"p50_ms": round(float(np.percentile(samples, 50)), 2),
+            "p95_ms": round(float(np.percentile(samples, 95)), 2)}
+
+
+async def _timed(fn, queries):
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        await fn(q)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-n", type=int, default=20000)
+    parser.add_argument("--jira-n", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=15)
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    qdrant = JiraQdrantService()
+    if qdrant.connection_method == "memory":
+        raise SystemExit("Qdrant is not reachable (in-memory fallback)")
+    rng = np.random.default_rng(0)
+    suffix = uuid.uuid4().hex[:8]
+    pdf, jira = f"bench_search_pdf_{suffix}", f"bench_search_jira_{suffix}"
+    queries = _unit_rows(rng, args.queries, args.dim)
+    report = {"pdf_points": args.pdf_n, "jira_points": args.jira_n, "queries": args.queries}
+
+    async def run():
+        try:
+            for name, n in ((pdf, args.pdf_n), (jira, args.jira_n)):
+                await qdrant.upsert_matrix(name, [str(uuid.uuid4()) for _ in range(n)], _unit_rows(rng, n, args.dim),
+                                           [{"text": f"{name} {i}"} for i in range(n)])
+            for q in queries[:8]:  # warm-up
+                await qdrant.search_collections(q, [pdf, jira], args.limit, score_threshold=-1.0)
+
+            async def single(name):
+                return await _timed(lambda q: qdrant._search(name, q, args.limit, -1.0), queries)
+
+            async def sequential(q):
+                for name in (pdf, jira):
+                    await qdrant._search(name, q, args.limit, -1.0)
+
+            report["pdf_only"] = _percentiles(await single(pdf))
+            report["jira_only"] = _percentiles(await single(jira))
+            report["sequential"] = _percentiles(await _timed(sequential, queries))
+            report["concurrent"] = _percentiles(await _timed(
+                lambda q: qdrant.search_collections(q, [pdf, jira], args.limit, score_threshold=-1.0), queries))
+        finally:
+            await qdrant.close()
+
+    for name, n in ((pdf, args.pdf_n), (jira, args.jira_n)):
+        qdrant.create_collection(name, args.dim)
+    try:
+        asyncio.run(run())
+    finally:
+        for name in (pdf, jira):
+            qdrant.client.delete_collection(name)
+    print(f"📊 {json.dumps(report)}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Embedding Backend Parity & Throughput
+=====================================
+
+Compares the ONNX Runtime backend (float32 or int8) against the SentenceTransformer
+backend on the same texts:
+- cosine agreement per text (mean / p5 / min)
+- top-k neighbour overlap when each backend ranks the corpus for a set of queries
+- encode throughput (texts/sec), caches disabled
+
+Usage:
+    python -m backend.langgraph.benchmarks.embedding_backend_parity --n 512 --quantize int8
+    python -m backend.langgraph.benchmarks.embedding_backend_parity --tickets all_tickets.json --json out.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from ..embedding_bge_service import BGEEmbeddingService
+from ..embedding_onnx_service import ONNXEmbeddingService
+from ._corpus import load_texts
+
+
+def _throughput(svc, texts, batch_size, repeats):
+    svc._encode_uncached(texts[:batch_size], batch_size)  # warm-up
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        vecs = svc._encode_uncached(texts, batch_size)
+        best = min(best, time.perf_counter() - start)
+    return vecs, len(texts) / best
+
+
+def _topk_overlap(a, b, n_queries, k):
+    overlaps = []
+    for q in range(min(n_queries, len(a))):
+        top_a = set(np.argsort(-(a @ a[q]))[1:k + 1])
+        top_b = set(np.argsort(-(b @ b[q]))[1:k + 1])
+        overlaps.append(len(top_a & top_b) / k)
+    return float(np.mean(overlaps)) if overlaps else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", help="JIRA export (JSON) to sample texts from; synthetic corpus if omitted")
+    parser.add_argument("--n", type=int, default=512, help="Number of texts")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--quantize", default="int8", choices=["int8", "none"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--topk", type=int, default=10)
+    parser.add_argument("--json", dest="json_out", help="Write the report to this file")
+    args = parser.parse_args()
+
+    texts = load_texts(args.tickets, args.n)
+    print(f"🧪 {len(texts)} texts, batch_size={args.batch_size}, onnx quantize={args.quantize}")
+
+    reference = BGEEmbeddingService(cache=None)
+    ref_vecs, ref_tps = _throughput(reference, texts, args.batch_size, args.repeats)
+    candidate = ONNXEmbeddingService(cache=None, quantize=args.quantize)
+    cand_vecs, cand_tps = _throughput(candidate, texts, args.batch_size, args.repeats)
+
+    cos = np.sum(ref_vecs * cand_vecs, axis=1) / (
+        np.linalg.norm(ref_vecs, axis=1) * np.linalg.norm(cand_vecs, axis=1)
+    )
+    report = {
+        "model": reference.model_name,
+        "texts": len(texts),
+        "batch_size": args.batch_size,
+        "onnx_quantize": args.quantize,
+        "cosine_mean": round(float(cos.mean()), 5),
+        "cosine_p5": round(float(np.percentile(cos, 5)), 5),
+        "cosine_min": round(float(cos.min()), 5),
+        f"top{args.topk}_overlap": round(_topk_overlap(ref_vecs, cand_vecs, 50, args.topk), 4),
+        "sentence_transformers_texts_per_sec": round(ref_tps, 2),
+        "onnx_texts_per_sec": round(cand_tps, 2),
+        "speedup": round(cand_tps / ref_tps, 2) if ref_tps else None,
+    }
+    for k, v in report.items():
+        print(f"  {k}: {v}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report written to {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
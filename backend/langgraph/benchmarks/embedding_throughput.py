@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Embedding Throughput Sweep
+==========================
+
+Sweeps backend x intra-op threads x batch size x length bucketing for the embedding
+service on a corpus matching ingestion (synthetic ticket + PDF chunk lengths, or a
+real JIRA export) and reports per configuration:
+- texts/sec (best of --repeats)
+- p50 / p95 latency of a single model batch
+- peak RSS of the process
+
+Each (backend, threads) pair runs in a fresh spawn process so the thread count is
+fixed before torch / onnxruntime start; batch sizes run in ascending order inside it,
+so the running ru_maxrss is the peak of the current (largest so far) batch size.
+Caches are disabled.
+
+--write-config stores the fastest configuration (optionally within --max-rss-mb /
+--max-batch-p95-ms) as a tuning file; embedding_service_factory applies it at start
+for any of EMBEDDING_BACKEND / EMBEDDING_ONNX_QUANTIZE / EMBEDDING_BATCH_SIZE /
+EMBEDDING_NUM_THREADS / EMBEDDING_LENGTH_BUCKETING not set explicitly.
+
+Usage:
+    python -m backend.langgraph.benchmarks.embedding_throughput --n 1024 --csv sweep.csv
+    python -m backend.langgraph.benchmarks.embedding_throughput --backends sentence-transformers onnx-int8 \\
+        --batch-sizes 8 16 32 --threads 4 8 --write-config
+"""
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import resource
+import time
+from datetime import datetime
+
+import numpy as np
+
+from ._corpus import synthetic_corpus, ticket_chunk_texts
+
+# backend label -> settings it corresponds to
+BACKENDS = {
+    "sentence-transformers": {"EMBEDDING_BACKEND": "sentence-transformers"},
+    "onnx-int8": {"EMBEDDING_BACKEND": "onnx", "EMBEDDING_ONNX_QUANTIZE": "int8"},
+    "onnx-fp32": {"EMBEDDING_BACKEND": "onnx", "EMBEDDING_ONNX_QUANTIZE": "none"},
+}
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # Linux reports KB
+
+
+def _build_service(backend):
+    settings = BACKENDS[backend]
+    if settings["EMBEDDING_BACKEND"] == "onnx":
+        from ..embedding_onnx_service import ONNXEmbeddingService
+        return ONNXEmbeddingService(cache=None, quantize=settings["EMBEDDING_ONNX_QUANTIZE"])
+    from ..embedding_bge_service import BGEEmbeddingService
+    return BGEEmbeddingService(cache=None)
+
+
+def _measure(svc, texts, batch_size, repeats):
+    batch_seconds = []
+    encode_batch = svc._encode_batch
+
+    def timed_batch(batch):
+        start = time.perf_counter()
+        out = encode_batch(batch)
+        batch_seconds.append(time.perf_counter() - start)
+        return out
+
+    svc._encode_batch = timed_batch
+    try:
+        svc._encode_uncached(texts[:batch_size], batch_size)  # warm-up
+        batch_seconds.clear()
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            svc._encode_uncached(texts, batch_size)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        svc._encode_batch = encode_batch
+    lat = np.array(batch_seconds) * 1000
+    return {
+        "texts_per_sec": round(len(texts) / best, 2),
+        "batch_ms_p50": round(float(np.percentile(lat, 50)), 1),
+        "batch_ms_p95": round(float(np.percentile(lat, 95)), 1),
+    }
+
+
+def _run_group(backend, threads, batch_sizes, bucketing, texts, repeats, queue):
+    """One process per (backend, threads); reports one row per batch size x bucketing."""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "ONNX_NUM_THREADS", "EMBEDDING_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    try:
+        svc = _build_service(backend)
+        for batch_size in sorted(batch_sizes):
+            for enabled in bucketing:
+                svc.length_bucketing = enabled
+                row = {"backend": backend, "threads": threads, "batch_size": batch_size,
+                       "bucketing": enabled, "texts": len(texts)}
+                row.update(_measure(svc, texts, batch_size, repeats))
+                row["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+                queue.put(row)
+    except Exception as e:
+        queue.put({"backend": backend, "threads": threads, "error": str(e)})
+    queue.put(None)
+
+
+def recommend(rows, max_rss_mb=None, max_batch_p95_ms=None):
+    """Fastest row within the optional memory / latency limits (None if nothing qualifies)."""
+    ok = [r for r in rows if "error" not in r
+          and (max_rss_mb is None or r["peak_rss_mb"] <= max_rss_mb)
+          and (max_batch_p95_ms is None or r["batch_ms_p95"] <= max_batch_p95_ms)]
+    return max(ok, key=lambda r: r["texts_per_sec"]) if ok else None
+
+
+def tuning_settings(row):
+    settings = dict(BACKENDS[row["backend"]])
+    settings.update({
+        "EMBEDDING_BATCH_SIZE": row["batch_size"],
+        "EMBEDDING_NUM_THREADS": row["threads"],
+        "EMBEDDING_LENGTH_BUCKETING": "true" if row["bucketing"] else "false",
+    })
+    return settings
+
+
+def _default_threads():
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    return sorted({max(1, cores // 2), cores})
+
+
+def main():
+    from ..embedding_service_factory import tuning_file_path
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["sentence-transformers"], choices=sorted(BACKENDS))
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--threads", type=int, nargs="+", default=None, help="Default: half and all available cores")
+    parser.add_argument("--bucketing", nargs="+", default=["on", "off"], choices=["on", "off"])
+    parser.add_argument("--n", type=int, default=1024, help="Corpus size")
+    parser.add_argument("--pdf-fraction", type=float, default=0.3, help="Share of PDF-like chunks in the synthetic corpus")
+    parser.add_argument("--tickets", help="JIRA export (JSON) to chunk instead of the synthetic corpus")
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--json", dest="json_out")
+    parser.add_argument("--csv", dest="csv_out")
+    parser.add_argument("--write-config", nargs="?", const=tuning_file_path(), default=None,
+                        help=f"Write the recommended settings (default path {tuning_file_path()})")
+    parser.add_argument("--max-rss-mb", type=float, help="Only recommend configurations under this peak RSS")
+    parser.add_argument("--max-batch-p95-ms", type=float, help="Only recommend configurations under this batch p95")
+    args = parser.parse_args()
+
+    texts = ticket_chunk_texts(args.tickets, args.n) if args.tickets else synthetic_corpus(args.n, args.pdf_fraction)
+    threads_list = args.threads or _default_threads()
+    bucketing = [b == "on" for b in args.bucketing]
+    print(f"🧪 {len(texts)} texts; backends={args.backends} threads={threads_list} "
+          f"batch_sizes={args.batch_sizes} bucketing={args.bucketing}")
+
+    ctx = mp.get_context("spawn")
+    rows = []
+    for backend in args.backends:
+        for threads in threads_list:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_group,
+                               args=(backend, threads, args.batch_sizes, bucketing, texts, args.repeats, queue))
+            proc.start()
+            while True:
+                row = queue.get()
+                if row is None:
+                    break
+                rows.append(row)
+                print(f"📊 {json.dumps(row)}")
+            proc.join()
+
+    best = recommend(rows, args.max_rss_mb, args.max_batch_p95_ms)
+    report = {"corpus": {"texts": len(texts), "source": args.tickets or f"synthetic (pdf_fraction={args.pdf_fraction})"},
+              "results": rows, "recommended": best}
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.csv_out:
+        fields = ["backend", "threads", "batch_size", "bucketing", "texts", "texts_per_sec",
+                  "batch_ms_p50", "batch_ms_p95", "peak_rss_mb", "error"]
+        with open(args.csv_out, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+    if best is None:
+        print("⚠️ No configuration met the limits; nothing recommended")
+        return
+    print(f"🏆 Recommended: {json.dumps(tuning_settings(best))} ({best['texts_per_sec']} texts/s)")
+    if args.write_config:
+        os.makedirs(os.path.dirname(os.path.abspath(args.write_config)), exist_ok=True)
+        with open(args.write_config, "w") as f:
+            json.dump({"settings": tuning_settings(best), "measured": best,
+                       "generated_at": datetime.now().isoformat(), "corpus": report["corpus"]}, f, indent=2)
+        print(f"💾 Tuning written to {args.write_config}")
+
+
+if __name__ == "__main__":
+    main()
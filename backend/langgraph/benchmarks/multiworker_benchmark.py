@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Multi-Worker Memory & Throughput
+================================
+
+Starts the API under gunicorn (gunicorn_conf.py) at several worker counts, with and
+without model preloading, and reports:
+- memory per process from /proc/<pid>/smaps_rollup: RSS, PSS (shared pages split
+  between sharers) and USS (private pages), once idle and again after the load run
+- total PSS for master + workers (the real footprint of the deployment)
+- throughput (req/s) and latency p50/p95 under --concurrency clients for --duration s
+
+The load targets --path (default the GET search endpoint); "{q}" is replaced with a
+query drawn from the benchmark corpus. Qdrant, Groq etc. must be configured as for a
+normal run. Linux only (/proc).
+
+Usage (from the repository root):
+    python -m backend.langgraph.benchmarks.multiworker_benchmark --workers 1 2 4
+    python -m backend.langgraph.benchmarks.multiworker_benchmark --modes preload --path "/api/search?query={q}&limit=5"
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from urllib.parse import quote
+
+import httpx
+import numpy as np
+
+from ._corpus import load_texts
+
+CONF = os.path.join(os.path.dirname(os.path.dirname(__file__)), "gunicorn_conf.py")
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(CONF), "..", ".."))
+
+
+def _smaps_mb(pid):
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024.0  # kB -> MB
+    except FileNotFoundError:
+        return None
+    return {
+        "rss_mb": round(fields.get("Rss", 0.0), 1),
+        "pss_mb": round(fields.get("Pss", 0.0), 1),
+        "uss_mb": round(fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0), 1),
+    }
+
+
+def _children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def _memory_report(master_pid):
+    master = _smaps_mb(master_pid)
+    workers = [m for m in (_smaps_mb(p) for p in _children(master_pid)) if m]
+    total_pss = (master or {}).get("pss_mb", 0.0) + sum(w["pss_mb"] for w in workers)
+    return {
+        "master": master,
+        "workers": len(workers),
+        "worker_rss_mb_avg": round(float(np.mean([w["rss_mb"] for w in workers])), 1) if workers else None,
+        "worker_uss_mb_avg": round(float(np.mean([w["uss_mb"] for w in workers])), 1) if workers else None,
+        "total_pss_mb": round(total_pss, 1),
+    }
+
+
+def _wait_ready(base_url, components, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            health = httpx.get(f"{base_url}/health", timeout=2.0).json()
+            states = health.get("components", {})
+            if all(states.get(c, {}).get("state") == "ready" for c in components):
+                return True
+            failed = [c for c in components if states.get(c, {}).get("state") == "failed"]
+            if failed:
+                raise RuntimeError(f"components failed: {failed}")
+        except httpx.HTTPError:
+            pass
+        time.sleep(1.0)
+    return False
+
+
+async def _load(base_url, path, queries, concurrency, duration):
+    latencies, errors = [], 0
+    stop = time.perf_counter() + duration
+    rng = random.Random(0)
+
+    async def client_loop(client):
+        nonlocal errors
+        while time.perf_counter() < stop:
+            url = path.replace("{q}", quote(rng.choice(queries)))
+            start = time.perf_counter()
+            try:
+                resp = await client.get(url)
+                if resp.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    lat = np.array(latencies) * 1000 if latencies else np.array([0.0])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "req_per_sec": round(len(latencies) / duration, 2),
+        "latency_ms_p50": round(float(np.percentile(lat, 50)), 1),
+        "latency_ms_p95": round(float(np.percentile(lat, 95)), 1),
+    }
+
+
+def run_case(workers, mode, args, queries):
+    port = args.port
+    base_url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}",
+               MODEL_PRELOAD="true" if mode == "preload" else "false")
+    cmd = [sys.executable, "-m", "gunicorn", "-c", CONF, "backend.langgraph.app_langgraph:app"]
+    proc = subprocess.Popen(cmd, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    result = {"workers": workers, "mode": mode}
+    try:
+        started = time.time()
+        if not _wait_ready(base_url, args.wait_for, args.startup_timeout):
+            result["error"] = "not ready before --startup-timeout"
+            return result
+        result["ready_seconds"] = round(time.time() - started, 1)
+        result["memory_idle"] = _memory_report(proc.pid)
+        result["load"] = asyncio.run(_load(base_url, args.path, queries, args.concurrency, args.duration))
+        result["memory_after_load"] = _memory_report(proc.pid)
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--modes", nargs="+", default=["preload", "per-worker"], choices=["preload", "per-worker"])
+    parser.add_argument("--path", default="/api/search?query={q}&limit=5")
+    parser.add_argument("--wait-for", nargs="+", default=["embedding", "workflow"], help="Components that must be ready")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tickets", help="JIRA export (JSON) to draw queries from; synthetic corpus if omitted")
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    queries = [t[:200] for t in load_texts(args.tickets, 200)]
+    results = []
+    for mode in args.modes:
+        for workers in args.workers:
+            print(f"🚀 {mode}: {workers} worker(s)")
+            results.append(run_case(workers, mode, args, queries))
+            print(f"📊 {json.dumps(results[-1])}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
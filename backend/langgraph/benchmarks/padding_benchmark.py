@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Padding Waste Benchmark
+=======================
+
+Measures padded-token ratio and wall time with length bucketing off (input order)
+versus on, for:
+- embedding encode (BGEEmbeddingService, cache disabled)
+- ticket cross-encoder scoring (TicketCrossEncoderReranker, groups of --rerank-group docs)
+
+Pass --tickets to use chunk texts produced by the real ingestion chunker on a JIRA
+export; a synthetic long-tailed corpus is used otherwise.
+
+Usage:
+    python -m backend.langgraph.benchmarks.padding_benchmark --tickets all_tickets.json --n 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from ..embedding_bge_service import BGEEmbeddingService
+from ..length_bucketing import length_buckets, padding_stats
+from ..ticket_reranker_service import TicketCrossEncoderReranker
+from ._corpus import load_chunks
+
+
+def _timed(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_embedding(texts, batch_size, repeats):
+    svc = BGEEmbeddingService(cache=None)
+    lengths = svc._token_lengths(texts)
+    report = {}
+    for mode, enabled in (("input_order", False), ("bucketed", True)):
+        svc.length_bucketing = enabled
+        stats = padding_stats(lengths, length_buckets(lengths, batch_size, enabled=enabled))
+        stats["seconds"] = round(_timed(lambda: svc._encode_uncached(texts, batch_size), repeats), 3)
+        report[mode] = stats
+    return report
+
+
+def bench_rerank(texts, group, repeats):
+    reranker = TicketCrossEncoderReranker()
+    asyncio.run(reranker.initialize())
+    if not reranker.is_initialized:
+        return {"error": "reranker unavailable"}
+    groups = [texts[i:i + group] for i in range(0, len(texts) - group + 1, group)]
+    query = "customer cannot login after upgrade, gateway timeout"
+    report = {}
+    for mode, enabled in (("input_order", False), ("bucketed", True)):
+        reranker.length_bucketing = enabled
+        real = padded = 0
+        for docs in groups:
+            enc = reranker.tokenizer([query] * len(docs), docs, truncation=True, max_length=256)
+            lengths = [len(ids) for ids in enc["input_ids"]]
+            s = padding_stats(lengths, length_buckets(lengths, reranker.batch_size, enabled=enabled))
+            real, padded = real + s["real_tokens"], padded + s["padded_tokens"]
+        seconds = _timed(lambda: [reranker._batch_scores(query, docs, use_cache=False) for docs in groups], repeats)
+        report[mode] = {
+            "real_tokens": real,
+            "padded_tokens": padded,
+            "padding_ratio": round(1 - real / padded, 4) if padded else 0.0,
+            "seconds": round(seconds, 3),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", help="JIRA export (JSON) to chunk; synthetic corpus if omitted")
+    parser.add_argument("--n", type=int, default=1024)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--rerank-group", type=int, default=24, help="Candidates per rerank call")
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--skip-rerank", action="store_true")
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    texts = load_chunks(args.tickets, args.n)
+    print(f"🧪 {len(texts)} chunk texts, batch_size={args.batch_size}")
+    report = {"texts": len(texts), "embedding": bench_embedding(texts, args.batch_size, args.repeats)}
+    if not args.skip_rerank:
+        report["rerank"] = bench_rerank(texts, args.rerank_group, args.repeats)
+    print(json.dumps(report, indent=2))
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
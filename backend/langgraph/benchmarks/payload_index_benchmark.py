@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Payload Index Benchmark (filtered scroll before / after)
+========================================================
+
+Fills a scratch collection with --n ticket-like points (default 100k; ~8 chunks per
+ticket, two ingestion versions, ~30% resolved), then times the API's filtered scrolls
+without payload indexes, reconciles the indexes declared for jira_tickets
+(payload_indexes.py) and times them again:
+- ticket:   ticket_key + ingestion_version (retrieve_ticket_context)
+- resolved: is_resolved + ingestion_version, limit 200 (jira_assist / resolution assist)
+
+Reports p50 / p95 latency per scroll and the index build time. Vectors are tiny
+(--dim) because filter cost does not depend on them. Requires a reachable Qdrant
+(QDRANT_URL); the scratch collection is dropped afterwards.
+
+Usage:
+    python -m backend.langgraph.benchmarks.payload_index_benchmark
+    python -m backend.langgraph.benchmarks.payload_index_benchmark --n 100000 --scrolls 300 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+
+import httpx
+import numpy as np
+
+from ..payload_indexes import PAYLOAD_INDEXES, reconcile_rest
+
+CURRENT_VERSION = "v_current"
+
+
+async def _fill(client, base, n, dim, batch=2000, seed=0):
+    rng = random.Random(seed)
+    for start in range(0, n, batch):
+        ids = list(range(start, min(start + batch, n)))
+        payloads = [{
+            "ticket_key": f"TKT-{i // 8}",
+            "ingestion_version": CURRENT_VERSION if rng.random() < 0.5 else "v_old",
+            "is_resolved": rng.random() < 0.3,
+            "chunk_text": f"chunk {i}",
+        } for i in ids]
+        vectors = [[rng.random() for _ in range(dim)] for _ in ids]
+        resp = await client.put(f"{base}/points", params={"wait": "true"},
+                                json={"batch": {"ids": ids, "vectors": vectors, "payloads": payloads}})
+        resp.raise_for_status()
+
+
+async def _time_scrolls(client, base, n, scrolls, seed=1):
+    rng = random.Random(seed)
+    bodies = {
+        "ticket": lambda: {"limit": 8, "with_payload": True, "filter": {"must": [
+            {"key": "ticket_key", "match": {"value": f"TKT-{rng.randrange(n // 8)}"}},
+            {"key": "ingestion_version", "match": {"value": CURRENT_VERSION}}]}},
+        "resolved": lambda: {"limit": 200, "with_payload": True, "filter": {"must": [
+            {"key": "is_resolved", "match": {"value": True}},
+            {"key": "ingestion_version", "match": {"value": CURRENT_VERSION}}]}},
+    }
+    report = {}
+    for name, body in bodies.items():
+        samples = []
+        for _ in range(scrolls):
+            start = time.perf_counter()
+            resp = await client.post(f"{base}/points/scroll", json=body())
+            resp.raise_for_status()
+            samples.append((time.perf_counter() - start) * 1000)
+        report[name] = {"p50_ms": round(float(np.percentile(samples, 50)), 2),
+                        "p95_ms": round(float(np.percentile(samples, 95)), 2)}
+    return report
+
+
+async def run(args):
+    collection = f"jira_tickets_bench_{uuid.uuid4().hex[:8]}"
+    base = f"{args.qdrant_url.rstrip('/')}/collections/{collection}"
+    async with httpx.AsyncClient(timeout=600.0) as client:
+        resp = await client.put(base, json={"vectors": {"size": args.dim, "distance": "Cosine"}})
+        resp.raise_for_status()
+        try:
+            start = time.perf_counter()
+            await _fill(client, base, args.n, args.dim)
+            print(f"🧪 {args.n} points loaded in {time.perf_counter() - start:.1f}s")
+            before = await _time_scrolls(client, base, args.n, args.scrolls)
+            start = time.perf_counter()
+            reconciled = await reconcile_rest(client, args.qdrant_url, collection)
+            build_s = time.perf_counter() - start
+            after = await _time_scrolls(client, base, args.n, args.scrolls)
+        finally:
+            await client.delete(base)
+    return {
+        "points": args.n,
+        "indexes": PAYLOAD_INDEXES["jira_tickets"],
+        "created": reconciled["created"],
+        "index_build_seconds": round(build_s, 2),
+        "before": before,
+        "after": after,
+        "speedup_p50": {k: round(before[k]["p50_ms"] / after[k]["p50_ms"], 1) if after[k]["p50_ms"] else None
+                        for k in before},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--n", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=8)
+    parser.add_argument("--scrolls", type=int, default=200, help="Scrolls per filter before and after")
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(f"📊 {json.dumps(report)}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
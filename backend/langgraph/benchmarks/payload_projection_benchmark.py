@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Payload Projection Benchmark (full payload vs declared fields)
+==============================================================
+
+Fills a scratch collection with --n ticket chunks whose payloads have the production
+shape (summary, chunk_text, ~12 KB description_full, ~20 KB comments_concat, two
+~8 KB analyses, keywords) and times the semantic chat retrieval both ways:
+- full:      search with_payload=true (previous behaviour)
+- projected: search with the semantic_search field list, then a lazy fetch of the
+             analyses for the 6 hits used in the prompt (payload_projection.py)
+
+Reports response bytes and latency (p50 / p95) per chat. Requires a reachable Qdrant
+(QDRANT_URL); the scratch collection is dropped afterwards.
+
+Usage:
+    python -m backend.langgraph.benchmarks.payload_projection_benchmark
+    python -m backend.langgraph.benchmarks.payload_projection_benchmark --n 20000 --chats 300 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+
+import httpx
+import numpy as np
+
+from ..payload_projection import ANALYSIS_FIELDS, PROJECTIONS
+from ._corpus import synthetic_texts
+
+
+def _payload(i, texts, rng):
+    text = texts[i % len(texts)]
+    filler = lambda n: (text + " ") * (n // (len(text) + 1) + 1)
+    return {
+        "ticket_key": f"TKT-{i // 8}", "summary": " ".join(text.split()[:12]), "status": "Done",
+        "priority": "High", "assignee": "someone", "issue_type": "Bug", "components": ["api"],
+        "is_resolved": rng.random() < 0.3, "chunk_text": text[:1200],
+        "description_full": filler(12000)[:12000], "comments_concat": filler(20000)[:20000],
+        "l1_l2_analysis": filler(8000)[:8000], "l3_engineer_analysis": filler(8000)[:8000],
+        "keywords": text.split()[:40],
+    }
+
+
+async def _fill(client, base, n, dim, batch=200):
+    rng = random.Random(0)
+    texts = synthetic_texts(2000)
+    for start in range(0, n, batch):
+        ids = list(range(start, min(start + batch, n)))
+        resp = await client.put(f"{base}/points", params={"wait": "true"}, json={"batch": {
+            "ids": ids,
+            "vectors": [[rng.gauss(0, 1) for _ in range(dim)] for _ in ids],
+            "payloads": [_payload(i, texts, rng) for i in ids]}})
+        resp.raise_for_status()
+
+
+async def _chat(client, base, vector, mode, limit, used):
+    nbytes = 0
+    body = {"vector": vector, "limit": limit,
+            "with_payload": True if mode == "full" else list(PROJECTIONS["semantic_search"])}
+    resp = await client.post(f"{base}/points/search", json=body)
+    resp.raise_for_status()
+    nbytes += len(resp.content)
+    hits = resp.json()["result"]
+    if mode == "projected":
+        ids = [h["id"] for h in hits[:used]]
+        resp = await client.post(f"{base}/points", json={"ids": ids, "with_payload": list(ANALYSIS_FIELDS)})
+        resp.raise_for_status()
+        nbytes += len(resp.content)
+    return nbytes
+
+
+async def run(args):
+    collection = f"bench_projection_{uuid.uuid4().hex[:8]}"
+    base = f"{args.qdrant_url.rstrip('/')}/collections/{collection}"
+    rng = np.random.default_rng(1)
+    report = {"points": args.n, "limit": args.limit, "hydrated": args.used}
+    async with httpx.AsyncClient(timeout=600.0) as client:
+        resp = await client.put(base, json={"vectors": {"size": args.dim, "distance": "Cosine"}})
+        resp.raise_for_status()
+        try:
+            await _fill(client, base, args.n, args.dim)
+            for mode in ("full", "projected"):
+                latencies, sizes = [], []
+                for _ in range(args.chats):
+                    vector = rng.standard_normal(args.dim).astype(np.float32).tolist()
+                    start = time.perf_counter()
+                    sizes.append(await _chat(client, base, vector, mode, args.limit, args.used))
+                    latencies.append((time.perf_counter() - start) * 1000)
+                report[mode] = {
+                    "bytes_per_chat": int(np.mean(sizes)),
+                    "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+                    "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+                }
+        finally:
+            await client.delete(base)
+    report["bytes_reduction"] = round(report["full"]["bytes_per_chat"] / max(1, report["projected"]["bytes_per_chat"]), 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--n", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=24, help="Hits per search (semantic_limit)")
+    parser.add_argument("--used", type=int, default=6, help="Hits whose analyses reach the prompt")
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(f"📊 {json.dumps(report)}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Qdrant Transport Benchmark (REST vs gRPC)
+=========================================
+
+Runs JiraQdrantService's async paths once per transport (QDRANT_PREFER_GRPC off/on),
+each in a fresh process, against a scratch collection of --n random unit vectors
+(1024-d by default) and reports:
+- upsert throughput (points/sec) through upsert_matrix and upsert_embeddings
+- search latency p50 / p95 / max and searches/sec at each --concurrency level
+
+Requires a reachable Qdrant (QDRANT_URL, gRPC on QDRANT_GRPC_PORT); the scratch
+collection is created and dropped.
+
+Usage:
+    python -m backend.langgraph.benchmarks.qdrant_transport_benchmark
+    python -m backend.langgraph.benchmarks.qdrant_transport_benchmark --n 20000 --concurrency 1 8 32 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import time
+import uuid
+
+import numpy as np
+
+
+def _unit_rows(rng, n, dim):
+    matrix = rng.standard_normal((n, dim), dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix
+
+
+def _run_transport(transport, args, queue):
+    os.environ["QDRANT_PREFER_GRPC"] = "true" if transport == "grpc" else "false"
+    try:
+        queue.put(_measure(transport, args))
+    except Exception as e:
+        queue.put({"transport": transport, "error": str(e)})
+
+
+def _measure(transport, args):
+    from ..jira_qdrant_service import JiraQdrantService
+
+    qdrant = JiraQdrantService()
+    if qdrant.connection_method == "memory":
+        raise RuntimeError("Qdrant is not reachable (in-memory fallback)")
+    collection = f"bench_transport_{transport}_{uuid.uuid4().hex[:8]}"
+    qdrant.create_collection(collection, args.dim)
+    rng = np.random.default_rng(0)
+    vectors = _unit_rows(rng, args.n, args.dim)
+    queries = _unit_rows(rng, 256, args.dim)
+    payloads = [{"ticket_key": f"TKT-{i}", "chunk_index": i % 8} for i in range(args.n)]
+    report = {"transport": transport, "points": args.n, "dimension": args.dim}
+
+    async def main():
+        try:
+            half = args.n // 2
+            start = time.perf_counter()
+            await qdrant.upsert_matrix(collection, [str(uuid.uuid4()) for _ in range(half)], vectors[:half],
+                                       payloads[:half], chunk_size=args.batch)
+            elapsed = time.perf_counter() - start
+            report["upsert_matrix_points_per_sec"] = round(half / elapsed, 1)
+
+            points = [{"id": str(uuid.uuid4()), "vector": v.tolist(), "payload": p}
+                      for v, p in zip(vectors[half:], payloads[half:])]
+            start = time.perf_counter()
+            await qdrant.upsert_embeddings(collection, points)
+            elapsed = time.perf_counter() - start
+            report["upsert_embeddings_points_per_sec"] = round(len(points) / elapsed, 1)
+
+            for q in queries[:8]:  # warm-up (connections, HNSW pages)
+                await qdrant._search(collection, q, args.limit, None)
+            report["search"] = {}
+            for concurrency in args.concurrency:
+                latencies = []
+                remaining = [args.searches]
+
+                async def worker(offset):
+                    i = offset
+                    while remaining[0] > 0:
+                        remaining[0] -= 1
+                        start = time.perf_counter()
+                        await qdrant._search(collection, queries[i % len(queries)], args.limit, None)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                        i += concurrency
+
+                wall = time.perf_counter()
+                await asyncio.gather(*(worker(k) for k in range(concurrency)))
+                wall = time.perf_counter() - wall
+                lat = np.array(latencies)
+                report["search"][str(concurrency)] = {
+                    "p50_ms": round(float(np.percentile(lat, 50)), 2),
+                    "p95_ms": round(float(np.percentile(lat, 95)), 2),
+                    "max_ms": round(float(lat.max()), 2),
+                    "searches_per_sec": round(len(lat) / wall, 1),
+                }
+        finally:
+            await qdrant.close()
+
+    try:
+        asyncio.run(main())
+    finally:
+        qdrant.client.delete_collection(collection)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transports", nargs="+", default=["rest", "grpc"], choices=["rest", "grpc"])
+    parser.add_argument("--n", type=int, default=10000, help="Points to upsert")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--batch", type=int, default=100, help="upsert_matrix slice size")
+    parser.add_argument("--searches", type=int, default=500, help="Searches per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--limit", type=int, default=24, help="Hits per search")
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    results = []
+    for transport in args.transports:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_transport, args=(transport, args, queue))
+        proc.start()
+        results.append(queue.get())
+        proc.join()
+        print(f"📊 {json.dumps(results[-1])}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Vector Quantization Benchmark (recall@10 vs latency vs memory)
+==============================================================
+
+Builds one scratch collection per mode in --modes (none = float32 baseline, int8
+scalar, binary) with the same --n synthetic chunk vectors (default 200k x 1024,
+clustered around --clusters topic centres, like ticket chunks) and the collection
+settings JiraQdrantService uses for jira_tickets (vector_quantization.py: quantized
+copy in RAM, originals on disk). For every mode and --oversampling value it reports:
+- recall@10 against exact float32 search (ground truth)
+- search latency p50 / p95 (hnsw_ef 64, rescoring on)
+- segment RAM and disk usage from Qdrant telemetry
+
+Requires a reachable Qdrant (QDRANT_URL) with room for --n vectors per mode; the
+scratch collections are dropped afterwards.
+
+Usage:
+    python -m backend.langgraph.benchmarks.quantization_benchmark
+    python -m backend.langgraph.benchmarks.quantization_benchmark --n 50000 --modes none int8 --oversampling 1 2 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+import httpx
+import numpy as np
+
+from ..vector_quantization import quantization_config_rest, search_quantization_rest, vectors_on_disk
+from ._qdrant import segment_usage, usage_mb
+
+try:  # serializes numpy arrays natively (no per-element Python floats)
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _centres(args):
+    rng = np.random.default_rng(args.seed)
+    centres = rng.standard_normal((args.clusters, args.dim), dtype=np.float32)
+    return centres / np.linalg.norm(centres, axis=1, keepdims=True)
+
+
+def _rows(centres, start, count, seed, noise=0.35):
+    """Vectors start..start+count (reproducible per batch, so every mode gets the same data)."""
+    rng = np.random.default_rng(seed + start)
+    rows = centres[rng.integers(0, len(centres), count)] + noise * rng.standard_normal(
+        (count, centres.shape[1]), dtype=np.float32) / np.sqrt(centres.shape[1])
+    return (rows / np.linalg.norm(rows, axis=1, keepdims=True)).astype(np.float32)
+
+
+async def _post_json(client, method, url, body):
+    if orjson is not None:
+        content = orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY)
+        resp = await client.request(method, url, content=content, headers={"content-type": "application/json"})
+    else:
+        resp = await client.request(method, url, json=body)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def _build(client, base, mode, centres, args):
+    body = {
+        "vectors": {"size": args.dim, "distance": "Cosine"},
+        "hnsw_config": {"m": 16, "ef_construct": 100, "full_scan_threshold": 5000},
+        "optimizers_config": {"default_segment_number": 1, "max_segment_size": 100000, "indexing_threshold": 20000},
+    }
+    if vectors_on_disk(mode):
+        body["vectors"]["on_disk"] = True
+    if quantization_config_rest(mode):
+        body["quantization_config"] = quantization_config_rest(mode)
+    await _post_json(client, "PUT", base, body)
+    start = time.perf_counter()
+    for offset in range(0, args.n, args.batch):
+        count = min(args.batch, args.n - offset)
+        vectors = _rows(centres, offset, count, args.seed)
+        if orjson is None:
+            vectors = vectors.tolist()
+        await _post_json(client, "PUT", f"{base}/points?wait=true",
+                         {"batch": {"ids": list(range(offset, offset + count)), "vectors": vectors}})
+    while True:  # wait for HNSW / quantization to be built
+        info = (await client.get(base)).json().get("result", {})
+        if info.get("status") == "green" and (info.get("indexed_vectors_count") or 0) >= args.n * 0.95:
+            break
+        await asyncio.sleep(2)
+    return round(time.perf_counter() - start, 1)
+
+
+async def _search(client, base, queries, params, limit=10):
+    ids, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        result = await _post_json(client, "POST", f"{base}/points/search",
+                                  {"vector": q.tolist(), "limit": limit, "params": params})
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append([hit["id"] for hit in result.get("result", [])])
+    return ids, latencies
+
+
+async def run(args):
+    qdrant_url = args.qdrant_url.rstrip("/")
+    centres = _centres(args)
+    queries = _rows(centres, 10**9, args.queries, args.seed)  # held-out draws from the same clusters
+    suffix = uuid.uuid4().hex[:8]
+    report = {"points": args.n, "dimension": args.dim, "queries": args.queries, "modes": {}}
+    truth = None
+    async with httpx.AsyncClient(timeout=600.0) as client:
+        for mode in args.modes:
+            name = f"bench_quant_{mode}_{suffix}"
+            base = f"{qdrant_url}/collections/{name}"
+            try:
+                build_s = await _build(client, base, mode, centres, args)
+                if truth is None:  # exact float32 search is the same ground truth for every mode
+                    truth, _ = await _search(client, base, queries, {"exact": True, "quantization": {"ignore": True}})
+                usage = usage_mb(await segment_usage(client, qdrant_url, name))
+                entry = {"build_seconds": build_s, **usage, "runs": []}
+                oversampling = args.oversampling if mode != "none" else [None]
+                for factor in oversampling:
+                    params = {"hnsw_ef": args.hnsw_ef}
+                    quantization = search_quantization_rest(mode)
+                    if quantization:
+                        params["quantization"] = {**quantization, "oversampling": factor}
+                    await _search(client, base, queries[:16], params)  # warm-up
+                    found, latencies = await _search(client, base, queries, params)
+                    recall = np.mean([len(set(f) & set(t)) / max(1, len(t)) for f, t in zip(found, truth)])
+                    entry["runs"].append({
+                        "oversampling": factor,
+                        "recall_at_10": round(float(recall), 4),
+                        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+                        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+                    })
+                report["modes"][mode] = entry
+                print(f"🧪 {mode}: {json.dumps(entry)}")
+            finally:
+                await client.delete(base)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--n", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--modes", nargs="+", default=["none", "int8", "binary"], choices=["none", "int8", "binary"])
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, 2.0, 3.0])
+    parser.add_argument("--hnsw-ef", type=int, default=64)
+    parser.add_argument("--batch", type=int, default=1000, help="Points per upsert request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(f"📊 {json.dumps(report)}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
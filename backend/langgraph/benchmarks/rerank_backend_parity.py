@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Cross-Encoder Backend Parity & Latency
+======================================
+
+Compares the ONNX Runtime cross-encoder (int8 and/or float32) against the torch model
+on a fixed fixture set of (query, candidates) groups and reports:
+- Spearman rank correlation of the candidate scores per query (mean / p5 / min)
+- top-k agreement of the reranked candidates
+- max absolute score difference
+- latency (p50 / p95 ms) of scoring 12 / 24 / 48 pairs at max_length 256 and 512,
+  model call only (queue and score cache bypassed)
+
+Queries are the opening words of a corpus text; candidates are that text plus others
+drawn reproducibly from the same corpus (synthetic, or a real JIRA export).
+
+Usage:
+    python -m backend.langgraph.benchmarks.rerank_backend_parity --queries 40
+    python -m backend.langgraph.benchmarks.rerank_backend_parity --tickets all_tickets.json --backends onnx-int8 --json out.json
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from ._corpus import load_texts
+
+BACKENDS = {
+    "onnx-int8": {"backend": "onnx", "quantize": "int8"},
+    "onnx-fp32": {"backend": "onnx", "quantize": "none"},
+}
+
+
+def _engine(backend, quantize=None):
+    from ..cross_encoder_engine import CrossEncoderEngine
+    engine = CrossEncoderEngine(backend=backend, quantize=quantize)
+    engine.cache = None
+    if not engine.load():
+        raise RuntimeError(f"{engine.backend_tag}: {engine.init_error}")
+    return engine
+
+
+def fixture_groups(texts, n_queries, n_candidates, seed=0):
+    rng = random.Random(seed)
+    groups = []
+    for _ in range(n_queries):
+        source = rng.randrange(len(texts))
+        query = " ".join(texts[source].split()[:12])
+        others = rng.sample([i for i in range(len(texts)) if i != source], min(n_candidates - 1, len(texts) - 1))
+        docs = [texts[i] for i in [source] + others]
+        rng.shuffle(docs)
+        groups.append((query, docs))
+    return groups
+
+
+def spearman(a, b):
+    ra = np.argsort(np.argsort(a)).astype(np.float64)
+    rb = np.argsort(np.argsort(b)).astype(np.float64)
+    ra -= ra.mean()
+    rb -= rb.mean()
+    denom = np.sqrt((ra ** 2).sum() * (rb ** 2).sum())
+    return float((ra * rb).sum() / denom) if denom else 1.0
+
+
+def _scores(engine, groups, max_length, batch_size):
+    return [np.asarray(engine._score_pairs(q, docs, max_length, batch_size, True)) for q, docs in groups]
+
+
+def parity(ref_scores, cand_scores, topk):
+    rho = np.array([spearman(r, c) for r, c in zip(ref_scores, cand_scores)])
+    overlap = [len(set(np.argsort(-r)[:topk]) & set(np.argsort(-c)[:topk])) / topk
+               for r, c in zip(ref_scores, cand_scores)]
+    diff = max(float(np.max(np.abs(r - c))) for r, c in zip(ref_scores, cand_scores))
+    return {
+        "spearman_mean": round(float(rho.mean()), 4),
+        "spearman_p5": round(float(np.percentile(rho, 5)), 4),
+        "spearman_min": round(float(rho.min()), 4),
+        f"top{topk}_overlap": round(float(np.mean(overlap)), 4),
+        "max_abs_score_diff": round(diff, 4),
+    }
+
+
+def latency(engine, groups, pairs, max_length, batch_size, repeats):
+    samples = []
+    q, docs = groups[0]
+    docs = (docs * (pairs // len(docs) + 1))[:pairs]
+    engine._score_pairs(q, docs, max_length, batch_size, True)  # warm-up
+    for r in range(repeats):
+        q, _ = groups[r % len(groups)]
+        start = time.perf_counter()
+        engine._score_pairs(q, docs, max_length, batch_size, True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": round(float(np.percentile(samples, 50)), 1), "p95_ms": round(float(np.percentile(samples, 95)), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", help="JIRA export (JSON) to draw fixtures from; synthetic corpus if omitted")
+    parser.add_argument("--n", type=int, default=512, help="Corpus size")
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--candidates", type=int, default=24, help="Candidates per query for the parity check")
+    parser.add_argument("--backends", nargs="+", default=["onnx-int8", "onnx-fp32"], choices=sorted(BACKENDS))
+    parser.add_argument("--pairs", type=int, nargs="+", default=[12, 24, 48])
+    parser.add_argument("--max-lengths", type=int, nargs="+", default=[256, 512])
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("RERANK_BATCH_SIZE", "16")))
+    parser.add_argument("--threads", type=int, help="Intra-op threads for torch and ONNX Runtime")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--topk", type=int, default=5)
+    parser.add_argument("--json", dest="json_out", help="Write the report to this file")
+    args = parser.parse_args()
+
+    if args.threads:
+        os.environ["ONNX_NUM_THREADS"] = str(args.threads)
+        try:
+            import torch
+            torch.set_num_threads(args.threads)
+        except ImportError:
+            pass
+
+    groups = fixture_groups(load_texts(args.tickets, args.n), args.queries, args.candidates)
+    print(f"🧪 {len(groups)} queries x {args.candidates} candidates; backends=torch vs {args.backends}")
+
+    engines = {"torch": _engine("torch")}
+    for name in args.backends:
+        engines[name] = _engine(**BACKENDS[name])
+
+    report = {"model": engines["torch"].model_name, "queries": len(groups), "candidates": args.candidates,
+              "model_mb": {name: round(e.model_mb(), 1) for name, e in engines.items()},
+              "parity": {}, "latency": {}}
+    for max_length in args.max_lengths:
+        ref = _scores(engines["torch"], groups, max_length, args.batch_size)
+        for name in args.backends:
+            report["parity"][f"{name}@{max_length}"] = parity(ref, _scores(engines[name], groups, max_length, args.batch_size), args.topk)
+    for name, engine in engines.items():
+        for max_length in args.max_lengths:
+            for pairs in args.pairs:
+                report["latency"][f"{name}@{max_length}x{pairs}"] = latency(engine, groups, pairs, max_length,
+                                                                            args.batch_size, args.repeats)
+
+    for section in ("model_mb", "parity", "latency"):
+        print(f"📊 {section}")
+        for k, v in report[section].items():
+            print(f"  {k}: {v}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report written to {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
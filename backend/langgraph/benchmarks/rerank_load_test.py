@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Rerank Load Test (cross-request batching)
+=========================================
+
+Runs the chat retrieval path (app_langgraph.semantic_ticket_search with the ticket
+cross-encoder enabled) under N concurrent chats, with and without merging rerank jobs
+across requests (RERANK_MERGE_ENABLED), and reports per configuration:
+- chat latency p50 / p95 / max and chats/sec
+- pairs per forward pass and merged jobs from the engine
+
+Qdrant is stubbed with an httpx.MockTransport returning --candidates hits drawn from
+the corpus (optionally after --qdrant-latency-ms), and the query embedding is a fixed
+vector (the stub ignores it), so the cross-encoder is the only model in the loop.
+Score cache and cascade are disabled so every chat reranks its full candidate set.
+Each configuration runs in a fresh spawn process.
+
+Usage:
+    python -m backend.langgraph.benchmarks.rerank_load_test --concurrency 10 20 50
+    python -m backend.langgraph.benchmarks.rerank_load_test --tickets all_tickets.json --chats 200 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import random
+import time
+
+import numpy as np
+
+from ._corpus import load_texts
+
+
+class _StubEmbedding:
+    async def get_embedding_async(self, text):
+        return [0.0] * 1024
+
+
+def _qdrant_handler(texts, n_candidates, latency_ms, seed=0):
+    import httpx
+    rng = random.Random(seed)
+
+    async def handler(request):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000.0)
+        hits = []
+        for i in rng.sample(range(len(texts)), min(n_candidates, len(texts))):
+            words = texts[i].split()
+            hits.append({"id": i, "score": rng.uniform(0.5, 0.9), "payload": {
+                "ticket_key": f"TKT-{i}", "summary": " ".join(words[1:12]), "chunk_text": texts[i],
+                "ingestion_version": "stub"}})
+        return httpx.Response(200, json={"result": hits})
+
+    return handler
+
+
+def _run_case(merge, concurrency, args, texts, queries, queue):
+    os.environ.update({
+        "RERANK_MERGE_ENABLED": "true" if merge else "false",
+        "RERANK_CACHE_ENABLED": "false",
+        "RERANK_CASCADE_ENABLED": "false",
+        "MODEL_PRELOAD": "false",
+        "TOKENIZERS_PARALLELISM": "false",
+    })
+    try:
+        import httpx
+        real_client = httpx.AsyncClient
+        handler = _qdrant_handler(texts, args.candidates, args.qdrant_latency_ms)
+
+        class StubQdrantClient(real_client):
+            def __init__(self, *a, **kw):
+                kw["transport"] = httpx.MockTransport(handler)
+                super().__init__(*a, **kw)
+
+        httpx.AsyncClient = StubQdrantClient
+        from .. import app_langgraph
+        from ..ticket_reranker_service import TicketCrossEncoderReranker
+
+        async def main():
+            reranker = TicketCrossEncoderReranker()
+            await reranker.initialize()
+            if not reranker.is_initialized:
+                raise RuntimeError(reranker._init_error or "reranker unavailable")
+            app_langgraph.services["ticket_reranker"] = reranker
+            emb = _StubEmbedding()
+            latencies = []
+            remaining = [args.chats]
+            rng = random.Random(concurrency)
+
+            async def chat_loop():
+                while remaining[0] > 0:
+                    remaining[0] -= 1
+                    start = time.perf_counter()
+                    await app_langgraph.semantic_ticket_search(rng.choice(queries), "http://qdrant.stub", emb,
+                                                               semantic_limit=args.candidates, top_k=args.top_k)
+                    latencies.append(time.perf_counter() - start)
+
+            # Warm-up (first forward passes allocate), then measure
+            await app_langgraph.semantic_ticket_search(queries[0], "http://qdrant.stub", emb,
+                                                       semantic_limit=args.candidates, top_k=args.top_k)
+            reranker.engine._reset_counters()
+            wall = time.perf_counter()
+            await asyncio.gather(*(chat_loop() for _ in range(concurrency)))
+            wall = time.perf_counter() - wall
+            lat = np.array(latencies) * 1000
+            stats = reranker.engine.stats()
+            return {
+                "merge": merge, "concurrency": concurrency, "chats": len(latencies),
+                "chats_per_sec": round(len(latencies) / wall, 2),
+                "latency_ms_p50": round(float(np.percentile(lat, 50)), 1),
+                "latency_ms_p95": round(float(np.percentile(lat, 95)), 1),
+                "latency_ms_max": round(float(lat.max()), 1),
+                "pairs_per_forward_pass": stats["pairs_per_forward_pass"],
+                "merged_jobs": stats["merged_jobs"],
+                "queue_wait_ms_avg": stats["queue_wait_ms_avg"],
+            }
+
+        queue.put(asyncio.run(main()))
+    except Exception as e:
+        queue.put({"merge": merge, "concurrency": concurrency, "error": str(e)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 20, 50])
+    parser.add_argument("--modes", nargs="+", default=["merge", "no-merge"], choices=["merge", "no-merge"])
+    parser.add_argument("--chats", type=int, default=200, help="Chats per configuration")
+    parser.add_argument("--candidates", type=int, default=24, help="Hits returned by the Qdrant stub")
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=5.0)
+    parser.add_argument("--tickets", help="JIRA export (JSON) for candidates and queries; synthetic corpus if omitted")
+    parser.add_argument("--n", type=int, default=1000, help="Corpus size")
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    texts = load_texts(args.tickets, args.n)
+    queries = [" ".join(t.split()[:12]) for t in texts[:200]]
+    print(f"🧪 {len(texts)} texts; {args.candidates} candidates/chat; concurrency={args.concurrency} modes={args.modes}")
+
+    ctx = mp.get_context("spawn")
+    rows = []
+    for concurrency in args.concurrency:
+        for mode in args.modes:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_case, args=(mode == "merge", concurrency, args, texts, queries, queue))
+            proc.start()
+            rows.append(queue.get())
+            proc.join()
+            print(f"📊 {json.dumps(rows[-1])}")
+
+    by_key = {(r["concurrency"], r["merge"]): r for r in rows if "error" not in r}
+    for concurrency in args.concurrency:
+        on, off = by_key.get((concurrency, True)), by_key.get((concurrency, False))
+        if on and off:
+            print(f"🏁 concurrency={concurrency}: p95 {off['latency_ms_p95']} -> {on['latency_ms_p95']} ms, "
+                  f"{off['chats_per_sec']} -> {on['chats_per_sec']} chats/s with merging")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
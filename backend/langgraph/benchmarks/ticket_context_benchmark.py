@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Ticket Context Benchmark (per-variant scrolls vs one MatchAny scroll)
+=====================================================================
+
+Fills a scratch collection with --tickets tickets of --chunks chunks each (payload
+indexes reconciled as for jira_tickets), then times the ticket-key context fetch
+for messages mentioning K tickets, for each K in --keys:
+- sequential: one /points/scroll per (ticket, case variant), as retrieve_ticket_context did
+- batched:    one MatchAny scroll over all variants, grouped per ticket (ticket_context.py)
+
+Reports p50 / p95 latency and scroll requests per message for each K. Requires a
+reachable Qdrant (QDRANT_URL); the scratch collection is dropped afterwards.
+
+Usage:
+    python -m backend.langgraph.benchmarks.ticket_context_benchmark
+    python -m backend.langgraph.benchmarks.ticket_context_benchmark --keys 1 3 5 10 --messages 300 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+
+import httpx
+import numpy as np
+
+from ..payload_indexes import reconcile_rest
+from ..ticket_context import mentioned_ticket_keys, scroll_ticket_chunks
+
+VERSION = "v_bench"
+PER_TICKET_LIMIT = 5
+
+
+async def _fill(client, base, tickets, chunks, dim, batch=1000):
+    rng = random.Random(0)
+    n = tickets * chunks
+    for start in range(0, n, batch):
+        ids = list(range(start, min(start + batch, n)))
+        payloads = [{"ticket_key": f"TKT-{i // chunks}", "ingestion_version": VERSION,
+                     "summary": f"ticket {i // chunks}", "chunk_text": f"chunk {i}"} for i in ids]
+        vectors = [[rng.random() for _ in range(dim)] for _ in ids]
+        resp = await client.put(f"{base}/points", params={"wait": "true"},
+                                json={"batch": {"ids": ids, "vectors": vectors, "payloads": payloads}})
+        resp.raise_for_status()
+
+
+async def _sequential(client, qdrant_url, collection, keys):
+    requests = 0
+    for variants in keys.values():
+        for v in variants:
+            body = {"limit": PER_TICKET_LIMIT, "with_payload": True, "filter": {"must": [
+                {"key": "ticket_key", "match": {"value": v}},
+                {"key": "ingestion_version", "match": {"value": VERSION}}]}}
+            resp = await client.post(f"{qdrant_url}/collections/{collection}/points/scroll", json=body)
+            resp.raise_for_status()
+            requests += 1
+    return requests
+
+
+async def _batched(client, qdrant_url, collection, keys):
+    _, requests = await scroll_ticket_chunks(client, qdrant_url, keys, PER_TICKET_LIMIT, VERSION,
+                                             collection=collection)
+    return requests
+
+
+async def run(args):
+    qdrant_url = args.qdrant_url.rstrip("/")
+    collection = f"jira_tickets_bench_{uuid.uuid4().hex[:8]}"
+    base = f"{qdrant_url}/collections/{collection}"
+    rng = random.Random(1)
+    report = {"tickets": args.tickets, "chunks_per_ticket": args.chunks, "by_keys": {}}
+    async with httpx.AsyncClient(timeout=600.0) as client:
+        resp = await client.put(base, json={"vectors": {"size": args.dim, "distance": "Cosine"}})
+        resp.raise_for_status()
+        try:
+            await _fill(client, base, args.tickets, args.chunks, args.dim)
+            await reconcile_rest(client, qdrant_url, collection)
+            for k in args.keys:
+                row = {}
+                for name, fetch in (("sequential", _sequential), ("batched", _batched)):
+                    latencies, requests = [], 0
+                    for _ in range(args.messages):
+                        message = " ".join(f"tkt-{rng.randrange(args.tickets)}" for _ in range(k))
+                        keys = mentioned_ticket_keys(message, max_tickets=k)
+                        start = time.perf_counter()
+                        requests += await fetch(client, qdrant_url, collection, keys)
+                        latencies.append((time.perf_counter() - start) * 1000)
+                    row[name] = {"p50_ms": round(float(np.percentile(latencies, 50)), 2),
+                                 "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+                                 "scrolls_per_message": round(requests / args.messages, 2)}
+                row["speedup_p50"] = round(row["sequential"]["p50_ms"] / max(row["batched"]["p50_ms"], 1e-6), 1)
+                report["by_keys"][str(k)] = row
+                print(f"🧪 keys={k} {json.dumps(row)}")
+        finally:
+            await client.delete(base)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--tickets", type=int, default=10000)
+    parser.add_argument("--chunks", type=int, default=8, help="Chunks per ticket")
+    parser.add_argument("--dim", type=int, default=8)
+    parser.add_argument("--keys", type=int, nargs="+", default=[1, 2, 3, 5, 8], help="Tickets mentioned per message")
+    parser.add_argument("--messages", type=int, default=200, help="Messages per key count and mode")
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(f"📊 {json.dumps(report)}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Ticket Doc Store Benchmark (Qdrant storage before / after)
+==========================================================
+
+Chunks the full ticket set (--tickets: JIRA export files or a directory of them;
+a synthetic set of --n tickets otherwise) with create_ticket_chunks twice:
+- before: heavy fields inline in every chunk payload (previous layout)
+- after:  heavy fields written once per ticket to a scratch ticket doc store,
+          chunk payloads carry only doc_ref (ticket_doc_store.py)
+
+Each layout is upserted into its own scratch collection (random unit vectors of
+--dim) and the report gives, per layout: points, payload JSON bytes sent, and the
+collection's disk / RAM usage summed over its segments from Qdrant telemetry.
+It also reports the doc store size (raw vs compressed) and the time of one batched
+get_many over --lookup tickets. Requires a reachable Qdrant (QDRANT_URL); the
+scratch collections and store are removed afterwards.
+
+Usage:
+    python -m backend.langgraph.benchmarks.ticket_doc_store_benchmark --tickets backend/documents/
+    python -m backend.langgraph.benchmarks.ticket_doc_store_benchmark --n 5000 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+
+import httpx
+import numpy as np
+
+from ..jira_document_processor import JIRATicket, JIRATicketProcessor
+from ..ticket_doc_store import HEAVY_FIELDS, TicketDocStore
+from ._corpus import synthetic_texts
+from ._qdrant import segment_usage, usage_mb
+
+
+def _ticket_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith((".json", ".txt")))
+        else:
+            files.append(path)
+    return files
+
+
+def _synthetic_tickets(n, seed=0):
+    rng = random.Random(seed)
+    texts = synthetic_texts(n * 4, seed=seed, min_words=40, max_words=1500)
+    tickets = []
+    for i in range(n):
+        body = texts[4 * i: 4 * i + 4]
+        tickets.append(JIRATicket(
+            key=f"TKT-{i}", summary=" ".join(body[0].split()[:12]), description=body[0],
+            status=rng.choice(["Done", "Open", "In Progress"]), assignee="someone", reporter="someone",
+            created="", updated="", priority="High", issue_type="Bug", project="TKT", components=["api"],
+            labels=[], comments=[body[1], body[2]],
+            raw_data={"__enrichment": {"l1_l2_analysis": body[3], "l3_engineer_analysis": body[1][::-1]}},
+        ))
+    return tickets
+
+
+def _points(processor, tickets, dim, rng):
+    points = []
+    for ticket in tickets:
+        for chunk in processor.create_ticket_chunks(ticket):
+            vector = rng.standard_normal(dim).astype(np.float32)
+            vector /= np.linalg.norm(vector)
+            points.append({"id": str(uuid.uuid4()), "vector": vector.tolist(),
+                           "payload": {"chunk_text": chunk.text, **chunk.metadata}})
+    return points
+
+
+async def _load(client, qdrant_url, collection, points, dim, batch=200):
+    base = f"{qdrant_url}/collections/{collection}"
+    resp = await client.put(base, json={"vectors": {"size": dim, "distance": "Cosine"}})
+    resp.raise_for_status()
+    for start in range(0, len(points), batch):
+        resp = await client.put(f"{base}/points", params={"wait": "true"},
+                                json={"points": points[start:start + batch]})
+        resp.raise_for_status()
+    info = (await client.get(base)).json().get("result", {})
+    return {
+        "points": info.get("points_count"),
+        "payload_mb_sent": round(sum(len(json.dumps(p["payload"])) for p in points) / 1024**2, 2),
+        **usage_mb(await segment_usage(client, qdrant_url, collection)),
+    }
+
+
+async def run(args, tickets):
+    qdrant_url = args.qdrant_url.rstrip("/")
+    rng = np.random.default_rng(0)
+    workdir = tempfile.mkdtemp(prefix="ticket_docs_")
+    store = TicketDocStore(path=os.path.join(workdir, "ticket_docs.sqlite3"))
+    processor = JIRATicketProcessor(None, None, documents_path=workdir)
+    processor.doc_store = None
+    before_points = _points(processor, tickets, args.dim, rng)
+    processor.doc_store = store
+    after_points = _points(processor, tickets, args.dim, rng)
+
+    report = {"tickets": len(tickets), "chunks": len(after_points), "heavy_fields": list(HEAVY_FIELDS)}
+    collections = {layout: f"bench_docstore_{layout}_{uuid.uuid4().hex[:8]}" for layout in ("before", "after")}
+    async with httpx.AsyncClient(timeout=600.0) as client:
+        try:
+            for layout, points in (("before", before_points), ("after", after_points)):
+                report[layout] = await _load(client, qdrant_url, collections[layout], points, args.dim)
+        finally:
+            for name in collections.values():
+                await client.delete(f"{qdrant_url}/collections/{name}")
+
+    keys = [t.key for t in tickets[:args.lookup]]
+    start = time.perf_counter()
+    store.get_many(keys)
+    report["doc_store"] = {**store.stats(), "get_many_ms": round((time.perf_counter() - start) * 1000, 2),
+                           "get_many_keys": len(keys)}
+    store.close()
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+    for key in ("disk_mb", "ram_mb"):
+        if report["after"].get(key):
+            report[f"{key}_reduction"] = round(report["before"][key] / report["after"][key], 2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--tickets", nargs="*", default=[], help="JIRA export files or directories (the full ticket set)")
+    parser.add_argument("--n", type=int, default=2000, help="Synthetic tickets when --tickets is not given")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--lookup", type=int, default=12, help="Tickets per batched get_many")
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    if args.tickets:
+        parser_only = JIRATicketProcessor(None, None, documents_path=tempfile.gettempdir())
+        tickets = [t for f in _ticket_files(args.tickets) for t in parser_only.parse_ticket_file(f)]
+    else:
+        tickets = _synthetic_tickets(args.n)
+    report = asyncio.run(run(args, tickets))
+    print(f"📊 {json.dumps(report)}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
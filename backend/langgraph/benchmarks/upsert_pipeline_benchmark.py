@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Upsert Pipeline Benchmark (sequential wait=true slices vs pipelined batches)
+============================================================================
+
+Re-ingests --n ticket chunks (1024-d unit vectors, payloads shaped like
+create_ticket_chunks output, --payload-kb of chunk text and metadata) into a fresh
+scratch collection per mode and reports points/sec:
+- sequential: slices of 100 points, wait=true, one after another (previous path)
+- pipelined:  JiraQdrantService.upsert_embeddings (upsert_pipeline.py) at each
+              --in-flight level: byte-sized batches, wait only on the last batch
+
+Requires a reachable Qdrant (QDRANT_URL); the scratch collections are dropped.
+
+Usage:
+    python -m backend.langgraph.benchmarks.upsert_pipeline_benchmark
+    python -m backend.langgraph.benchmarks.upsert_pipeline_benchmark --n 100000 --in-flight 1 4 8 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import numpy as np
+
+from ..jira_qdrant_service import JiraQdrantService
+from ..upsert_pipeline import UpsertPipeline
+from ._corpus import synthetic_texts
+
+
+def _points(n, dim, payload_kb, seed=0):
+    rng = np.random.default_rng(seed)
+    texts = synthetic_texts(2000, seed=seed)
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    points = []
+    for i in range(n):
+        text = texts[i % len(texts)]
+        filler = (text + " ") * (payload_kb * 1024 // (len(text) + 1) + 1)
+        points.append({"id": str(uuid.uuid4()), "vector": vectors[i].tolist(), "payload": {
+            "ticket_key": f"TKT-{i // 8}", "summary": " ".join(text.split()[:12]), "status": "Done",
+            "chunk_text": filler[:payload_kb * 1024], "keywords": text.split()[:25],
+            "ingestion_version": "v_bench", "is_resolved": i % 3 == 0}})
+    return points
+
+
+async def _sequential(qdrant, collection, points, chunk_size=100):
+    from qdrant_client.models import PointStruct
+    structs = [PointStruct(id=p["id"], vector=p["vector"], payload=p["payload"]) for p in points]
+    for i in range(0, len(structs), chunk_size):
+        await qdrant._acall("upsert", collection_name=collection, points=structs[i:i + chunk_size], wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=20000, help="Chunks to re-ingest")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--payload-kb", type=int, default=4, help="Approximate payload size per chunk")
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    qdrant = JiraQdrantService()
+    if qdrant.connection_method == "memory":
+        raise SystemExit("Qdrant is not reachable (in-memory fallback)")
+    points = _points(args.n, args.dim, args.payload_kb)
+    report = {"points": args.n, "dimension": args.dim, "payload_kb": args.payload_kb, "modes": {}}
+    modes = [("sequential", None)] + [(f"pipelined_x{k}", k) for k in args.in_flight]
+
+    async def run_mode(collection, in_flight):
+        try:
+            start = time.perf_counter()
+            if in_flight is None:
+                await _sequential(qdrant, collection, points)
+                stats = {}
+            else:
+                qdrant.upsert_pipeline = UpsertPipeline(in_flight=in_flight)
+                await qdrant.upsert_embeddings(collection, points)
+                stats = {"batches": len(qdrant.upsert_pipeline.plan(qdrant._point_sizes(args.dim, [p["payload"] for p in points])))}
+            elapsed = time.perf_counter() - start
+            count = (await qdrant._acall("count", collection_name=collection, exact=True)).count
+            return {"points_per_sec": round(args.n / elapsed, 1), "seconds": round(elapsed, 2),
+                    "stored": count, **stats}
+        finally:
+            await qdrant.close()
+
+    for name, in_flight in modes:
+        collection = f"bench_upsert_{name}_{uuid.uuid4().hex[:8]}"
+        qdrant.create_collection(collection, args.dim)
+        try:
+            report["modes"][name] = asyncio.run(run_mode(collection, in_flight))
+            print(f"🧪 {name}: {json.dumps(report['modes'][name])}")
+        finally:
+            qdrant.client.delete_collection(collection)
+    base = report["modes"]["sequential"]["points_per_sec"]
+    report["speedup"] = {name: round(m["points_per_sec"] / base, 2) for name, m in report["modes"].items() if base}
+    print(f"📊 {json.dumps(report)}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
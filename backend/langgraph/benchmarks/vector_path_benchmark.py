@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Vector Path Benchmark (float lists vs float32 matrix)
+=====================================================
+
+Runs the ingestion hand-off twice, each in a fresh process so peak RSS is comparable:
+- list:    get_embeddings -> List[List[float]] -> PointStruct upsert (upsert_embeddings)
+- ndarray: encode_matrix  -> float32 matrix    -> upsert_matrix (orjson REST body when available)
+
+Reports peak RSS, encode seconds, upsert seconds and upsert points/sec. Without --embed
+the vectors are random unit float32 rows of the model dimension, isolating the
+conversion/serialization cost from model time.
+
+Requires a reachable Qdrant (QDRANT_URL); a scratch collection is created and dropped.
+
+Usage:
+    python -m backend.langgraph.benchmarks.vector_path_benchmark --tickets all_tickets.json --embed
+    python -m backend.langgraph.benchmarks.vector_path_benchmark --n 50000 --dim 1024
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import resource
+import time
+import uuid
+
+import numpy as np
+
+from ._corpus import load_chunks
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # Linux reports KB
+
+
+def _run_mode(mode, args, queue):
+    try:
+        queue.put(_measure(mode, args))
+    except Exception as e:
+        queue.put({"mode": mode, "error": str(e)})
+
+
+def _measure(mode, args):
+    from ..jira_qdrant_service import JiraQdrantService
+
+    texts = load_chunks(args.tickets, args.n)
+    rss_before = _peak_rss_mb()
+    start = time.perf_counter()
+    if args.embed:
+        from ..embedding_service_factory import create_embedding_backend
+        svc = create_embedding_backend()
+        vectors = svc.encode_matrix(texts) if mode == "ndarray" else svc.get_embeddings(texts)
+        dim = svc.get_dimension()
+    else:
+        rng = np.random.default_rng(0)
+        matrix = rng.standard_normal((len(texts), args.dim), dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        vectors = matrix if mode == "ndarray" else matrix.tolist()
+        dim = args.dim
+        del matrix
+    encode_s = time.perf_counter() - start
+
+    qdrant = JiraQdrantService()
+    collection = f"bench_vector_path_{mode}_{uuid.uuid4().hex[:8]}"
+    qdrant.create_collection(collection, dim)
+    ids = [str(uuid.uuid4()) for _ in texts]
+    payloads = [{"text": t} for t in texts]
+    try:
+        start = time.perf_counter()
+        if mode == "ndarray":
+            asyncio.run(qdrant.upsert_matrix(collection, ids, vectors, payloads))
+        else:
+            points = [{"id": i, "vector": v, "payload": p} for i, v, p in zip(ids, vectors, payloads)]
+            asyncio.run(qdrant.upsert_embeddings(collection, points))
+        upsert_s = time.perf_counter() - start
+    finally:
+        qdrant.client.delete_collection(collection)
+    return {
+        "mode": mode,
+        "points": len(texts),
+        "dimension": dim,
+        "encode_seconds": round(encode_s, 3),
+        "upsert_seconds": round(upsert_s, 3),
+        "upsert_points_per_sec": round(len(texts) / upsert_s, 1) if upsert_s else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rss_growth_mb": round(_peak_rss_mb() - rss_before, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", help="JIRA export (JSON); synthetic chunks if omitted")
+    parser.add_argument("--n", type=int, default=20000, help="Max chunks")
+    parser.add_argument("--dim", type=int, default=1024, help="Vector size when not embedding")
+    parser.add_argument("--embed", action="store_true", help="Encode with the configured backend")
+    parser.add_argument("--json", dest="json_out")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    results = []
+    for mode in ("list", "ndarray"):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_mode, args=(mode, args, queue))
+        proc.start()
+        results.append(queue.get())
+        proc.join()
+        print(f"📊 {json.dumps(results[-1])}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
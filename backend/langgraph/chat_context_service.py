@@ -19,9 +19,15 @@ import logging
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import json
-import httpx
 import os
 
+try:
+    from .qdrant_http import qdrant_session
+    from .payload_indexes import reconcile_rest
+except ImportError:  # script mode
+    from qdrant_http import qdrant_session
+    from payload_indexes import reconcile_rest
+
 # Try to import available embedding service
 try:
     from embedding_service_factory import create_embedding_backend
@@ -69,12 +75,13 @@ class ChatContextService:
     
     async def _create_collection_if_not_exists(self, collection_name: str, vector_size: int, description: str):
         """Create Qdrant collection if it doesn't exist"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with qdrant_session(timeout=30.0) as client:
             # Check if collection exists
             try:
                 resp = await client.get(f"{self.qdrant_url}/collections/{collection_name}")
                 if resp.status_code == 200:
                     logger.info(f"Collection {collection_name} already exists")
+                    await self._ensure_payload_indexes(client, collection_name)
                     return
             except:
                 pass
@@ -94,8 +101,16 @@ class ChatContextService:
             
             if resp.status_code in [200, 201]:
                 logger.info(f"✅ Created collection: {collection_name}")
+                await self._ensure_payload_indexes(client, collection_name)
             else:
                 raise Exception(f"Failed to create collection {collection_name}: {resp.status_code} {resp.text}")
+
+    async def _ensure_payload_indexes(self, client, collection_name: str):
+        """Index session_id / message_id (see payload_indexes.py) so history lookups stay index scans"""
+        try:
+            await reconcile_rest(client, self.qdrant_url, collection_name)
+        except Exception as e:
+            logger.warning(f"⚠️ Payload index reconcile failed for {collection_name}: {e}")
     
     async def create_session(self, user_id: Optional[str] = None, title: Optional[str] = None) -> str:
         """Create a new chat session"""
@@ -120,7 +135,7 @@ class ChatContextService:
             
             if self.embedding_service:
                 try:
-                    vector = self.embedding_service.get_embeddings([embedding_text])[0]
+                    vector = await self.embedding_service.get_embedding_async(embedding_text)
                 except:
                     logger.warning("Failed to generate session embedding, using default")
             
@@ -131,7 +146,7 @@ class ChatContextService:
                 "payload": session_data
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with qdrant_session(timeout=30.0) as client:
                 resp = await client.put(
                     f"{self.qdrant_url}/collections/{self.sessions_collection}/points",
                     json={"points": [point_data]}
@@ -170,7 +185,7 @@ class ChatContextService:
             
             if self.embedding_service:
                 try:
-                    vector = self.embedding_service.get_embeddings([embedding_text])[0]
+                    vector = await self.embedding_service.get_embedding_async(embedding_text)
                 except:
                     logger.warning("Failed to generate message embedding, using default")
             
@@ -181,7 +196,7 @@ class ChatContextService:
                 "payload": message_data
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with qdrant_session(timeout=30.0) as client:
                 # Store the message
                 resp = await client.put(
                     f"{self.qdrant_url}/collections/{self.messages_collection}/points",
@@ -204,7 +219,7 @@ class ChatContextService:
     async def _update_session_metadata(self, session_id: str, last_message_preview: str):
         """Update session metadata after adding a message"""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with qdrant_session(timeout=30.0) as client:
                 # Get current session data
                 resp = await client.post(
                     f"{self.qdrant_url}/collections/{self.sessions_collection}/points/scroll",
@@ -247,7 +262,7 @@ class ChatContextService:
         try:
             limit = limit or self.max_history_length
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with qdrant_session(timeout=30.0) as client:
                 resp = await client.post(
                     f"{self.qdrant_url}/collections/{self.messages_collection}/points/scroll",
                     json={
@@ -300,7 +315,7 @@ class ChatContextService:
             
             query_filter = {"must": filter_conditions} if filter_conditions else None
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with qdrant_session(timeout=30.0) as client:
                 body = {
                     "limit": limit,
                     "with_payload": True
@@ -348,7 +363,7 @@ class ChatContextService:
     async def delete_session(self, session_id: str) -> bool:
         """Delete a chat session and all its messages"""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with qdrant_session(timeout=30.0) as client:
                 # Delete all messages in the session
                 await client.post(
                     f"{self.qdrant_url}/collections/{self.messages_collection}/points/delete",
@@ -375,7 +390,7 @@ class ChatContextService:
     async def delete_message(self, message_id: str) -> bool:
         """Delete a specific message"""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with qdrant_session(timeout=30.0) as client:
                 resp = await client.post(
                     f"{self.qdrant_url}/collections/{self.messages_collection}/points/delete",
                     json={
@@ -397,7 +412,7 @@ class ChatContextService:
     async def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get session information"""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
+            async with qdrant_session(timeout=30.0) as client:
                 resp = await client.post(
                     f"{self.qdrant_url}/collections/{self.sessions_collection}/points/scroll",
                     json={
@@ -0,0 +1,485 @@
+"""
+Cross-Encoder Engine
+====================
+
+One loaded cross-encoder (default cross-encoder/ms-marco-MiniLM-L6-v2) shared by every
+reranker in the process, with a single inference thread fed by a bounded priority
+queue.
+
+Both reranker APIs are thin adapters over it:
+- pdf_cross_encoder_reranker.LocalCrossEncoderReranker.rerank_documents_async (workflow search)
+- ticket_reranker_service.TicketCrossEncoderReranker.rerank_async (chat ticket retrieval)
+
+so the model is held once in RAM and scoring jobs no longer compete for cores from two
+separate executors. A job is one query with its candidate documents; jobs are served
+lowest priority value first (FIFO within a priority). When the queue is full, submit
+raises RerankQueueFull and callers fall back to retrieval order instead of piling up.
+
+Jobs from concurrent requests are merged: when the worker picks a job it also takes
+queued jobs of the same or a more urgent priority (waiting up to RERANK_MERGE_WAIT_MS
+for companions, at most RERANK_MERGE_MAX_PAIRS pairs), tokenizes every pair with its
+own job's max_length, and runs them in job order as batches of at most
+RERANK_BATCH_TOKENS padded tokens, resolving each job as soon as its own pairs are
+scored. Less urgent jobs never ride along and stay queued. Under chat load this turns
+many small serial forward passes into a few full ones.
+
+Scores are cached per (model, normalized query, document text) in a RerankScoreCache
+(rerank_cache.py); only uncached pairs are queued, and score_with_info reports how many
+pairs of a request were served from cache.
+
+Two backends, selected by RERANK_BACKEND:
+- torch (default): transformers AutoModelForSequenceClassification
+- onnx: the same checkpoint exported through onnx_runtime_utils (kind
+  "sequence_classification"), optionally with dynamic int8 weights, run on the CPU
+  by ONNX Runtime; torch is only needed for the one-time export
+Scores are sigmoid(logit) either way; benchmarks/rerank_backend_parity.py checks rank
+agreement and pair latency against torch.
+
+The inference thread starts on first use in each process, so the model can be loaded
+before a fork (see model_preload.py) and each worker gets its own thread and queue.
+
+Environment Variables:
+  RERANK_BACKEND: torch (default) or onnx
+  RERANK_ONNX_QUANTIZE: int8 (default) or none, for RERANK_BACKEND=onnx
+  RERANK_QUEUE_SIZE: Max queued jobs before new ones are rejected (default 64)
+  RERANK_BATCH_SIZE: Default pairs per forward pass for a job scored alone (default 16)
+  RERANK_MERGE_ENABLED: Merge concurrent jobs into shared batches (default true)
+  RERANK_MERGE_WAIT_MS: How long the worker waits for companion jobs (default 2)
+  RERANK_MERGE_MAX_PAIRS: Max pairs per merged group and per forward pass (default 64)
+  RERANK_BATCH_TOKENS: Padded-token budget per merged forward pass (default 8192)
+  LENGTH_BUCKETING_ENABLED: Pad per length bucket instead of per job (default true)
+  RERANK_CACHE_*: Score cache settings, see rerank_cache.py
+  ONNX_MODEL_CACHE_DIR / ONNX_NUM_THREADS: see onnx_runtime_utils.py
+"""
+from __future__ import annotations
+import os
+import time
+import queue
+import asyncio
+import logging
+import itertools
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import torch  # type: ignore
+except Exception:  # pragma: no cover
+    torch = None  # type: ignore
+
+try:
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification  # type: ignore
+except Exception:  # pragma: no cover
+    AutoTokenizer = None  # type: ignore
+    AutoModelForSequenceClassification = None  # type: ignore
+
+try:
+    from .length_bucketing import length_bucketing_enabled, length_buckets, token_budget_buckets
+    from .rerank_cache import create_rerank_cache
+    from .onnx_runtime_utils import ensure_onnx_model, create_onnx_session
+except ImportError:  # script mode
+    from length_bucketing import length_bucketing_enabled, length_buckets, token_budget_buckets
+    from rerank_cache import create_rerank_cache
+    from onnx_runtime_utils import ensure_onnx_model, create_onnx_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L6-v2"
+
+# Lower value is served first
+PRIORITY_INTERACTIVE = 0  # chat / assist answers a user is waiting on
+PRIORITY_SEARCH = 1       # search API
+PRIORITY_BACKGROUND = 2   # batch jobs, benchmarks
+
+
+class RerankQueueFull(RuntimeError):
+    """The inference queue is at RERANK_QUEUE_SIZE; the caller should fall back."""
+
+
+class _JobQueue(queue.PriorityQueue):
+    """PriorityQueue whose head can be taken only when it qualifies; otherwise it stays queued."""
+
+    def get_if(self, accept: Callable[[Any], bool], timeout: float) -> Optional[Any]:
+        """Pop the head item if accept(its job) holds, None if it does not; queue.Empty on timeout."""
+        with self.not_empty:
+            end = time.monotonic() + timeout
+            while not self._qsize():
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    raise queue.Empty
+                self.not_empty.wait(remaining)
+            if not accept(self.queue[0][2]):
+                return None
+            item = self._get()
+            self.not_full.notify()
+            return item
+
+
+@dataclass
+class _Job:
+    query: str
+    docs: List[str]
+    max_length: int
+    batch_size: int
+    bucketing: bool
+    priority: int
+    future: Future = field(default_factory=Future)
+    enqueued: float = field(default_factory=time.perf_counter)
+
+
+class CrossEncoderEngine:
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, max_queue: Optional[int] = None,
+                 backend: Optional[str] = None, quantize: Optional[str] = None):
+        self.model_name = model_name
+        self.backend = (backend or os.getenv("RERANK_BACKEND", "torch")).lower()
+        if self.backend not in {"torch", "onnx"}:
+            raise ValueError(f"Unsupported RERANK_BACKEND '{self.backend}' (expected 'torch' or 'onnx')")
+        self.quantize = (quantize or os.getenv("RERANK_ONNX_QUANTIZE", "int8")).lower()
+        if self.backend == "torch":
+            self.backend_tag = "torch"
+        else:
+            self.backend_tag = f"onnx-{self.quantize}" if self.quantize != "none" else "onnx"
+        self.max_queue = int(max_queue or os.getenv("RERANK_QUEUE_SIZE", "64"))
+        self.default_batch_size = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+        self.merge_enabled = os.getenv("RERANK_MERGE_ENABLED", "true").lower() in {"1", "true", "yes", "on"}
+        self.merge_wait = float(os.getenv("RERANK_MERGE_WAIT_MS", "2")) / 1000.0
+        self.merge_max_pairs = int(os.getenv("RERANK_MERGE_MAX_PAIRS", "64"))
+        self.batch_tokens = int(os.getenv("RERANK_BATCH_TOKENS", "8192"))
+        self.tokenizer = None
+        self.model = None
+        self.device = None
+        self.onnx_path: Optional[str] = None
+        self._input_names: set = set()
+        self.is_initialized = False
+        self.init_error: Optional[str] = None
+        self._load_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._queue: Optional[_JobQueue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._seq = itertools.count()
+        self.cache = create_rerank_cache()
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.jobs = 0
+        self.pairs = 0
+        self.rejected = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.max_depth_seen = 0
+        self.forward_passes = 0
+        self.merged_jobs = 0
+        self.jobs_by_priority: Dict[int, int] = {}
+
+    # ------------------------------------------------------------------ loading
+    def load(self) -> bool:
+        """Load tokenizer and model once (thread-safe); False if unavailable."""
+        if self.is_initialized or self.init_error:
+            return self.is_initialized
+        with self._load_lock:
+            if self.is_initialized or self.init_error:
+                return self.is_initialized
+            if AutoTokenizer is None or (self.backend == "torch" and torch is None):
+                self.init_error = "transformers/torch not available"
+                logger.warning("Cross-encoder unavailable: transformers/torch not installed")
+                return False
+            try:
+                logger.info(f"Loading cross-encoder {self.model_name} ({self.backend_tag}) ...")
+                if self.backend == "onnx":
+                    self._load_onnx()
+                else:
+                    self._load_torch()
+                self.is_initialized = True
+                logger.info(f"✅ Cross-encoder engine ready: {self.model_name} [{self.backend_tag}] on {self.device} ({self.model_mb():.0f} MB)")
+            except Exception as e:
+                self.init_error = str(e)
+                logger.error(f"Cross-encoder load failed: {e}")
+        return self.is_initialized
+
+    def _load_torch(self):
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+        model.to(self.device)
+        model.eval()
+        self.model = model
+
+    def _load_onnx(self):
+        path = ensure_onnx_model(self.model_name, kind="sequence_classification", quantize=self.quantize)
+        self.onnx_path = path
+        self.device = "cpu"
+        self.tokenizer = AutoTokenizer.from_pretrained(os.path.dirname(path))
+        session = create_onnx_session(path)
+        self._input_names = {i.name for i in session.get_inputs()}
+        self.model = session
+
+    async def initialize(self):
+        if self.is_initialized or self.init_error:
+            return
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.load)
+
+    # ------------------------------------------------------------------ queue
+    def _ensure_worker(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid():
+                # Fresh queue/thread per process (threads do not survive fork)
+                self._pid = os.getpid()
+                self._queue = _JobQueue(maxsize=self.max_queue)
+                self._thread = threading.Thread(target=self._worker, name="cross-encoder-engine", daemon=True)
+                self._thread.start()
+
+    def submit(self, query: str, docs: List[str], priority: int = PRIORITY_SEARCH, max_length: int = 512,
+               batch_size: Optional[int] = None, bucketing: Optional[bool] = None) -> Future:
+        """Queue one scoring job; the future resolves to sigmoid scores in input order."""
+        if not docs:
+            done: Future = Future()
+            done.set_result([])
+            return done
+        if not self.is_initialized:
+            raise RuntimeError(self.init_error or "cross-encoder engine not loaded")
+        self._ensure_worker()
+        job = _Job(query=query, docs=list(docs), max_length=max_length,
+                   batch_size=batch_size or self.default_batch_size,
+                   bucketing=length_bucketing_enabled() if bucketing is None else bucketing,
+                   priority=priority)
+        try:
+            self._queue.put_nowait((priority, next(self._seq), job))
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            raise RerankQueueFull(f"rerank queue full ({self.max_queue} jobs)")
+        with self._stats_lock:
+            self.max_depth_seen = max(self.max_depth_seen, self._queue.qsize())
+        return job.future
+
+    def _split_cached(self, query: str, docs: List[str], max_length: int):
+        """Cached scores (None where missing), indices still to score, and the cache key."""
+        if self.cache is None or not docs:
+            return [None] * len(docs), list(range(len(docs))), None
+        lowercase = bool(getattr(self.tokenizer, "do_lower_case", False))
+        # Namespaced by backend so int8 and float32 scores never mix
+        qkey = self.cache.query_key(f"{self.model_name}@{self.backend_tag}", max_length, query, lowercase)
+        scores = self.cache.get_many(qkey, docs)
+        return scores, [i for i, s in enumerate(scores) if s is None], qkey
+
+    def _merge(self, scores, missing, fresh, qkey, docs) -> Dict[str, int]:
+        for i, s in zip(missing, fresh):
+            scores[i] = s
+        if qkey is not None and missing:
+            self.cache.put_many(qkey, [docs[i] for i in missing], fresh)
+        return {"pairs": len(docs), "cached": len(docs) - len(missing), "scored": len(missing)}
+
+    async def score_with_info(self, query: str, docs: List[str], priority: int = PRIORITY_SEARCH, max_length: int = 512,
+                              batch_size: Optional[int] = None, bucketing: Optional[bool] = None) -> Tuple[List[float], Dict[str, int]]:
+        """Scores in input order plus {"pairs", "cached", "scored"} for this request."""
+        await self.initialize()
+        scores, missing, qkey = self._split_cached(query, docs, max_length)
+        fresh: List[float] = []
+        if missing:
+            fut = self.submit(query, [docs[i] for i in missing], priority, max_length, batch_size, bucketing)
+            fresh = await asyncio.wrap_future(fut)
+        return scores, self._merge(scores, missing, fresh, qkey, docs)
+
+    async def score(self, query: str, docs: List[str], priority: int = PRIORITY_SEARCH, max_length: int = 512,
+                    batch_size: Optional[int] = None, bucketing: Optional[bool] = None) -> List[float]:
+        scores, _ = await self.score_with_info(query, docs, priority, max_length, batch_size, bucketing)
+        return scores
+
+    def score_sync(self, query: str, docs: List[str], priority: int = PRIORITY_SEARCH, max_length: int = 512,
+                   batch_size: Optional[int] = None, bucketing: Optional[bool] = None, use_cache: bool = True) -> List[float]:
+        self.load()
+        if not use_cache:
+            return self.submit(query, docs, priority, max_length, batch_size, bucketing).result()
+        scores, missing, qkey = self._split_cached(query, docs, max_length)
+        fresh: List[float] = []
+        if missing:
+            fresh = self.submit(query, [docs[i] for i in missing], priority, max_length, batch_size, bucketing).result()
+        self._merge(scores, missing, fresh, qkey, docs)
+        return scores
+
+    def _collect(self, first: _Job) -> List[_Job]:
+        """The first job plus queued jobs that can share its forward passes (RERANK_MERGE_*).
+
+        Only jobs of the same or a more urgent priority ride along. Merging stops at the first
+        queued job that does not qualify (less urgent, or wanting its own input-order
+        batches); it stays queued, in order and counted against RERANK_QUEUE_SIZE.
+        """
+        batch = [first]
+        if not (self.merge_enabled and first.bucketing):
+            return batch
+        pairs = len(first.docs)
+        deadline = time.perf_counter() + self.merge_wait
+        accept = lambda j: j.priority <= first.priority and j.bucketing
+        while pairs < self.merge_max_pairs:
+            try:
+                item = self._queue.get_if(accept, deadline - time.perf_counter())
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            job = item[2]
+            if job.future.set_running_or_notify_cancel():
+                batch.append(job)
+                pairs += len(job.docs)
+        return batch
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()[2]
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            jobs = self._collect(job)
+            started = time.perf_counter()
+            try:
+                if len(jobs) == 1:
+                    job.future.set_result(self._score_pairs(job.query, job.docs, job.max_length,
+                                                            job.batch_size, job.bucketing))
+                    passes = -(-len(job.docs) // job.batch_size)
+                else:
+                    passes = self._score_jobs(jobs)
+            except Exception as e:
+                for j in jobs:
+                    if not j.future.done():
+                        j.future.set_exception(e)
+                passes = 0
+            finished = time.perf_counter()
+            with self._stats_lock:
+                self.forward_passes += passes
+                self.merged_jobs += len(jobs) if len(jobs) > 1 else 0
+                for j in jobs:
+                    # Per job: a merged group can fail after some of its jobs were resolved
+                    ok = j.future.exception() is None
+                    self.jobs += 1
+                    self.pairs += len(j.docs) if ok else 0
+                    self.failed += 0 if ok else 1
+                    self.wait_seconds += started - j.enqueued
+                    self.jobs_by_priority[j.priority] = self.jobs_by_priority.get(j.priority, 0) + 1
+                self.busy_seconds += finished - started
+
+    def _tokenize(self, query: str, docs: List[str], max_length: int) -> Dict[str, list]:
+        return self.tokenizer([query] * len(docs), docs, truncation=True, max_length=max_length)
+
+    def _forward(self, enc: Dict[str, list], idx: List[int]) -> List[float]:
+        """Sigmoid scores for rows idx of an unpadded encoding, padded to the longest of them."""
+        subset = {k: [v[i] for i in idx] for k, v in enc.items()}
+        if self.backend == "onnx":
+            tokens = self.tokenizer.pad(subset, return_tensors="np")
+            feeds = {k: v.astype(np.int64) for k, v in tokens.items() if k in self._input_names}
+            logits = self.model.run(None, feeds)[0].reshape(-1).astype(np.float64)
+            return (1.0 / (1.0 + np.exp(-logits))).tolist()
+        tokens = self.tokenizer.pad(subset, return_tensors="pt")
+        tokens = {k: v.to(self.device) for k, v in tokens.items()}
+        with torch.no_grad():
+            logits = self.model(**tokens).logits
+        return torch.sigmoid(logits).reshape(-1).cpu().numpy().tolist()
+
+    def _score_pairs(self, query: str, docs: List[str], max_length: int, batch_size: int, bucketing: bool) -> List[float]:
+        # Tokenize once unpadded, then pad per length bucket so short pairs don't pay for long ones
+        enc = self._tokenize(query, docs, max_length)
+        lengths = [len(ids) for ids in enc["input_ids"]]
+        scores = [0.5] * len(docs)
+        for idx in length_buckets(lengths, batch_size, enabled=bucketing):
+            for i, s in zip(idx, self._forward(enc, idx)):
+                scores[i] = float(s)
+        return scores
+
+    def _score_jobs(self, jobs: List[_Job]) -> int:
+        """Score several jobs in shared token-budgeted batches; returns the number of forward passes.
+
+        Rows run in job order (longest-first within a job) and each job's future is resolved
+        as soon as its last pair is scored, so merging does not hold earlier jobs back.
+        """
+        enc: Dict[str, list] = {}
+        owner: List[int] = []
+        for n, j in enumerate(jobs):
+            part = self._tokenize(j.query, j.docs, j.max_length)  # each job keeps its own truncation
+            for k, v in part.items():
+                enc.setdefault(k, []).extend(v)
+            owner.extend([n] * len(j.docs))
+        lengths = [len(ids) for ids in enc["input_ids"]]
+        order = sorted(range(len(lengths)), key=lambda i: (owner[i], -lengths[i]))
+        starts = [owner.index(n) for n in range(len(jobs))]
+        remaining = [len(j.docs) for j in jobs]
+        flat = [0.5] * len(lengths)
+        batches = token_budget_buckets(lengths, self.batch_tokens, max_rows=self.merge_max_pairs, order=order)
+        for idx in batches:
+            for i, s in zip(idx, self._forward(enc, idx)):
+                flat[i] = float(s)
+                remaining[owner[i]] -= 1
+            for n in {owner[i] for i in idx}:
+                if remaining[n] == 0:
+                    jobs[n].future.set_result(flat[starts[n]:starts[n] + len(jobs[n].docs)])
+        return len(batches)
+
+    # ------------------------------------------------------------------ reporting
+    def model_mb(self) -> float:
+        if self.model is None:
+            return 0.0
+        if self.onnx_path:
+            return os.path.getsize(self.onnx_path) / 1024 ** 2
+        return sum(p.numel() * p.element_size() for p in self.model.parameters()) / 1024 ** 2
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            jobs, pairs, busy, wait = self.jobs, self.pairs, self.busy_seconds, self.wait_seconds
+            info = {
+                "model": self.model_name,
+                "backend": self.backend_tag,
+                "initialized": self.is_initialized,
+                "error": self.init_error,
+                "device": str(self.device) if self.device is not None else None,
+                "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+                "queue_capacity": self.max_queue,
+                "max_queue_depth_seen": self.max_depth_seen,
+                "jobs": jobs,
+                "jobs_by_priority": dict(self.jobs_by_priority),
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "pairs": pairs,
+                "pairs_per_busy_sec": round(pairs / busy, 1) if busy else None,
+                "forward_passes": self.forward_passes,
+                "pairs_per_forward_pass": round(pairs / self.forward_passes, 1) if self.forward_passes else None,
+                "merged_jobs": self.merged_jobs,
+                "queue_wait_ms_avg": round(wait / jobs * 1000, 2) if jobs else None,
+                "model_mb": round(self.model_mb(), 1),
+            }
+        info["cache"] = self.cache.stats() if self.cache is not None else None
+        try:
+            import psutil
+            info["process_rss_mb"] = round(psutil.Process().memory_info().rss / 1024 ** 2, 1)
+        except Exception:
+            pass
+        return info
+
+
+_ENGINES: Dict[str, CrossEncoderEngine] = {}
+_ENGINES_LOCK = threading.Lock()
+
+
+def get_cross_encoder_engine(model_name: str = DEFAULT_RERANK_MODEL) -> CrossEncoderEngine:
+    """Process-wide engine for model_name (created on first request, model loaded lazily)."""
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(model_name)
+        if engine is None:
+            engine = _ENGINES[model_name] = CrossEncoderEngine(model_name)
+        return engine
+
+
+__all__ = [
+    "CrossEncoderEngine",
+    "RerankQueueFull",
+    "get_cross_encoder_engine",
+    "DEFAULT_RERANK_MODEL",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_SEARCH",
+    "PRIORITY_BACKGROUND",
+]
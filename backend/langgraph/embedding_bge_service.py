@@ -8,9 +8,18 @@ Supports:
 - Normalization (cosine-friendly)
 - Batch & single encode interfaces matching previous internal embedding API
 
+- Persistent content-addressed vector cache (see embedding_cache.py)
+- Length-bucketed batching (inputs sorted by token count; see length_bucketing.py)
+- Array-native encode_matrix / encode_matrix_async returning contiguous float32 matrices
+- Async single-query interface (wrap with EmbeddingMicroBatcher to coalesce concurrent calls)
+
 Environment Variables:
   LOCAL_EMBEDDING_MODEL_DIR: Absolute path to a local model snapshot (optional)
   EMBEDDING_MODEL_NAME: Override model name (default BAAI/bge-large-en-v1.5)
+  EMBEDDING_CACHE_ENABLED / EMBEDDING_CACHE_PATH / EMBEDDING_CACHE_MAX_MB: on-disk cache settings
+  LENGTH_BUCKETING_ENABLED: Sort inputs by token length before batching (default true)
+  EMBEDDING_LENGTH_BUCKETING: Embedding-only override of LENGTH_BUCKETING_ENABLED
+  EMBEDDING_NUM_THREADS: Intra-op threads for the model runtime (default: runtime default)
 """
 from __future__ import annotations
 import os
@@ -19,25 +28,39 @@ from typing import List, Sequence, Optional
 import math
 import asyncio
 
+import numpy as np
+
 try:
     from sentence_transformers import SentenceTransformer
-except ImportError as e:
-    raise ImportError("sentence-transformers not installed. Install with: pip install sentence-transformers") from e
+except ImportError:  # only required by the default (PyTorch) backend; ONNX backend runs without it
+    SentenceTransformer = None
+
+try:
+    from .embedding_cache import EmbeddingCache, create_embedding_cache
+    from .length_bucketing import embedding_length_bucketing_enabled, length_buckets, token_lengths
+except ImportError:  # script mode (module imported from this directory)
+    from embedding_cache import EmbeddingCache, create_embedding_cache
+    from length_bucketing import embedding_length_bucketing_enabled, length_buckets, token_lengths
 
 logger = logging.getLogger(__name__)
 
+_DEFAULT_CACHE = object()
+
 class BGEEmbeddingService:
-    def __init__(self, model_name: str | None = None, local_dir: str | None = None, normalize: bool = True):
+    # Distinguishes vectors produced by alternative runtimes in the shared cache
+    backend_tag: Optional[str] = None
+
+    def __init__(self, model_name: str | None = None, local_dir: str | None = None, normalize: bool = True,
+                 cache: Optional[EmbeddingCache] | object = _DEFAULT_CACHE):
         self.model_name = model_name or os.getenv("EMBEDDING_MODEL_NAME", "BAAI/bge-large-en-v1.5")
         self.local_dir = local_dir or os.getenv("LOCAL_EMBEDDING_MODEL_DIR")
         self.normalize = normalize
+        self.cache: Optional[EmbeddingCache] = create_embedding_cache() if cache is _DEFAULT_CACHE else cache
+        self.length_bucketing = embedding_length_bucketing_enabled()
+        env_threads = os.getenv("EMBEDDING_NUM_THREADS", "")
+        self.num_threads: Optional[int] = int(env_threads) if env_threads.isdigit() else None
         self.model = self._load()
-        try:
-            self._dimension = self.model.get_sentence_embedding_dimension()
-        except Exception:
-            # Fallback dimension check (encode a token)
-            test_vec = self.model.encode(["dimension probe"], normalize_embeddings=self.normalize)
-            self._dimension = len(test_vec[0])
+        self._dimension = self._probe_dimension()
         logger.info(f"✅ Loaded BGE model '{self.model_name}' (dim={self._dimension})" + (f" from local dir {self.local_dir}" if self.local_dir else ""))
         # Tune batch size based on device & env override
         self._device = getattr(self.model, 'device', 'cpu')
@@ -49,38 +72,147 @@ class BGEEmbeddingService:
             self._batch_size = 32 if 'cuda' in str(self._device) else 16
         logger.info(f"BGEEmbeddingService using batch_size={self._batch_size} device={self._device}")
 
+    @property
+    def cache_namespace(self) -> str:
+        return f"{self.model_name}#{self.backend_tag}" if self.backend_tag else self.model_name
+
     def _load(self):
+        if SentenceTransformer is None:
+            raise ImportError("sentence-transformers not installed. Install with: pip install sentence-transformers")
+        if self.num_threads:
+            try:
+                import torch
+                torch.set_num_threads(self.num_threads)
+            except ImportError:
+                pass
         load_path = self.local_dir if self.local_dir else self.model_name
         logger.info(f"Loading BGE embedding model from: {load_path}")
         model = SentenceTransformer(load_path, trust_remote_code=True)
         return model
 
+    def _probe_dimension(self) -> int:
+        try:
+            return self.model.get_sentence_embedding_dimension()
+        except Exception:
+            # Fallback dimension check (encode a token)
+            return int(self._encode_batch(["dimension probe"]).shape[1])
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Single forward pass over one batch; returns an (n, dim) float32 matrix."""
+        vecs = self.model.encode(texts, batch_size=max(1, len(texts)), normalize_embeddings=self.normalize)
+        return np.asarray(vecs, dtype=np.float32)
+
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        tokenizer = getattr(self, 'tokenizer', None) or getattr(self.model, 'tokenizer', None)
+        max_length = getattr(self, 'max_seq_length', None) or getattr(self.model, 'max_seq_length', None)
+        try:
+            return token_lengths(tokenizer, texts, max_length)
+        except Exception:
+            return token_lengths(None, texts)
+
+    def _batches(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[int]]:
+        """Index batches; sorted by token length when bucketing is on so each batch pads little."""
+        batch_size = batch_size or self._batch_size
+        if not self.length_bucketing or len(texts) <= batch_size:
+            return length_buckets([0] * len(texts), batch_size, enabled=False)
+        return length_buckets(self._token_lengths(texts), batch_size)
+
+    def _encode_uncached(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        out = np.empty((len(texts), self._dimension), dtype=np.float32)
+        for idx in self._batches(texts, batch_size):
+            out[idx] = self._encode_batch([texts[i] for i in idx])
+        return out
+
+    def _cache_lookup(self, texts: List[str]):
+        """Split texts into cached rows and unique misses.
+
+        Returns (matrix with cached rows filled, {miss_text: [row indices]}).
+        """
+        out = np.empty((len(texts), self._dimension), dtype=np.float32)
+        cached = self.cache.get_many(self.cache_namespace, self.normalize, texts)
+        misses: dict = {}
+        for i, (t, v) in enumerate(zip(texts, cached)):
+            if v is not None and v.shape[0] == self._dimension:
+                out[i] = v
+            else:
+                misses.setdefault(t, []).append(i)
+        return out, misses
+
+    def _cache_fill(self, out: np.ndarray, misses: dict, miss_vecs: np.ndarray):
+        for row, rows in zip(miss_vecs, misses.values()):
+            out[rows] = row
+        self.cache.put_many(self.cache_namespace, self.normalize, list(misses.keys()), miss_vecs)
+
+    def _encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """Cache-aware synchronous encode; only new or changed text reaches the model."""
+        if self.cache is None or not texts:
+            return self._encode_uncached(texts, batch_size)
+        out, misses = self._cache_lookup(texts)
+        if misses:
+            miss_vecs = self._encode_uncached(list(misses.keys()), batch_size)
+            self._cache_fill(out, misses, miss_vecs)
+        return out
+
     def get_embedding(self, text: str) -> List[float]:
         if not isinstance(text, str):
             text = str(text)
-        vec = self.model.encode([text], normalize_embeddings=self.normalize)[0]
-        return vec.tolist()
+        return self._encode([text])[0].tolist()
 
-    def get_embeddings(self, texts: Sequence[str]) -> List[List[float]]:
+    def get_embeddings(self, texts: Sequence[str], batch_size: Optional[int] = None) -> List[List[float]]:
         texts = [t if isinstance(t, str) else str(t) for t in texts]
-        vectors = self.model.encode(texts, normalize_embeddings=self.normalize)
-        return [v.tolist() for v in vectors]
+        return self._encode(texts, batch_size).tolist()
 
-    async def get_embeddings_batch_async(self, texts: Sequence[str], batch_size: Optional[int] = None) -> List[List[float]]:
-        """Asynchronous batch embedding to mirror Gemma interface.
+    async def get_embedding_async(self, text: str) -> List[float]:
+        """Single embedding off the event loop (EmbeddingMicroBatcher coalesces these across requests)."""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.get_embedding, text)
 
-        Splits texts into batches, runs encode synchronously in executor to avoid blocking event loop.
+    def encode_matrix(self, texts: Sequence[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """Array-native encode: one contiguous (n, dim) float32 matrix, no per-element Python floats."""
+        texts = [t if isinstance(t, str) else str(t) for t in texts]
+        if not texts:
+            return np.empty((0, self._dimension), dtype=np.float32)
+        return np.ascontiguousarray(self._encode(texts, batch_size), dtype=np.float32)
+
+    async def encode_matrix_async(self, texts: Sequence[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """Asynchronous encode_matrix.
+
+        Cached vectors are served from disk; the remaining texts are grouped into
+        length-sorted batches and encoded in an executor to avoid blocking the event loop.
         """
         if batch_size is None:
             batch_size = self._batch_size
+        texts = [t if isinstance(t, str) else str(t) for t in texts]
+        if not texts:
+            return np.empty((0, self._dimension), dtype=np.float32)
         loop = asyncio.get_event_loop()
-        results: List[List[float]] = []
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i+batch_size]
+        if self.cache is not None:
+            out, misses = await loop.run_in_executor(None, self._cache_lookup, texts)
+            pending = list(misses.keys())
+        else:
+            out, misses = np.empty((len(texts), self._dimension), dtype=np.float32), None
+            pending = texts
+        encoded = np.empty((len(pending), self._dimension), dtype=np.float32)
+        batches = await loop.run_in_executor(None, self._batches, pending, batch_size)
+        for idx in batches:
+            batch = [pending[i] for i in idx]
             # Execute encode in thread pool (provide kwargs via lambda to avoid arg misinterpretation)
-            vecs = await loop.run_in_executor(None, lambda b=batch: self.model.encode(b, normalize_embeddings=self.normalize))
-            results.extend(v.tolist() for v in vecs)
-        return results
+            encoded[idx] = await loop.run_in_executor(None, lambda b=batch: self._encode_batch(b))
+        if misses is None:
+            out = encoded
+        elif misses:
+            await loop.run_in_executor(None, self._cache_fill, out, misses, encoded)
+        if self.cache is not None:
+            logger.debug(f"Embedding batch: {len(texts)} texts, {len(pending)} encoded, {len(texts) - len(pending)} from cache")
+        return out
+
+    async def get_embeddings_batch_async(self, texts: Sequence[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """Asynchronous batch embedding to mirror Gemma interface (list form of encode_matrix_async)."""
+        return (await self.encode_matrix_async(texts, batch_size)).tolist()
+
+    def cache_stats(self) -> Optional[dict]:
+        """Hit/miss counters of the on-disk cache (None when caching is disabled)."""
+        return self.cache.stats() if self.cache is not None else None
 
     def get_dimension(self) -> int:
         return self._dimension
@@ -95,3 +227,4 @@ if __name__ == "__main__":
     print("Model:", svc.model_name)
     print("Dim:", len(emb))
     print("First 6 dims:", emb[:6])
+    print("Cache:", svc.cache_stats())
@@ -0,0 +1,183 @@
+"""
+Embedding Cache
+===============
+
+Persistent, content-addressed cache for embedding vectors.
+
+Vectors are keyed by sha256(model name, normalization flag, text) and stored as
+raw float32 blobs in a single SQLite file, so re-ingesting unchanged ticket text
+skips the encoder entirely. The store is size-bounded: once it grows past
+``max_bytes`` the least recently used entries are evicted.
+
+Environment Variables:
+  EMBEDDING_CACHE_ENABLED: Set to false/0 to disable the cache (default true)
+  EMBEDDING_CACHE_PATH: Location of the cache file (default ~/.cache/combot/embedding_cache.sqlite3)
+  EMBEDDING_CACHE_MAX_MB: Size bound before LRU eviction kicks in (default 1024)
+"""
+from __future__ import annotations
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "combot", "embedding_cache.sqlite3")
+
+
+def make_cache_key(model_name: str, normalize: bool, text: str) -> bytes:
+    """Content address for one (model, normalization, text) triple."""
+    h = hashlib.sha256()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(b"1" if normalize else b"0")
+    h.update(b"\x00")
+    h.update(text.encode("utf-8", errors="surrogatepass"))
+    return h.digest()
+
+
+class EmbeddingCache:
+    """Single-file float32 vector store with LRU eviction and hit/miss counters."""
+
+    def __init__(self, path: str | None = None, max_bytes: int | None = None):
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("EMBEDDING_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key BLOB PRIMARY KEY,"
+            " vec BLOB NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(vec)), 0) FROM embeddings").fetchone()
+        self._entries, self._total_bytes = int(row[0]), int(row[1])
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        logger.info(f"🗃️ Embedding cache at {self.path}: {self._entries} entries, {self._total_bytes / 1024**2:.1f} MB (limit {self.max_bytes / 1024**2:.0f} MB)")
+
+    def get_many(self, model_name: str, normalize: bool, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Look up vectors for texts; missing entries come back as None (order preserved)."""
+        keys = [make_cache_key(model_name, normalize, t) for t in texts]
+        found: Dict[bytes, np.ndarray] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite caps bound parameters per statement, so look up in slices
+            for i in range(0, len(unique_keys), 500):
+                part = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                for key, blob in self._conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({placeholders})", part
+                ):
+                    found[bytes(key)] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, k) for k in found],
+                )
+                self._conn.commit()
+            results = [found.get(k) for k in keys]
+            hit_count = sum(1 for r in results if r is not None)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+        return results
+
+    def put_many(self, model_name: str, normalize: bool, texts: Sequence[str], vectors: Sequence[Any]):
+        """Store vectors for texts (float32), evicting least recently used entries when over budget."""
+        if not texts:
+            return
+        now = time.time()
+        blobs: Dict[bytes, bytes] = {}
+        for t, v in zip(texts, vectors):
+            blobs[make_cache_key(model_name, normalize, t)] = np.ascontiguousarray(v, dtype=np.float32).tobytes()
+        keys = list(blobs)
+        with self._lock:
+            # Keep the size counters incremental: replaced rows swap their old bytes out
+            replaced: Dict[bytes, int] = {}
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                for key, size in self._conn.execute(
+                    f"SELECT key, LENGTH(vec) FROM embeddings WHERE key IN ({placeholders})", part
+                ):
+                    replaced[bytes(key)] = int(size)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vec, last_access) VALUES (?, ?, ?)",
+                [(k, b, now) for k, b in blobs.items()],
+            )
+            self._conn.commit()
+            self._entries += len(keys) - len(replaced)
+            self._total_bytes += sum(len(b) for b in blobs.values()) - sum(replaced.values())
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+
+    def _evict_locked(self):
+        """Drop the oldest entries until the store is back under 90% of the limit."""
+        target = int(self.max_bytes * 0.9)
+        avg = max(1, self._total_bytes // max(1, self._entries))
+        to_drop = max(1, (self._total_bytes - target) // avg + 1)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (to_drop,),
+        )
+        self._conn.commit()
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(vec)), 0) FROM embeddings").fetchone()
+        self.evictions += self._entries - int(row[0])
+        self._entries, self._total_bytes = int(row[0]), int(row[1])
+        logger.info(f"Embedding cache evicted {to_drop} entries (now {self._total_bytes / 1024**2:.1f} MB)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "entries": self._entries,
+                "size_mb": round(self._total_bytes / 1024**2, 2),
+                "max_mb": round(self.max_bytes / 1024**2, 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+
+
+def create_embedding_cache() -> Optional[EmbeddingCache]:
+    """Build the cache from environment settings; returns None when disabled or unusable."""
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() in {"0", "false", "no", "off"}:
+        logger.info("Embedding cache disabled (EMBEDDING_CACHE_ENABLED=false)")
+        return None
+    try:
+        return EmbeddingCache()
+    except Exception as e:
+        logger.warning(f"Embedding cache unavailable, continuing without it: {e}")
+        return None
+
+
+__all__ = ["EmbeddingCache", "create_embedding_cache", "make_cache_key"]
@@ -0,0 +1,139 @@
+"""
+Embedding Micro-Batcher
+=======================
+
+Coalesces concurrent single-query embedding requests into one encode call.
+
+Under chat load every request embeds its own query; on CPU twenty one-item
+forward passes cost far more than one twenty-item pass. The micro-batcher
+queues callers for up to ``max_wait_ms`` (or until ``max_batch_size`` texts are
+waiting), runs a single ``get_embeddings`` call in an executor and resolves each
+caller's future with its own vector.
+
+The wrapper delegates every other attribute to the wrapped embedding service, so it
+can be registered wherever the plain service was used.
+
+Environment Variables:
+  EMBEDDING_MICROBATCH: Set to false/0 to disable wrapping in the app (default true)
+  EMBEDDING_MICROBATCH_WAIT_MS: Max time a request waits for companions (default 5)
+  EMBEDDING_MICROBATCH_MAX: Max texts per coalesced batch (default 32)
+"""
+from __future__ import annotations
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+class EmbeddingMicroBatcher:
+    """Async front-end that merges concurrent embedding requests into shared batches."""
+
+    def __init__(self, service, max_wait_ms: Optional[float] = None, max_batch_size: Optional[int] = None):
+        self.service = service
+        self.max_wait_ms = float(max_wait_ms if max_wait_ms is not None else os.getenv("EMBEDDING_MICROBATCH_WAIT_MS", "5"))
+        self.max_batch_size = int(max_batch_size if max_batch_size is not None else os.getenv("EMBEDDING_MICROBATCH_MAX", "32"))
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Metrics
+        self.requests = 0
+        self.batches = 0
+        self.max_observed_batch = 0
+        self._batch_sizes: deque = deque(maxlen=1000)
+        self._queue_waits_ms: deque = deque(maxlen=1000)
+        self._encode_ms: deque = deque(maxlen=1000)
+        logger.info(f"Embedding micro-batcher enabled (max_wait={self.max_wait_ms}ms, max_batch={self.max_batch_size})")
+
+    def __getattr__(self, name: str):
+        # Only reached for attributes not defined on the batcher itself
+        return getattr(self.service, name)
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def get_embedding_async(self, text: str) -> List[float]:
+        if not isinstance(text, str):
+            text = str(text)
+        self._ensure_worker()
+        fut = self._loop.create_future()
+        self.requests += 1
+        await self._queue.put((text, fut, time.perf_counter()))
+        return await fut
+
+    async def get_embeddings_async(self, texts: Sequence[str]) -> List[List[float]]:
+        return list(await asyncio.gather(*(self.get_embedding_async(t) for t in texts)))
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future, float]]:
+        """Block for the first request, then gather companions until the wait window closes."""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            # Drain whatever is already queued without yielding
+            while not self._queue.empty() and len(batch) < self.max_batch_size:
+                batch.append(self._queue.get_nowait())
+            remaining = deadline - self._loop.time()
+            if remaining <= 0 or len(batch) >= self.max_batch_size:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            texts = [t for t, _, _ in batch]
+            for _, _, enqueued in batch:
+                self._queue_waits_ms.append((started - enqueued) * 1000.0)
+            try:
+                vectors = await self._loop.run_in_executor(
+                    None, lambda: self.service.get_embeddings(texts, batch_size=len(texts))
+                )
+                for (_, fut, _), vec in zip(batch, vectors):
+                    if not fut.done():
+                        fut.set_result(vec)
+            except Exception as e:
+                logger.warning(f"Embedding micro-batch of {len(batch)} failed: {e}")
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+            self.batches += 1
+            self.max_observed_batch = max(self.max_observed_batch, len(batch))
+            self._batch_sizes.append(len(batch))
+            self._encode_ms.append((time.perf_counter() - started) * 1000.0)
+
+    def metrics(self) -> Dict[str, Any]:
+        sizes = list(self._batch_sizes)
+        waits = list(self._queue_waits_ms)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            "max_batch_size_observed": self.max_observed_batch,
+            "queue_wait_ms_p50": round(_percentile(waits, 50), 2),
+            "queue_wait_ms_p95": round(_percentile(waits, 95), 2),
+            "encode_ms_avg": round(sum(self._encode_ms) / len(self._encode_ms), 2) if self._encode_ms else 0.0,
+            "max_wait_ms": self.max_wait_ms,
+            "max_batch_size": self.max_batch_size,
+        }
+
+
+__all__ = ["EmbeddingMicroBatcher"]
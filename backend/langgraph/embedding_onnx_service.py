@@ -0,0 +1,76 @@
+"""
+ONNX Embedding Service
+======================
+
+CPU-oriented drop-in for BGEEmbeddingService that runs the configured model through
+ONNX Runtime, optionally with dynamic int8-quantized weights.
+
+The graph is exported from the same checkpoint the SentenceTransformer backend uses
+(local snapshot or hub id) on first start and reused afterwards. Pooling matches BGE:
+CLS token of the last hidden state, L2-normalized.
+
+Caching, batching and the public interface (get_embedding / get_embeddings /
+get_embeddings_batch_async / get_dimension) are inherited unchanged; cached vectors are
+namespaced by backend so int8 and float32 results never mix.
+
+Environment Variables:
+  EMBEDDING_BACKEND=onnx: Select this backend in embedding_service_factory
+  EMBEDDING_ONNX_QUANTIZE: int8 (default) or none
+  EMBEDDING_MAX_SEQ_LENGTH: Token truncation length (default 512)
+  ONNX_MODEL_CACHE_DIR / ONNX_NUM_THREADS: see onnx_runtime_utils.py
+"""
+from __future__ import annotations
+import os
+import logging
+from typing import List, Optional
+
+import numpy as np
+
+try:
+    from .embedding_bge_service import BGEEmbeddingService, _DEFAULT_CACHE
+    from .onnx_runtime_utils import ensure_onnx_model, create_onnx_session
+except ImportError:  # script mode
+    from embedding_bge_service import BGEEmbeddingService, _DEFAULT_CACHE
+    from onnx_runtime_utils import ensure_onnx_model, create_onnx_session
+
+logger = logging.getLogger(__name__)
+
+
+class ONNXEmbeddingService(BGEEmbeddingService):
+    def __init__(self, model_name: str | None = None, local_dir: str | None = None, normalize: bool = True,
+                 cache=_DEFAULT_CACHE, quantize: Optional[str] = None, max_seq_length: Optional[int] = None):
+        self.quantize = (quantize or os.getenv("EMBEDDING_ONNX_QUANTIZE", "int8")).lower()
+        self.max_seq_length = int(max_seq_length or os.getenv("EMBEDDING_MAX_SEQ_LENGTH", "512"))
+        self.backend_tag = f"onnx-{self.quantize}" if self.quantize != "none" else "onnx"
+        super().__init__(model_name=model_name, local_dir=local_dir, normalize=normalize, cache=cache)
+
+    def _load(self):
+        from transformers import AutoTokenizer
+        source = self.local_dir if self.local_dir else self.model_name
+        logger.info(f"Loading ONNX embedding model for {source} (quantize={self.quantize})")
+        path = ensure_onnx_model(self.model_name, model_source=source, kind="encoder", quantize=self.quantize)
+        self.onnx_path = path
+        self.tokenizer = AutoTokenizer.from_pretrained(os.path.dirname(path))
+        session = create_onnx_session(path, num_threads=self.num_threads)
+        self._input_names = {i.name for i in session.get_inputs()}
+        return session
+
+    def _probe_dimension(self) -> int:
+        return int(self._encode_batch(["dimension probe"]).shape[1])
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        enc = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np")
+        feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self._input_names}
+        hidden = self.model.run(None, feeds)[0]
+        vecs = np.ascontiguousarray(hidden[:, 0], dtype=np.float32)  # CLS pooling
+        if self.normalize:
+            norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+            vecs /= np.maximum(norms, 1e-12)
+        return vecs
+
+
+def create_onnx_embedding_service() -> ONNXEmbeddingService:
+    return ONNXEmbeddingService()
+
+
+__all__ = ["ONNXEmbeddingService", "create_onnx_embedding_service"]
@@ -3,21 +3,84 @@
 Central factory for creating the active embedding backend.
 
 Currently standardized on BGE (BAAI/bge-large-en-v1.5). Legacy Gemma code removed.
+The model can run either through SentenceTransformers/PyTorch (default) or through
+ONNX Runtime (optionally int8-quantized) for CPU-only hosts.
 
 Environment Variables:
+  EMBEDDING_BACKEND: sentence-transformers (default) or onnx
+  EMBEDDING_ONNX_QUANTIZE: int8 (default) or none, when EMBEDDING_BACKEND=onnx
   EMBEDDING_MODEL_NAME: Override model id (default BAAI/bge-large-en-v1.5)
   LOCAL_EMBEDDING_MODEL_DIR: Optional local snapshot path
   EMBEDDING_BATCH_SIZE: Batch size override for encoding
+  EMBEDDING_NUM_THREADS: Intra-op threads for the model runtime
+  EMBEDDING_TUNING_FILE: JSON settings written by benchmarks/embedding_throughput.py --write-config
+                         (default ~/.cache/combot/embedding_tuning.json); explicit env vars win
 """
 from __future__ import annotations
+import os
+import json
 import logging
+from typing import Dict
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_TUNING_FILE = os.path.join(os.path.expanduser("~"), ".cache", "combot", "embedding_tuning.json")
+
+# Settings the tuning file may provide
+TUNING_KEYS = ("EMBEDDING_BACKEND", "EMBEDDING_ONNX_QUANTIZE", "EMBEDDING_BATCH_SIZE",
+               "EMBEDDING_NUM_THREADS", "EMBEDDING_LENGTH_BUCKETING")
+# Older tuning files wrote the process-wide flag, which the rerankers read too
+_LEGACY_TUNING_KEYS = {"LENGTH_BUCKETING_ENABLED": "EMBEDDING_LENGTH_BUCKETING"}
+
+
+def tuning_file_path() -> str:
+    return os.getenv("EMBEDDING_TUNING_FILE", DEFAULT_TUNING_FILE)
+
+
+def load_embedding_tuning(path: str | None = None) -> Dict[str, str]:
+    """Recommended settings from the tuning file ({} when absent or unreadable)."""
+    path = path or tuning_file_path()
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.warning(f"⚠️ Ignoring unreadable embedding tuning file {path}: {e}")
+        return {}
+    settings = dict(data.get("settings", data))
+    for old, new in _LEGACY_TUNING_KEYS.items():
+        if old in settings:
+            settings.setdefault(new, settings.pop(old))
+    return {k: str(settings[k]) for k in TUNING_KEYS if k in settings}
+
+
+def apply_embedding_tuning(path: str | None = None) -> Dict[str, str]:
+    """Export tuning-file settings as env defaults; returns the ones actually applied."""
+    applied = {}
+    for key, value in load_embedding_tuning(path).items():
+        if key not in os.environ:
+            os.environ[key] = value
+            applied[key] = value
+    if applied:
+        logger.info(f"🎛️ Embedding tuning applied from {path or tuning_file_path()}: {applied}")
+    return applied
+
+
 def create_embedding_backend():
+    apply_embedding_tuning()
+    backend = os.getenv("EMBEDDING_BACKEND", "sentence-transformers").lower()
+    if backend == "onnx":
+        try:
+            from .embedding_onnx_service import create_onnx_embedding_service
+            svc = create_onnx_embedding_service()
+            logger.info(f"Embedding factory: ONNX backend active model='{svc.model_name}' quantize={svc.quantize} dim={svc.get_dimension()}")
+            return svc
+        except Exception as e:
+            logger.warning(f"⚠️ ONNX embedding backend unavailable ({e}); falling back to SentenceTransformers")
     from .embedding_bge_service import create_bge_embedding_service
     svc = create_bge_embedding_service()
     logger.info(f"Embedding factory: BGE backend active model='{svc.model_name}' dim={svc.get_dimension()}")
     return svc
 
-__all__ = ["create_embedding_backend"]
\ No newline at end of file
+__all__ = ["create_embedding_backend", "load_embedding_tuning", "apply_embedding_tuning", "tuning_file_path"]
@@ -0,0 +1,220 @@
+"""
+Embedding Worker Pool
+=====================
+
+Multi-process bulk embedding for ingestion.
+
+A single model instance in one process leaves most cores idle during bulk ingestion.
+The pool starts N worker processes (spawn context), each pinned to its own subset of
+cores with a matching intra-op thread count, and each loading the embedding model
+once. Text is split into shards, encoded in parallel and streamed back in input order.
+
+The on-disk embedding cache is consulted in the parent process, so only unseen text is
+shipped to workers, and new vectors are written back once per shard.
+
+Exposes the same surface the ingestion code uses on the embedding service
+(get_embeddings / get_embeddings_batch_async / encode_matrix / get_dimension / model_name / cache_stats).
+
+Environment Variables:
+  EMBEDDING_WORKERS: Number of worker processes; 0/1 disables the pool, "auto" = physical cores / threads
+  EMBEDDING_WORKER_THREADS: Threads (and pinned cores) per worker (default 2)
+  EMBEDDING_WORKER_SHARD_SIZE: Texts per task sent to a worker (default 64)
+  EMBEDDING_BACKEND / EMBEDDING_ONNX_QUANTIZE / EMBEDDING_BATCH_SIZE: forwarded to workers
+"""
+from __future__ import annotations
+import os
+import time
+import asyncio
+import logging
+import multiprocessing as mp
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .embedding_cache import create_embedding_cache
+except ImportError:  # script mode
+    from embedding_cache import create_embedding_cache
+
+logger = logging.getLogger(__name__)
+
+# Per-process model instance (set by _init_worker inside each worker)
+_WORKER_SERVICE = None
+
+
+def _physical_cores() -> int:
+    try:
+        import psutil
+        return psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    except Exception:
+        return os.cpu_count() or 1
+
+
+def _available_cores() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _init_worker(core_queue, threads: int, backend: str, model_name: Optional[str], normalize: bool):
+    """Pin this worker to its cores, cap thread pools, then load the model once."""
+    global _WORKER_SERVICE
+    cores = core_queue.get()
+    if cores and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, cores)
+        except OSError:
+            pass
+    # Must be set before torch / onnxruntime create their thread pools
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "ONNX_NUM_THREADS", "EMBEDDING_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    if backend == "onnx":
+        try:
+            from .embedding_onnx_service import ONNXEmbeddingService as service_cls
+        except ImportError:
+            from embedding_onnx_service import ONNXEmbeddingService as service_cls
+    else:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+        try:
+            from .embedding_bge_service import BGEEmbeddingService as service_cls
+        except ImportError:
+            from embedding_bge_service import BGEEmbeddingService as service_cls
+    # Workers never touch the cache; the parent owns it
+    _WORKER_SERVICE = service_cls(model_name=model_name, normalize=normalize, cache=None)
+
+
+def _worker_info() -> Tuple[int, str, str]:
+    return _WORKER_SERVICE.get_dimension(), _WORKER_SERVICE.model_name, _WORKER_SERVICE.cache_namespace
+
+
+def _encode_shard(texts: List[str]) -> np.ndarray:
+    return _WORKER_SERVICE._encode_uncached(texts)
+
+
+class EmbeddingWorkerPool:
+    """Process pool that shards embedding work across pinned model replicas."""
+
+    def __init__(self, num_workers: Optional[int] = None, threads_per_worker: Optional[int] = None,
+                 model_name: Optional[str] = None, normalize: bool = True, backend: Optional[str] = None,
+                 shard_size: Optional[int] = None):
+        self.threads_per_worker = int(threads_per_worker or os.getenv("EMBEDDING_WORKER_THREADS", "2"))
+        if num_workers is None:
+            num_workers = resolve_worker_count()
+        self.num_workers = max(1, num_workers)
+        self.shard_size = int(shard_size or os.getenv("EMBEDDING_WORKER_SHARD_SIZE", "64"))
+        self.normalize = normalize
+        backend = (backend or os.getenv("EMBEDDING_BACKEND", "sentence-transformers")).lower()
+
+        cores = _available_cores()
+        ctx = mp.get_context("spawn")
+        core_queue = ctx.Queue()
+        for w in range(self.num_workers):
+            group = cores[w * self.threads_per_worker:(w + 1) * self.threads_per_worker]
+            core_queue.put(group)  # empty when oversubscribed -> worker stays unpinned
+        started = time.time()
+        self._pool = ctx.Pool(
+            self.num_workers,
+            initializer=_init_worker,
+            initargs=(core_queue, self.threads_per_worker, backend, model_name, normalize),
+        )
+        self._dimension, self.model_name, self.cache_namespace = self._pool.apply(_worker_info)
+        self.cache = create_embedding_cache()
+        logger.info(f"🏭 Embedding worker pool ready: {self.num_workers} workers x {self.threads_per_worker} threads "
+                    f"(backend={backend}, dim={self._dimension}) in {time.time() - started:.1f}s")
+
+    def iter_encode(self, texts: Sequence[str]) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (start_index, vectors) per shard, in input order, as workers finish them."""
+        texts = [t if isinstance(t, str) else str(t) for t in texts]
+        shards = [texts[i:i + self.shard_size] for i in range(0, len(texts), self.shard_size)]
+        for n, vecs in enumerate(self._pool.imap(_encode_shard, shards)):
+            yield n * self.shard_size, vecs
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Cache-aware parallel encode; returns an (n, dim) float32 matrix."""
+        texts = [t if isinstance(t, str) else str(t) for t in texts]
+        out = np.empty((len(texts), self._dimension), dtype=np.float32)
+        if not texts:
+            return out
+        misses = {}
+        if self.cache is not None:
+            cached = self.cache.get_many(self.cache_namespace, self.normalize, texts)
+            for i, (t, v) in enumerate(zip(texts, cached)):
+                if v is not None and v.shape[0] == self._dimension:
+                    out[i] = v
+                else:
+                    misses.setdefault(t, []).append(i)
+            pending = list(misses.keys())
+        else:
+            pending = texts
+        started = time.time()
+        for start, vecs in self.iter_encode(pending):
+            batch = pending[start:start + len(vecs)]
+            if self.cache is not None:
+                for t, v in zip(batch, vecs):
+                    out[misses[t]] = v
+                self.cache.put_many(self.cache_namespace, self.normalize, batch, vecs)
+            else:
+                out[start:start + len(vecs)] = vecs
+        if pending:
+            elapsed = max(time.time() - started, 1e-9)
+            logger.info(f"🏭 Encoded {len(pending)} texts on {self.num_workers} workers "
+                        f"({len(pending) / elapsed:.1f} texts/s, {len(texts) - len(pending)} from cache)")
+        return out
+
+    def encode_matrix(self, texts: Sequence[str], batch_size: Optional[int] = None) -> np.ndarray:
+        return self.encode(texts)
+
+    async def encode_matrix_async(self, texts: Sequence[str], batch_size: Optional[int] = None) -> np.ndarray:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.encode, texts)
+
+    def get_embeddings(self, texts: Sequence[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    async def get_embeddings_batch_async(self, texts: Sequence[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        return (await self.encode_matrix_async(texts)).tolist()
+
+    def get_dimension(self) -> int:
+        return self._dimension
+
+    def cache_stats(self) -> Optional[dict]:
+        return self.cache.stats() if self.cache is not None else None
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def resolve_worker_count() -> int:
+    """EMBEDDING_WORKERS as an int ("auto" = physical cores / EMBEDDING_WORKER_THREADS)."""
+    raw = os.getenv("EMBEDDING_WORKERS", "0").strip().lower()
+    if raw == "auto":
+        threads = int(os.getenv("EMBEDDING_WORKER_THREADS", "2"))
+        return max(1, _physical_cores() // max(1, threads))
+    return int(raw) if raw.isdigit() else 0
+
+
+def create_embedding_worker_pool() -> Optional[EmbeddingWorkerPool]:
+    """Pool from environment settings; None when fewer than two workers are configured."""
+    workers = resolve_worker_count()
+    if workers < 2:
+        return None
+    try:
+        return EmbeddingWorkerPool(num_workers=workers)
+    except Exception as e:
+        logger.warning(f"⚠️ Embedding worker pool unavailable, using in-process encoding: {e}")
+        return None
+
+
+__all__ = ["EmbeddingWorkerPool", "create_embedding_worker_pool", "resolve_worker_count"]
@@ -0,0 +1,48 @@
+"""
+Gunicorn configuration for multi-worker API deployments
+=======================================================
+
+Models are loaded once in the master (preload_app + MODEL_PRELOAD) and shared with
+the forked uvicorn workers copy-on-write; see model_preload.py.
+
+Run from the repository root:
+    gunicorn -c backend/langgraph/gunicorn_conf.py backend.langgraph.app_langgraph:app
+
+Environment Variables:
+  WEB_CONCURRENCY: Number of worker processes (default 2)
+  BIND: Listen address (default 0.0.0.0:8000)
+  GUNICORN_TIMEOUT: Worker timeout seconds (default 120)
+  MODEL_PRELOAD: Set to false to have each worker load its own models
+  MODEL_WORKER_THREADS: Intra-op threads per worker (default: CPU count / WEB_CONCURRENCY)
+  REDIS_URL: Shared store for per-request debug state (file store otherwise)
+"""
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Import the app (and load models) in the master before forking workers
+preload_app = True
+os.environ.setdefault("MODEL_PRELOAD", "true")
+os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+# disable -> freeze (when_ready) -> enable (post_fork): objects created in the master
+# land in the permanent generation, so worker GC passes do not write to their
+# headers and un-share the pages they live on
+gc.disable()
+
+
+def when_ready(server):
+    from backend.langgraph.model_preload import freeze_for_fork
+    freeze_for_fork()
+
+
+def post_fork(server, worker):
+    from backend.langgraph.model_preload import after_fork
+    after_fork()
@@ -19,6 +19,16 @@ from pathlib import Path
 from dataclasses import dataclass
 from datetime import datetime
 import re
+import time
+
+try:
+    from .rerank_cache import bump_ingestion_version
+    from .token_chunker import create_token_chunker, token_chunking_enabled, savings_report
+    from .ticket_doc_store import get_ticket_doc_store, split_heavy_fields
+except ImportError:  # script mode
+    from rerank_cache import bump_ingestion_version
+    from token_chunker import create_token_chunker, token_chunking_enabled, savings_report
+    from ticket_doc_store import get_ticket_doc_store, split_heavy_fields
 
 logger = logging.getLogger(__name__)
 
@@ -61,7 +71,10 @@ class JIRATicketProcessor:
                  qdrant_service,
                  documents_path: str = "/home/ubuntu/Ravi/ComBot/backend/documents/",
                  chunk_size: int = 800,
-                 chunk_overlap: int = 150):
+                 chunk_overlap: int = 150,
+                 embedding_pool=None,
+                 chunker=None,
+                 doc_store=None):
         """
         Initialize JIRA ticket processor
         
@@ -69,21 +82,32 @@ class JIRATicketProcessor:
             embedding_service: BGE embedding service instance
             qdrant_service: Qdrant service for vector storage
             documents_path: Path to JIRA ticket files
-            chunk_size: Size of text chunks
-            chunk_overlap: Overlap between chunks
+            chunk_size: Size of text chunks in characters (legacy sizing, CHUNKING_MODE=legacy)
+            chunk_overlap: Overlap between chunks in characters (legacy sizing)
+            embedding_pool: Optional EmbeddingWorkerPool used for bulk encoding
+            chunker: Optional shared TokenChunker (one is created from the embedding tokenizer otherwise)
+            doc_store: Optional TicketDocStore for the heavy text fields (the shared store when enabled otherwise)
         """
         self.embedding_service = embedding_service
+        self.embedding_pool = embedding_pool
         self.qdrant_service = qdrant_service
         self.documents_path = Path(documents_path)
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.collection_name = "jira_tickets"
+        # Token-budgeted chunking (CHUNK_MAX_TOKENS / CHUNK_OVERLAP_TOKENS)
+        self.chunker = chunker or create_token_chunker(embedding_service)
+        # Opt-in (TICKET_DOC_STORE_ENABLED): heavy text goes to the side store once per ticket; chunk payloads keep a doc_ref
+        self.doc_store = doc_store if doc_store is not None else get_ticket_doc_store()
         
         # Ensure documents directory exists
         self.documents_path.mkdir(parents=True, exist_ok=True)
         
         logger.info(f"Initialized JIRA processor for: {self.documents_path}")
-        logger.info(f"Chunk size: {chunk_size}, Overlap: {chunk_overlap}")
+        if token_chunking_enabled():
+            logger.info(f"Chunk budget: {self.chunker.max_tokens} tokens, Overlap: {self.chunker.overlap_tokens} tokens")
+        else:
+            logger.info(f"Chunk size: {chunk_size}, Overlap: {chunk_overlap}")
     
     def parse_ticket_file(self, file_path: str) -> List[JIRATicket]:
         """
@@ -443,72 +467,69 @@ class JIRATicketProcessor:
             "embedding_version": embedding_version,
             "keywords": keywords
         }
+        if self.doc_store is not None:
+            base_metadata, heavy_fields = split_heavy_fields(base_metadata)
+            self.doc_store.put_many({ticket.key: heavy_fields})
         
-        # Generate UUID-based chunk ID for Qdrant compatibility
-        import hashlib
         safe_ticket_key = re.sub(r'[^a-zA-Z0-9_-]', '_', ticket.key)[:50]  # Clean and limit length
-        chunk_id = str(uuid.uuid4())
         
-        # If combined text is short enough, create single chunk
-        if len(combined_text) <= self.chunk_size:
-            chunk = JIRAChunk(
+        if token_chunking_enabled():
+            # Token-budgeted windows (never longer than the model's input window)
+            spans = self.chunker.split(combined_text)
+            baseline = [t for t, _ in self._legacy_split(combined_text)] if self.chunker.report_baseline else None
+            self.chunker.record(spans, baseline)
+            pieces = [(s.text, {"token_count": s.tokens, "chunk_start_char": s.start, "chunk_end_char": s.end})
+                      for s in spans]
+        else:
+            pieces = self._legacy_split(combined_text)
+        
+        single = len(pieces) == 1
+        for chunk_index, (chunk_text, span_metadata) in enumerate(pieces):
+            # UUID-based chunk ID for Qdrant compatibility
+            chunk_id = str(uuid.uuid4())
+            chunk_type = "combined" if single else "partial"
+            chunks.append(JIRAChunk(
                 chunk_id=chunk_id,
-                text=combined_text,
+                text=chunk_text,
                 ticket_id=ticket.key,
-                chunk_index=0,
-                chunk_type="combined",
+                chunk_index=chunk_index,
+                chunk_type=chunk_type,
                 metadata={
                     **base_metadata,
                     "chunk_id": chunk_id,
-                    "chunk_type": "combined",
-                    "original_chunk_id": f"{safe_ticket_key}_combined_0"
+                    "chunk_type": chunk_type,
+                    "original_chunk_id": f"{safe_ticket_key}_{chunk_type}_{chunk_index}",
+                    **span_metadata
                 }
-            )
-            chunks.append(chunk)
-        else:
-            # Split into smaller chunks
-            words = combined_text.split()
-            chunk_index = 0
-            start = 0
-            
-            while start < len(words):
-                # Calculate chunk size in words (rough estimate)
-                words_per_chunk = self.chunk_size // 5  # Rough estimate
-                end = min(start + words_per_chunk, len(words))
-                
-                chunk_words = words[start:end]
-                chunk_text = " ".join(chunk_words)
-                
-                if chunk_text.strip():
-                    safe_chunk_id = str(uuid.uuid4())
-                    chunk = JIRAChunk(
-                        chunk_id=safe_chunk_id,
-                        text=chunk_text,
-                        ticket_id=ticket.key,
-                        chunk_index=chunk_index,
-                        chunk_type="partial",
-                        metadata={
-                            **base_metadata,
-                            "chunk_id": safe_chunk_id,
-                            "chunk_type": "partial",
-                            "original_chunk_id": f"{safe_ticket_key}_partial_{chunk_index}",
-                            "chunk_start_word": start,
-                            "chunk_end_word": end
-                        }
-                    )
-                    chunks.append(chunk)
-                    chunk_index += 1
-                
-                # Move with overlap
-                overlap_words = self.chunk_overlap // 5
-                start = max(end - overlap_words, start + 1)
-                
-                if end >= len(words):
-                    break
+            ))
         
         logger.debug(f"Created {len(chunks)} chunks for ticket {ticket.key}")
         return chunks
     
+    def _legacy_split(self, combined_text: str) -> List[tuple]:
+        """Previous character/word sizing (CHUNKING_MODE=legacy, and the baseline for the savings report).
+        
+        Returns (text, span_metadata) pairs.
+        """
+        if len(combined_text) <= self.chunk_size:
+            return [(combined_text, {})]
+        pieces = []
+        words = combined_text.split()
+        start = 0
+        while start < len(words):
+            # Calculate chunk size in words (rough estimate)
+            words_per_chunk = self.chunk_size // 5  # Rough estimate
+            end = min(start + words_per_chunk, len(words))
+            chunk_text = " ".join(words[start:end])
+            if chunk_text.strip():
+                pieces.append((chunk_text, {"chunk_start_word": start, "chunk_end_word": end}))
+            # Move with overlap
+            overlap_words = self.chunk_overlap // 5
+            start = max(end - overlap_words, start + 1)
+            if end >= len(words):
+                break
+        return pieces
+    
     def process_ticket_file(self, file_path: str) -> Dict[str, Any]:
         """
         Process a single JIRA ticket file
@@ -537,6 +558,7 @@ class JIRATicketProcessor:
             
             all_chunks = []
             successful_tickets = 0
+            self.chunker.reset_stats()
             
             # Process each ticket
             for ticket in tickets:
@@ -561,7 +583,11 @@ class JIRATicketProcessor:
             # Generate embeddings
             texts = [chunk.text for chunk in all_chunks]
             logger.info(f"Generating embeddings for {len(texts)} chunks...")
-            embeddings = self.embedding_service.get_embeddings(texts)
+            encoder = self.embedding_pool or self.embedding_service
+            encode_start = time.perf_counter()
+            embeddings = encoder.get_embeddings(texts)
+            chunking = self.chunker.stats()
+            chunking["savings"] = savings_report(chunking, time.perf_counter() - encode_start)
             
             # Store in Qdrant
             points = []
@@ -589,9 +615,15 @@ class JIRATicketProcessor:
                 points=points
             )
             
+            bump_ingestion_version(reason=f"jira file {Path(file_path).name}")
+            
             logger.info(f"✅ Successfully processed JIRA file: {Path(file_path).name}")
             logger.info(f"   Processed {successful_tickets} tickets")
             logger.info(f"   Created {len(all_chunks)} chunks")
+            savings = chunking["savings"]
+            if "vectors_saved" in savings:
+                logger.info(f"   Token chunking saved {savings['vectors_saved']} vectors, "
+                            f"~{savings['encode_seconds_saved_est']}s encode vs legacy sizing")
             logger.info(f"   Stored in collection: {self.collection_name}")
             
             return {
@@ -600,7 +632,8 @@ class JIRATicketProcessor:
                 "tickets_processed": successful_tickets,
                 "chunks_created": len(all_chunks),
                 "collection_name": self.collection_name,
-                "embeddings_generated": len(embeddings)
+                "embeddings_generated": len(embeddings),
+                "chunking": chunking
             }
             
         except Exception as e:
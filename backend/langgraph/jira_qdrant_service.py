@@ -4,14 +4,37 @@ Enhanced Qdrant Service for JIRA Ticket Processing
 
 Extended Qdrant service optimized for storing and retrieving JIRA ticket chunks
 with proper metadata handling and ticket-based collection organization.
+
+The async API (initialize, collection setup, searches, scrolls, upserts) runs natively
+on the event loop through AsyncQdrantClient, over REST or gRPC. One async client is
+kept per event loop, since its connections belong to the loop that opened them. The
+synchronous QdrantClient stays for the sync helpers (create_collection, store_vectors,
+search_similar, ...) and serves the async API through a small executor only when the
+in-memory fallback is active.
+
+Collection setup also reconciles the payload indexes declared in payload_indexes.py
+(ticket_key, ingestion_version, is_resolved), so filtered searches and scrolls stay
+index lookups as collections grow. New jira_tickets / jira_tickets_global collections
+get the vector quantization configured in vector_quantization.py (int8 or binary in
+RAM, originals on disk), and searches oversample and rescore accordingly. Upserts
+(upsert_embeddings, upsert_matrix, store_vectors) go through the pipelined, byte-sized
+batches of upsert_pipeline.py.
+
+Environment Variables:
+  QDRANT_URL: Qdrant endpoint (default http://localhost:6333)
+  QDRANT_PREFER_GRPC: Talk gRPC from the async client (default false)
+  QDRANT_GRPC_PORT: gRPC port (default 6334)
+  QDRANT_TIMEOUT: Request timeout in seconds for the async client (default 60)
 """
 
 import asyncio
+import functools
 import numpy as np
 import logging
 import uuid
-from typing import List, Dict, Any, Optional
-from qdrant_client import QdrantClient
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+import httpx
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
 import qdrant_client.models as models
 from qdrant_client.http import models
@@ -20,6 +43,22 @@ import os
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+try:
+    from .payload_indexes import indexes_for, plan_index_changes
+    from .vector_quantization import (is_quantized_collection, quantization_config_models, quantization_mode,
+                                      search_quantization_models, vectors_on_disk)
+    from .upsert_pipeline import UpsertPipeline, estimate_point_bytes
+except ImportError:  # script mode
+    from payload_indexes import indexes_for, plan_index_changes
+    from vector_quantization import (is_quantized_collection, quantization_config_models, quantization_mode,
+                                     search_quantization_models, vectors_on_disk)
+    from upsert_pipeline import UpsertPipeline, estimate_point_bytes
+
+try:  # serializes numpy arrays natively (no per-element Python floats)
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,8 +68,17 @@ class JiraQdrantService:
     def __init__(self, base_url: str = None):
         self.qdrant_url = base_url or os.getenv('QDRANT_URL', 'http://localhost:6333')
         self.client = None
+        self.connection_method = None
+        self.prefer_grpc = os.getenv('QDRANT_PREFER_GRPC', 'false').lower() in {'1', 'true', 'yes', 'on'}
+        self.grpc_port = int(os.getenv('QDRANT_GRPC_PORT', '6334'))
+        self.timeout = int(os.getenv('QDRANT_TIMEOUT', '60'))
+        # Async clients belong to the event loop that created them
+        self._aclient: Optional[AsyncQdrantClient] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._aloop: Optional[asyncio.AbstractEventLoop] = None
         # Active embedding backend: BGE large (1024 dimensions)
         self.vector_size = 1024
+        # Only serves the async API for the in-memory fallback client
         self.executor = ThreadPoolExecutor(max_workers=4)
         
         # Collection naming strategy
@@ -44,6 +92,10 @@ class JiraQdrantService:
             "hnsw_ef": 64,
             "exact": False
         }
+        # Vector quantization of the large ticket collections (none | int8 | binary)
+        self.quantization = quantization_mode()
+        # Bounded in-flight, byte-sized upsert batches (QDRANT_UPSERT_*)
+        self.upsert_pipeline = UpsertPipeline()
         
         # Initialize connection synchronously
         self._connect_sync()
@@ -66,6 +118,7 @@ class JiraQdrantService:
                 # Test connection
                 self.client.get_collections()
                 
+                self.connection_method = method
                 logger.info(f"✅ Connected to Qdrant via {method}")
                 return
                 
@@ -76,64 +129,117 @@ class JiraQdrantService:
         logger.error("All Qdrant connection attempts failed")
         raise ConnectionError("Could not connect to Qdrant")
         
+    def _async_client(self) -> Optional[AsyncQdrantClient]:
+        """Async client for the running event loop (None for the in-memory fallback)"""
+        if self.connection_method == "memory":
+            return None
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aloop is not loop:
+            self._release_clients()
+            kwargs = {"prefer_grpc": self.prefer_grpc, "grpc_port": self.grpc_port, "timeout": self.timeout}
+            if self.connection_method == "localhost":
+                self._aclient = AsyncQdrantClient(host="localhost", port=6333, **kwargs)
+            else:
+                self._aclient = AsyncQdrantClient(url=self.qdrant_url, **kwargs)
+            self._aloop = loop
+            logger.info(f"⚡ Async Qdrant client ready ({'gRPC' if self.prefer_grpc else 'REST'}, {self.connection_method})")
+        return self._aclient
+
+    async def _acall(self, method: str, *args, **kwargs):
+        """Run a client method on the event loop; the in-memory client goes through the executor"""
+        aclient = self._async_client()
+        if aclient is not None:
+            return await getattr(aclient, method)(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(getattr(self.client, method), *args, **kwargs))
+
+    @staticmethod
+    async def _close_clients(aclient: Optional[AsyncQdrantClient], http: Optional[httpx.AsyncClient]):
+        try:
+            if aclient is not None:
+                await aclient.close()
+            if http is not None:
+                await http.aclose()
+        except Exception as e:
+            logger.warning(f"Closing async Qdrant clients failed: {e}")
+
+    def _release_clients(self):
+        """Detach async clients bound to another event loop, closing them on that loop
+        
+        Clients whose loop is no longer running (e.g. an asyncio.run that finished) can no
+        longer be awaited and are dropped.
+        """
+        aclient, http, loop = self._aclient, self._http, self._aloop
+        self._aclient = self._http = self._aloop = None
+        if aclient is None and http is None:
+            return
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._close_clients(aclient, http), loop)
+        else:
+            logger.info("Dropping async Qdrant clients of a closed event loop")
+
+    async def close(self):
+        """Close the async clients (on this loop, or handed to the loop that owns them)"""
+        if self._aloop is asyncio.get_running_loop():
+            aclient, http = self._aclient, self._http
+            self._aclient = self._http = self._aloop = None
+            await self._close_clients(aclient, http)
+        else:
+            self._release_clients()
+
     async def initialize(self):
         """Initialize the Qdrant service"""
         await self._connect()
         await self._setup_global_collection()
+        await self.ensure_payload_indexes(self.global_collection_name)
         
     async def _connect(self):
-        """Establish connection to Qdrant"""
-        connection_attempts = [
-            {"method": "configured_url", "client": lambda: QdrantClient(url=self.qdrant_url)},
-            {"method": "localhost", "client": lambda: QdrantClient(host="localhost", port=6333)},
-            {"method": "memory", "client": lambda: QdrantClient(location=":memory:")},
-        ]
-        
-        for attempt in connection_attempts:
-            try:
-                method = attempt["method"]
-                logger.info(f"Connecting to Qdrant via {method}...")
-                
-                self.client = attempt["client"]()
-                
-                # Test connection
-                await asyncio.get_event_loop().run_in_executor(
-                    self.executor,
-                    self.client.get_collections
-                )
-                
-                logger.info(f"✅ Connected to Qdrant via {method}")
-                return
-                
-            except Exception as e:
-                logger.warning(f"Qdrant connection via {method} failed: {e}")
-                continue
+        """Verify the connection from the event loop, re-running the connection attempts if it fails"""
+        try:
+            await self._acall("get_collections")
+            logger.info(f"✅ Connected to Qdrant via {self.connection_method}")
+            return
+        except Exception as e:
+            logger.warning(f"Qdrant connection via {self.connection_method} failed: {e}")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._connect_sync)
+        await self.close()
         
-        logger.error("All Qdrant connection attempts failed")
-        raise ConnectionError("Could not connect to Qdrant")
+    def _quantization_kwargs(self, collection_name: str) -> Tuple[Optional[bool], Any]:
+        """(on_disk for the original vectors, quantization_config) of a new collection"""
+        if self.quantization == "none" or not is_quantized_collection(collection_name):
+            return None, None
+        return vectors_on_disk(self.quantization), quantization_config_models(self.quantization)
+    
+    def _search_params_model(self) -> models.SearchParams:
+        """HNSW search params, plus oversampling/rescoring when quantization is configured"""
+        return models.SearchParams(
+            hnsw_ef=self.search_params["hnsw_ef"],
+            exact=self.search_params["exact"],
+            quantization=search_quantization_models(self.quantization)
+        )
+    
+    async def _collection_exists(self, collection_name: str) -> bool:
+        collections = (await self._acall("get_collections")).collections
+        return any(col.name == collection_name for col in collections)
     
     async def _setup_collection_by_name(self, collection_name: str, vector_size: int = None):
         """Setup a collection with a specific name"""
         # Use passed vector_size or fallback to self.vector_size
         effective_vector_size = vector_size if vector_size is not None else self.vector_size
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(self.executor, self._setup_collection_by_name_sync, collection_name, effective_vector_size)
-
-    def _setup_collection_by_name_sync(self, collection_name: str, vector_size: int):
-        """Synchronous setup of collection by name"""
         try:
-            collections = self.client.get_collections().collections
-            collection_exists = any(col.name == collection_name for col in collections)
-            
-            if not collection_exists:
+            if not await self._collection_exists(collection_name):
                 logger.info(f"Creating JIRA collection: {collection_name}")
-                logger.info(f"🔍 Using vector dimension: {vector_size}")
-                
-                self.client.create_collection(
+                logger.info(f"🔍 Using vector dimension: {effective_vector_size}")
+                on_disk, quantization_config = self._quantization_kwargs(collection_name)
+
+                await self._acall(
+                    "create_collection",
                     collection_name=collection_name,
                     vectors_config=VectorParams(
-                        size=vector_size,
+                        size=effective_vector_size,
                         distance=Distance.COSINE,
+                        on_disk=on_disk,
                         hnsw_config=models.HnswConfigDiff(
                             m=16,
                             ef_construct=100,
@@ -144,9 +250,10 @@ class JiraQdrantService:
                         default_segment_number=1,
                         max_segment_size=100000,
                         indexing_threshold=20000,
-                    )
+                    ),
+                    quantization_config=quantization_config
                 )
-                logger.info(f"✅ Collection '{collection_name}' created successfully with dimension {vector_size}")
+                logger.info(f"✅ Collection '{collection_name}' created successfully with dimension {effective_vector_size}")
             else:
                 logger.info(f"Collection '{collection_name}' already exists")
         except Exception as e:
@@ -157,24 +264,19 @@ class JiraQdrantService:
         """Setup the global collection for cross-ticket search"""
         # Use passed vector_size or fallback to self.vector_size
         effective_vector_size = vector_size if vector_size is not None else self.vector_size
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(self.executor, self._setup_global_collection_sync, effective_vector_size)
-    
-    def _setup_global_collection_sync(self, vector_size: int):
-        """Synchronous setup of global collection"""
         try:
-            collections = self.client.get_collections().collections
-            collection_exists = any(col.name == self.global_collection_name for col in collections)
-            
-            if not collection_exists:
+            if not await self._collection_exists(self.global_collection_name):
                 logger.info(f"Creating global JIRA collection: {self.global_collection_name}")
-                logger.info(f"🔍 Using vector dimension: {vector_size}")
-                
-                self.client.create_collection(
+                logger.info(f"🔍 Using vector dimension: {effective_vector_size}")
+                on_disk, quantization_config = self._quantization_kwargs(self.global_collection_name)
+    
+                await self._acall(
+                    "create_collection",
                     collection_name=self.global_collection_name,
                     vectors_config=VectorParams(
-                        size=vector_size,
+                        size=effective_vector_size,
                         distance=Distance.COSINE,
+                        on_disk=on_disk,
                         hnsw_config=models.HnswConfigDiff(
                             m=16,
                             ef_construct=100,
@@ -185,7 +287,8 @@ class JiraQdrantService:
                         default_segment_number=1,
                         max_segment_size=100000,
                         memmap_threshold=50000,
-                    )
+                    ),
+                    quantization_config=quantization_config
                 )
                 logger.info("✅ Global JIRA collection created successfully")
             else:
@@ -200,29 +303,16 @@ class JiraQdrantService:
         collection_name = self._get_ticket_collection_name(ticket_key)
         # Use passed vector_size or fallback to self.vector_size
         effective_vector_size = vector_size if vector_size is not None else self.vector_size
-        
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            self.executor,
-            self._setup_ticket_collection_sync,
-            collection_name,
-            effective_vector_size
-        )
-    
-    def _setup_ticket_collection_sync(self, collection_name: str, vector_size: int):
-        """Synchronous setup of ticket-specific collection"""
         try:
-            collections = self.client.get_collections().collections
-            collection_exists = any(col.name == collection_name for col in collections)
-            
-            if not collection_exists:
+            if not await self._collection_exists(collection_name):
                 logger.info(f"Creating ticket collection: {collection_name}")
-                logger.info(f"🔍 Using vector dimension: {vector_size}")
-                
-                self.client.create_collection(
+                logger.info(f"🔍 Using vector dimension: {effective_vector_size}")
+        
+                await self._acall(
+                    "create_collection",
                     collection_name=collection_name,
                     vectors_config=VectorParams(
-                        size=vector_size,
+                        size=effective_vector_size,
                         distance=Distance.COSINE,
                         hnsw_config=models.HnswConfigDiff(
                             m=8,  # Smaller M for individual tickets
@@ -267,32 +357,78 @@ class JiraQdrantService:
 
             # Post-check: verify dimension matches expectation
             try:
-                info = self.client.get_collection(collection_name)
+                info = await self._acall("get_collection", collection_name)
                 existing_dim = info.config.params.vectors.size
                 if existing_dim != target_dimension:
                     logger.warning(f"⚠️ Dimension mismatch for '{collection_name}': stored={existing_dim} expected={target_dimension}. Consider re-ingesting or cleaning.")
             except Exception as dim_e:
                 logger.debug(f"Dimension check skipped for {collection_name}: {dim_e}")
+            await self.ensure_payload_indexes(collection_name)
         except Exception as e:
             logger.error(f"Failed to ensure collection {collection_name} exists: {e}")
             raise
+
+    @staticmethod
+    def _index_schema(info) -> Dict[str, str]:
+        """{field: index type} from a collection info's payload_schema"""
+        schema = {}
+        for field, index_info in (getattr(info, "payload_schema", None) or {}).items():
+            data_type = getattr(index_info, "data_type", None)
+            schema[field] = getattr(data_type, "value", data_type)
+        return schema
+
+    async def ensure_payload_indexes(self, collection_name: str) -> Dict[str, List[str]]:
+        """Create missing (and retype mismatched) payload indexes declared for the collection"""
+        wanted = indexes_for(collection_name)
+        if not wanted:
+            return {"created": [], "replaced": []}
+        try:
+            info = await self._acall("get_collection", collection_name)
+            to_create, to_replace = plan_index_changes(self._index_schema(info), wanted)
+            for field in to_replace:
+                await self._acall("delete_payload_index", collection_name=collection_name, field_name=field, wait=True)
+            for field, field_type in {**to_create, **to_replace}.items():
+                await self._acall("create_payload_index", collection_name=collection_name, field_name=field,
+                                  field_schema=models.PayloadSchemaType(field_type), wait=True)
+            if to_create or to_replace:
+                logger.info(f"🗂️ Payload indexes for {collection_name}: created={sorted(to_create)} replaced={sorted(to_replace)}")
+            return {"created": sorted(to_create), "replaced": sorted(to_replace)}
+        except Exception as e:
+            # Searches still work unindexed, only slower
+            logger.warning(f"⚠️ Payload index reconcile failed for {collection_name}: {e}")
+            return {"created": [], "replaced": [], "error": str(e)}
+
+    def _ensure_payload_indexes_sync(self, collection_name: str):
+        """Synchronous counterpart of ensure_payload_indexes for the sync helpers"""
+        wanted = indexes_for(collection_name)
+        if not wanted:
+            return
+        try:
+            info = self.client.get_collection(collection_name)
+            to_create, to_replace = plan_index_changes(self._index_schema(info), wanted)
+            for field in to_replace:
+                self.client.delete_payload_index(collection_name=collection_name, field_name=field, wait=True)
+            for field, field_type in {**to_create, **to_replace}.items():
+                self.client.create_payload_index(collection_name=collection_name, field_name=field,
+                                                 field_schema=models.PayloadSchemaType(field_type), wait=True)
+            if to_create or to_replace:
+                logger.info(f"🗂️ Payload indexes for {collection_name}: created={sorted(to_create)} replaced={sorted(to_replace)}")
+        except Exception as e:
+            logger.warning(f"⚠️ Payload index reconcile failed for {collection_name}: {e}")
+    
+    def _upsert_in_flight(self) -> Optional[int]:
+        """The in-memory fallback client is upserted one batch at a time"""
+        return 1 if self.connection_method == "memory" else None
+    
+    def _point_sizes(self, dimension: int, payloads: List[Dict[str, Any]]) -> List[int]:
+        """Estimated request bytes per point (packed floats over gRPC, JSON text over REST)"""
+        return [estimate_point_bytes(dimension, payload, binary=self.prefer_grpc) for payload in payloads]
     
     async def upsert_embeddings(self, collection_name: str, points: List[Dict[str, Any]]):
-        """Upsert embeddings to specified collection"""
+        """Upsert embeddings to specified collection (pipelined byte-sized batches, see upsert_pipeline.py)"""
         
         # Collection should already be created by ensure_collection_exists_async
         # No additional collection creation logic needed here
-        
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            self.executor,
-            self._upsert_embeddings_sync,
-            collection_name,
-            points
-        )
-    
-    def _upsert_embeddings_sync(self, collection_name: str, points: List[Dict[str, Any]]):
-        """Synchronous upsert of embeddings"""
         try:
             # Convert points to PointStruct
             qdrant_points = []
@@ -303,50 +439,77 @@ class JiraQdrantService:
                     payload=point["payload"]
                 )
                 qdrant_points.append(qdrant_point)
+            if not qdrant_points:
+                return
             
-            # Upsert in smaller chunks to prevent timeouts
-            chunk_size = 100  # Smaller chunks for large datasets
-            total_points = len(qdrant_points)
-            
-            for i in range(0, total_points, chunk_size):
-                chunk = qdrant_points[i:i+chunk_size]
-                chunk_num = (i // chunk_size) + 1
-                total_chunks = (total_points + chunk_size - 1) // chunk_size
-                
-                try:
-                    self.client.upsert(
-                        collection_name=collection_name,
-                        points=chunk,
-                        wait=True  # Wait for completion to ensure consistency
-                    )
-                    logger.info(f"✅ Chunk {chunk_num}/{total_chunks}: Upserted {len(chunk)} points to {collection_name}")
-                    
-                except Exception as chunk_error:
-                    logger.error(f"❌ Chunk {chunk_num}/{total_chunks} failed: {chunk_error}")
-                    # Retry once with even smaller chunk
-                    if len(chunk) > 10:
-                        mini_chunk_size = 10
-                        for j in range(0, len(chunk), mini_chunk_size):
-                            mini_chunk = chunk[j:j+mini_chunk_size]
-                            try:
-                                self.client.upsert(
-                                    collection_name=collection_name,
-                                    points=mini_chunk,
-                                    wait=True
-                                )
-                                logger.info(f"🔄 Retry successful: {len(mini_chunk)} points")
-                            except Exception as mini_error:
-                                logger.error(f"💥 Mini-chunk failed: {mini_error}")
-                                raise
-                    else:
-                        raise chunk_error
+            async def send(start: int, end: int, wait: bool):
+                await self._acall(
+                    "upsert",
+                    collection_name=collection_name,
+                    points=qdrant_points[start:end],
+                    wait=wait  # only the last batch waits; Qdrant applies the queue in order
+                )
             
-            logger.info(f"Successfully upserted {total_points} points to {collection_name}")
+            sizes = self._point_sizes(len(points[0]["vector"]), [p["payload"] for p in points])
+            stats = await self.upsert_pipeline.run(send, sizes, in_flight=self._upsert_in_flight())
+            logger.info(f"Successfully upserted {stats['points']} points to {collection_name} "
+                        f"({stats['batches']} batches, {stats['retries']} retries, {stats['points_per_sec']:.0f} points/s)")
             
         except Exception as e:
             logger.error(f"Error upserting to {collection_name}: {e}")
             raise
     
+    def _rest_base_url(self) -> Optional[str]:
+        if self.connection_method == "configured_url":
+            return self.qdrant_url.rstrip("/")
+        if self.connection_method == "localhost":
+            return "http://localhost:6333"
+        return None  # in-memory client has no REST endpoint
+    
+    async def _put_points_batch(self, collection_name: str, ids: List[Any], vectors: np.ndarray,
+                                payloads: List[Dict[str, Any]], wait: bool = True):
+        """One batch upsert; vectors go out as raw float32 via orjson when talking REST"""
+        base_url = self._rest_base_url()
+        if orjson is not None and base_url and not self.prefer_grpc:
+            self._async_client()  # binds the clients to the running loop
+            if self._http is None:
+                self._http = httpx.AsyncClient(timeout=float(self.timeout))
+            body = orjson.dumps(
+                {"batch": {"ids": ids, "vectors": vectors, "payloads": payloads}},
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            )
+            resp = await self._http.put(
+                f"{base_url}/collections/{collection_name}/points",
+                params={"wait": "true" if wait else "false"},
+                content=body,
+                headers={"Content-Type": "application/json"},
+            )
+            resp.raise_for_status()
+        else:
+            await self._acall(
+                "upsert",
+                collection_name=collection_name,
+                points=models.Batch(ids=ids, vectors=vectors.tolist(), payloads=payloads),
+                wait=wait
+            )
+    
+    async def upsert_matrix(self, collection_name: str, ids: List[Any], vectors: np.ndarray,
+                            payloads: List[Dict[str, Any]], chunk_size: int = None):
+        """Upsert points whose vectors are rows of a float32 matrix (pipelined batches; chunk_size caps points per batch)"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(ids) != vectors.shape[0] or len(payloads) != len(ids):
+            raise ValueError(f"upsert_matrix: {len(ids)} ids, {vectors.shape[0]} vectors, {len(payloads)} payloads")
+        if not ids:
+            return
+        
+        async def send(start: int, end: int, wait: bool):
+            await self._put_points_batch(collection_name, ids[start:end], vectors[start:end], payloads[start:end], wait=wait)
+        
+        stats = await self.upsert_pipeline.run(send, self._point_sizes(vectors.shape[1], payloads),
+                                               max_points=chunk_size, in_flight=self._upsert_in_flight())
+        logger.info(f"Successfully upserted {stats['points']} points (float32 matrix) to {collection_name} "
+                    f"({stats['batches']} batches, {stats['retries']} retries, {stats['points_per_sec']:.0f} points/s)")
+    
     async def add_documents_batch_async(self, documents: List[Dict[str, Any]]) -> List[str]:
         """Add batch of documents to Qdrant and return IDs"""
         try:
@@ -395,30 +558,10 @@ class JiraQdrantService:
                 return []
             
             # Search in Qdrant
-            loop = asyncio.get_event_loop()
-            results = await loop.run_in_executor(
-                self.executor,
-                self._search_similar_sync,
-                collection_name,
-                query_embedding[0],  # query_embedding is a list of floats already
-                limit,
-                score_threshold
-            )
-            
-            return results
-            
-        except Exception as e:
-            logger.error(f"Error in semantic search: {e}")
-            return []
-
-    def _search_similar_sync(self, collection_name: str, query_vector: List[float], limit: int, score_threshold: float) -> List[Dict[str, Any]]:
-        """Synchronous semantic search"""
-        try:
-            from qdrant_client.models import SearchRequest
-            
-            search_results = self.client.search(
+            search_results = await self._acall(
+                "search",
                 collection_name=collection_name,
-                query_vector=query_vector,
+                query_vector=query_embedding[0],  # query_embedding is a list of floats already
                 limit=limit,
                 score_threshold=score_threshold,
                 with_payload=True
@@ -446,7 +589,7 @@ class JiraQdrantService:
             return results
             
         except Exception as e:
-            logger.error(f"Error in synchronous search: {e}")
+            logger.error(f"Error in semantic search: {e}")
             return []
 
     async def list_collections(self) -> List[Dict[str, Any]]:
@@ -461,10 +604,7 @@ class JiraQdrantService:
         
         collection_name = self._get_ticket_collection_name(ticket_key)
         
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self.executor,
-            self._search_sync,
+        return await self._search(
             collection_name,
             query_vector,
             limit,
@@ -473,56 +613,88 @@ class JiraQdrantService:
         )
     
     async def search_all_tickets(self,
-                                query_vector: List[float],
+                                query_vector: Union[List[float], np.ndarray],
                                 limit: int = 10,
                                 score_threshold: float = None,
-                                filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """Search across all tickets"""
+                                filters: Dict[str, Any] = None,
+                                with_payload: Union[bool, List[str]] = True) -> List[Dict[str, Any]]:
+        """Search across all tickets (with_payload: True or the payload fields to return)"""
         
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self.executor,
-            self._search_sync,
+        return await self._search(
             self.global_collection_name,
             query_vector,
             limit,
             score_threshold or self.score_threshold,
-            filters
+            filters,
+            with_payload
         )
     
-    def _search_sync(self,
-                    collection_name: str,
-                    query_vector: List[float],
-                    limit: int,
-                    score_threshold: float,
-                    filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """Synchronous search implementation"""
+    async def search_collections(self,
+                                 query_vector: Union[List[float], np.ndarray],
+                                 collection_names: Sequence[str],
+                                 limit: int = 10,
+                                 score_threshold: float = None,
+                                 filters: Dict[str, Any] = None,
+                                 with_payload: Union[bool, List[str]] = True) -> Dict[str, List[Dict[str, Any]]]:
+        """One query vector against several collections concurrently; {collection: hits}
+        
+        Latency is that of the slowest collection rather than the sum. A failing collection
+        yields an empty list (see _search).
+        """
+        if isinstance(query_vector, np.ndarray):
+            query_vector = query_vector.astype(np.float32).tolist()
+        threshold = score_threshold or self.score_threshold
+        hits = await asyncio.gather(*(
+            self._search(name, query_vector, limit, threshold, filters, with_payload) for name in collection_names
+        ))
+        return dict(zip(collection_names, hits))
+    
+    @staticmethod
+    def merge_collection_results(results: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Merge per-collection hits into one list ranked by raw cosine score
+        
+        Every collection is embedded with the same model, so raw cosine scores are
+        comparable across collections and keep their absolute relevance. Each hit gets
+        `collection` and a fixed-scale `normalized_score` ((cosine + 1) / 2, in [0, 1]);
+        the raw `score` is kept.
+        """
+        merged = []
+        for collection_name, hits in results.items():
+            for h in hits:
+                score = h.get("score", 0.0)
+                norm = min(1.0, max(0.0, (score + 1.0) / 2.0))
+                merged.append({**h, "collection": collection_name, "normalized_score": norm})
+        merged.sort(key=lambda h: h.get("score", 0.0), reverse=True)
+        return merged
+    
+    @staticmethod
+    def _build_filter(filters: Optional[Dict[str, Any]]) -> Optional[Filter]:
+        """Exact-match conditions (AND) from a {payload_key: value} dict"""
+        if not filters:
+            return None
+        conditions = [FieldCondition(key=key, match=MatchValue(value=value)) for key, value in filters.items()]
+        return Filter(must=conditions) if conditions else None
+
+    async def _search(self,
+                      collection_name: str,
+                      query_vector: Union[List[float], np.ndarray],
+                      limit: int,
+                      score_threshold: float,
+                      filters: Dict[str, Any] = None,
+                      with_payload: Union[bool, List[str]] = True) -> List[Dict[str, Any]]:
+        """Vector search on the event loop"""
         try:
-            # Build filter if provided
-            search_filter = None
-            if filters:
-                conditions = []
-                for key, value in filters.items():
-                    conditions.append(
-                        FieldCondition(
-                            key=key,
-                            match=MatchValue(value=value)
-                        )
-                    )
-                if conditions:
-                    search_filter = Filter(must=conditions)
-            
-            # Perform search
-            search_results = self.client.search(
+            if isinstance(query_vector, np.ndarray):
+                query_vector = query_vector.astype(np.float32).tolist()
+            search_results = await self._acall(
+                "search",
                 collection_name=collection_name,
                 query_vector=query_vector,
-                query_filter=search_filter,
+                query_filter=self._build_filter(filters),
                 limit=limit,
                 score_threshold=score_threshold,
-                search_params=models.SearchParams(
-                    hnsw_ef=self.search_params["hnsw_ef"],
-                    exact=self.search_params["exact"]
-                )
+                with_payload=with_payload,
+                search_params=self._search_params_model()
             )
             
             # Format results
@@ -542,22 +714,52 @@ class JiraQdrantService:
             logger.error(f"Search error in {collection_name}: {e}")
             return []
     
+    async def scroll_points(self,
+                            collection_name: str,
+                            filters: Dict[str, Any] = None,
+                            limit: int = 100,
+                            offset: Any = None,
+                            with_payload: Union[bool, List[str]] = True) -> Tuple[List[Dict[str, Any]], Any]:
+        """One page of points matching the filters; returns (points, next_page_offset)"""
+        try:
+            points, next_offset = await self._acall(
+                "scroll",
+                collection_name=collection_name,
+                scroll_filter=self._build_filter(filters),
+                limit=limit,
+                offset=offset,
+                with_payload=with_payload,
+                with_vectors=False
+            )
+            return [{"id": p.id, "payload": p.payload} for p in points], next_offset
+        except Exception as e:
+            logger.error(f"Scroll error in {collection_name}: {e}")
+            return [], None
+
+    async def retrieve_payloads(self, collection_name: str, ids: List[Any], fields: List[str]) -> Dict[Any, Dict[str, Any]]:
+        """{point id: payload restricted to fields} (lazy fetch of large fields left out of a search)"""
+        ids = [i for i in dict.fromkeys(ids) if i is not None]
+        if not ids:
+            return {}
+        try:
+            points = await self._acall(
+                "retrieve",
+                collection_name=collection_name,
+                ids=ids,
+                with_payload=list(fields),
+                with_vectors=False
+            )
+            return {p.id: p.payload or {} for p in points}
+        except Exception as e:
+            logger.error(f"Payload retrieve error in {collection_name}: {e}")
+            return {}
+
     async def get_ticket_stats(self, ticket_key: str) -> Dict[str, Any]:
         """Get statistics for a specific ticket"""
         
         collection_name = self._get_ticket_collection_name(ticket_key)
-        
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self.executor,
-            self._get_collection_stats_sync,
-            collection_name
-        )
-    
-    def _get_collection_stats_sync(self, collection_name: str) -> Dict[str, Any]:
-        """Get collection statistics"""
         try:
-            collection_info = self.client.get_collection(collection_name)
+            collection_info = await self._acall("get_collection", collection_name)
             
             return {
                 "collection_name": collection_name,
@@ -574,17 +776,8 @@ class JiraQdrantService:
     
     async def list_ticket_collections(self) -> List[str]:
         """List all ticket-specific collections"""
-        
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self.executor,
-            self._list_ticket_collections_sync
-        )
-    
-    def _list_ticket_collections_sync(self) -> List[str]:
-        """Synchronous listing of ticket collections"""
         try:
-            collections = self.client.get_collections().collections
+            collections = (await self._acall("get_collections")).collections
             ticket_collections = [
                 col.name for col in collections 
                 if col.name.startswith(self.base_collection_name) and 
@@ -601,18 +794,8 @@ class JiraQdrantService:
         """Delete a specific ticket collection"""
         
         collection_name = self._get_ticket_collection_name(ticket_key)
-        
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            self.executor,
-            self._delete_collection_sync,
-            collection_name
-        )
-    
-    def _delete_collection_sync(self, collection_name: str):
-        """Synchronous collection deletion"""
         try:
-            self.client.delete_collection(collection_name)
+            await self._acall("delete_collection", collection_name)
             logger.info(f"Deleted collection: {collection_name}")
         except Exception as e:
             logger.error(f"Error deleting collection {collection_name}: {e}")
@@ -626,29 +809,33 @@ class JiraQdrantService:
             
             if not collection_exists:
                 logger.info(f"Creating collection: {collection_name}")
+                on_disk, quantization_config = self._quantization_kwargs(collection_name)
                 
                 self.client.create_collection(
                     collection_name=collection_name,
                     vectors_config=VectorParams(
                         size=vector_dimension,
                         distance=Distance.COSINE,
+                        on_disk=on_disk,
                         hnsw_config=models.HnswConfigDiff(
                             m=16,
                             ef_construct=100,
                             full_scan_threshold=5000,
                         )
-                    )
+                    ),
+                    quantization_config=quantization_config
                 )
                 logger.info(f"✅ Collection {collection_name} created successfully")
             else:
                 logger.info(f"Collection {collection_name} already exists")
+            self._ensure_payload_indexes_sync(collection_name)
                 
         except Exception as e:
             logger.error(f"Failed to create collection {collection_name}: {e}")
             raise
     
     def store_vectors(self, collection_name: str, points: List[Dict[str, Any]]):
-        """Store vectors in the specified collection"""
+        """Store vectors in the specified collection (pipelined byte-sized batches, see upsert_pipeline.py)"""
         try:
             # Convert points to PointStruct
             qdrant_points = []
@@ -659,20 +846,26 @@ class JiraQdrantService:
                     payload=point["payload"]
                 )
                 qdrant_points.append(qdrant_point)
+            if not qdrant_points:
+                return
             
-            # Upsert points
-            self.client.upsert(
-                collection_name=collection_name,
-                points=qdrant_points
-            )
+            def send(start: int, end: int, wait: bool):
+                self.client.upsert(
+                    collection_name=collection_name,
+                    points=qdrant_points[start:end],
+                    wait=wait
+                )
             
-            logger.info(f"Successfully stored {len(qdrant_points)} vectors in {collection_name}")
+            sizes = self._point_sizes(len(points[0]["vector"]), [p["payload"] for p in points])
+            stats = self.upsert_pipeline.run_sync(send, sizes, in_flight=self._upsert_in_flight())
+            logger.info(f"Successfully stored {stats['points']} vectors in {collection_name} "
+                        f"({stats['batches']} batches, {stats['points_per_sec']:.0f} points/s)")
             
         except Exception as e:
             logger.error(f"Error storing vectors in {collection_name}: {e}")
             raise
     
-    def search_similar(self, collection_name: str, query_vector: List[float], limit: int = 5) -> List[Dict[str, Any]]:
+    def search_similar(self, collection_name: str, query_vector: Union[List[float], np.ndarray], limit: int = 5) -> List[Dict[str, Any]]:
         """Search for similar vectors in the collection"""
         try:
             # Perform search
@@ -681,10 +874,7 @@ class JiraQdrantService:
                 query_vector=query_vector,
                 limit=limit,
                 score_threshold=self.score_threshold,
-                search_params=models.SearchParams(
-                    hnsw_ef=self.search_params["hnsw_ef"],
-                    exact=self.search_params["exact"]
-                )
+                search_params=self._search_params_model()
             )
             
             # Format results
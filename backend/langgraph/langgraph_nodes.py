@@ -14,6 +14,7 @@ Implements the individual nodes for the LangGraph workflow:
 
 import logging
 import asyncio
+import time
 from typing import List, Dict, Any
 from pathlib import Path
 from datetime import datetime
@@ -27,12 +28,10 @@ from .langgraph_state_schema import (
     DocumentType
 )
 
-# Import our existing services
-from .pdf_processor import PDFProcessor
+# Import our existing services (model-backed ones are imported in initialize_services
+# so importing this module does not pull in torch, transformers or PyMuPDF)
 from .jira_document_processor import JIRATicketProcessor  
-from .embedding_bge_service import create_bge_embedding_service
-from .jira_qdrant_service import JiraQdrantService
-from .pdf_cross_encoder_reranker import create_cross_encoder_reranker
+from .token_chunker import savings_report
 
 logger = logging.getLogger(__name__)
 
@@ -42,40 +41,63 @@ class DocumentProcessingNodes:
     def __init__(self):
         """Initialize services for the nodes"""
         self.embedding_service = None
+        self.embedding_pool = None
         self.qdrant_service = None
         self.pdf_processor = None
         self.jira_processor = None
+        self.chunker = None
         self.reranker = None
         
     async def initialize_services(self) -> Dict[str, Any]:
         """Initialize all services and return them"""
         logger.info("🔧 Initializing services for LangGraph workflow...")
-        
-        # Initialize services
-        self.embedding_service = create_bge_embedding_service()
+        from .pdf_processor import PDFProcessor
+        from .embedding_bge_service import create_bge_embedding_service
+        from .embedding_worker_pool import create_embedding_worker_pool
+        from .jira_qdrant_service import JiraQdrantService
+        from .pdf_cross_encoder_reranker import create_cross_encoder_reranker
+        from .model_preload import get_preloaded
+        from .token_chunker import create_token_chunker
+        from .embedding_service_factory import apply_embedding_tuning
+        
+        # Benchmarked batch size / threads / bucketing (env vars still take precedence)
+        apply_embedding_tuning()
+        # Initialize services (reuse models preloaded in the gunicorn master when present)
+        self.embedding_service = get_preloaded('embedding') or create_bge_embedding_service()
+        # Optional multi-process pool for bulk ingestion (EMBEDDING_WORKERS >= 2)
+        self.embedding_pool = create_embedding_worker_pool()
         self.qdrant_service = JiraQdrantService()
+        # Thin adapter over the shared cross-encoder engine (model already loaded when preloaded)
         self.reranker = create_cross_encoder_reranker()
         
-        # Initialize reranker
+        # Initialize reranker (no-op when preloaded)
         await self.reranker.initialize()
         
+        # One token chunker (embedding tokenizer + count cache) shared by both processors
+        self.chunker = create_token_chunker(self.embedding_service)
+        
         # Create processors with services
         self.pdf_processor = PDFProcessor(
             embedding_service=self.embedding_service,
-            qdrant_service=self.qdrant_service
+            qdrant_service=self.qdrant_service,
+            chunker=self.chunker
         )
         
         self.jira_processor = JIRATicketProcessor(
             embedding_service=self.embedding_service,
-            qdrant_service=self.qdrant_service
+            qdrant_service=self.qdrant_service,
+            embedding_pool=self.embedding_pool,
+            chunker=self.chunker
         )
         
         services = {
             "embedding_service": self.embedding_service,
+            "embedding_pool": self.embedding_pool,
             "qdrant_service": self.qdrant_service,
             "pdf_processor": self.pdf_processor,
             "jira_processor": self.jira_processor,
-            "reranker": self.reranker
+            "reranker": self.reranker,
+            "chunker": self.chunker
         }
         
         logger.info("✅ All services initialized for LangGraph")
@@ -121,6 +143,10 @@ class DocumentProcessingNodes:
                     processing_batch.append(doc_info)
         
         state["processing_batch"] = processing_batch
+        # Chunk-size report covers this run only
+        chunker = state["services"].get("chunker")
+        if chunker is not None:
+            chunker.reset_stats()
         
         logger.info(f"📍 Routed {len(processing_batch)} documents:")
         pdf_count = len([d for d in processing_batch if d.document_type == "pdf"])
@@ -258,30 +284,69 @@ class DocumentProcessingNodes:
         batch_size = state["config"].get("embedding_batch_size", 64)
         all_embeddings = []
         
-        for i in range(0, len(texts), batch_size):
-            batch_end = min(i + batch_size, len(texts))
-            batch_texts = texts[i:batch_end]
+        embedding_pool = state["services"].get("embedding_pool")
+        if embedding_pool is not None:
+            # Bulk mode: one call; the pool shards the stream across worker processes and keeps order
+            embedding_service = embedding_pool
+            batch_size = max(1, len(texts))
+        
+        encode_start = time.perf_counter()
+        if state["config"].get("vector_format") == "ndarray" and hasattr(embedding_service, "encode_matrix_async"):
+            # Array mode: one contiguous float32 matrix; EmbeddingInfo rows are views into it
+            matrix = await embedding_service.encode_matrix_async(texts)
+            state["embedding_matrix"] = matrix
+            for chunk, row in zip(chunks, matrix):
+                all_embeddings.append(EmbeddingInfo(
+                    chunk_id=chunk.chunk_id,
+                    embedding=row,
+                    model_name=embedding_service.model_name,
+                    dimension=matrix.shape[1]
+                ))
+            logger.info(f"Generated {matrix.shape[0]}x{matrix.shape[1]} float32 embedding matrix ({matrix.nbytes / 1024**2:.1f} MB)")
+        else:
+            for i in range(0, len(texts), batch_size):
+                batch_end = min(i + batch_size, len(texts))
+                batch_texts = texts[i:batch_end]
             
-            # Generate embeddings for batch
-            batch_embeddings = await embedding_service.get_embeddings_batch_async(batch_texts)
+                # Generate embeddings for batch
+                batch_embeddings = await embedding_service.get_embeddings_batch_async(batch_texts)
             
-            # Create EmbeddingInfo objects
-            for j, embedding in enumerate(batch_embeddings):
-                chunk_idx = i + j
-                chunk = chunks[chunk_idx]
+                # Create EmbeddingInfo objects
+                for j, embedding in enumerate(batch_embeddings):
+                    chunk_idx = i + j
+                    chunk = chunks[chunk_idx]
                 
-                embedding_info = EmbeddingInfo(
-                    chunk_id=chunk.chunk_id,
-                    embedding=embedding,
-                    model_name=embedding_service.model_name,
-                    dimension=len(embedding)
-                )
-                all_embeddings.append(embedding_info)
+                    embedding_info = EmbeddingInfo(
+                        chunk_id=chunk.chunk_id,
+                        embedding=embedding,
+                        model_name=embedding_service.model_name,
+                        dimension=len(embedding)
+                    )
+                    all_embeddings.append(embedding_info)
             
-            logger.info(f"Generated embeddings for batch {i//batch_size + 1}/{(len(texts)-1)//batch_size + 1}")
-            await asyncio.sleep(0.01)  # Yield control
+                logger.info(f"Generated embeddings for batch {i//batch_size + 1}/{(len(texts)-1)//batch_size + 1}")
+                await asyncio.sleep(0.01)  # Yield control
         
         state["generated_embeddings"] = all_embeddings
+        encode_seconds = time.perf_counter() - encode_start
+        
+        chunker = state["services"].get("chunker")
+        if chunker is not None:
+            chunking = chunker.stats()
+            chunking["savings"] = savings_report(chunking, encode_seconds)
+            state["stats"]["chunking"] = chunking
+            dist = chunking["tokens_per_chunk"]
+            if dist.get("chunks"):
+                logger.info(f"📏 Tokens/chunk: p50={dist['p50']} p95={dist['p95']} max={dist['max']} "
+                            f"(budget {chunking['max_tokens']}, {dist['over_limit']} over)")
+            if "vectors_saved" in chunking["savings"]:
+                logger.info(f"📏 Token chunking saved {chunking['savings']['vectors_saved']} vectors, "
+                            f"~{chunking['savings']['encode_seconds_saved_est']}s encode vs legacy sizing")
+        
+        cache_stats = embedding_service.cache_stats() if hasattr(embedding_service, 'cache_stats') else None
+        if cache_stats:
+            state["stats"]["embedding_cache"] = cache_stats
+            logger.info(f"🗃️ Embedding cache: hits={cache_stats['hits']} misses={cache_stats['misses']} hit_rate={cache_stats['hit_rate']:.1%}")
         
         logger.info(f"🧠 Embedding Generation Complete: {len(all_embeddings)} embeddings")
         return state
@@ -360,8 +425,10 @@ class DocumentProcessingNodes:
         # Group by document type for different collections
         pdf_docs = []
         jira_docs = []
+        pdf_rows = []
+        jira_rows = []
         
-        for chunk, embedding in zip(chunks, embeddings):
+        for row, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
             doc_data = {
                 "id": chunk.chunk_id,
                 "vector": embedding.embedding,
@@ -377,9 +444,11 @@ class DocumentProcessingNodes:
             if chunk.page_number is not None:  # PDF document
                 doc_data["payload"]["collection_name"] = state["collection_name_pdf"]
                 pdf_docs.append(doc_data)
+                pdf_rows.append(row)
             else:  # JIRA document
                 doc_data["payload"]["collection_name"] = state["collection_name_jira"]
                 jira_docs.append(doc_data)
+                jira_rows.append(row)
         
         # Get vector dimension from first embedding or embedding service
         if embeddings:
@@ -397,13 +466,25 @@ class DocumentProcessingNodes:
             vector_size = embedding_service.get_dimension()
             logger.info(f"🔍 Using embedding service dimension: {vector_size}")
         
+        # Array mode: hand float32 matrix slices to Qdrant instead of per-point float lists
+        matrix = state.get("embedding_matrix")
+        if matrix is not None and not hasattr(qdrant_service, "upsert_matrix"):
+            matrix = None
+        
         # Store PDF documents
         if pdf_docs:
             await qdrant_service.ensure_collection_exists_async(
                 collection_name=state["collection_name_pdf"],
                 vector_size=vector_size
             )
-            pdf_ids = await qdrant_service.add_documents_batch_async(pdf_docs)
+            if matrix is not None:
+                await qdrant_service.upsert_matrix(
+                    state["collection_name_pdf"],
+                    [d["id"] for d in pdf_docs], matrix[pdf_rows], [d["payload"] for d in pdf_docs]
+                )
+                pdf_ids = None
+            else:
+                pdf_ids = await qdrant_service.add_documents_batch_async(pdf_docs)
             pdf_count = len(pdf_ids) if pdf_ids else len(pdf_docs)
             logger.info(f"Stored {pdf_count} PDF vectors in {state['collection_name_pdf']}")
         
@@ -413,7 +494,14 @@ class DocumentProcessingNodes:
                 collection_name=state["collection_name_jira"],
                 vector_size=vector_size
             )
-            jira_ids = await qdrant_service.add_documents_batch_async(jira_docs)
+            if matrix is not None:
+                await qdrant_service.upsert_matrix(
+                    state["collection_name_jira"],
+                    [d["id"] for d in jira_docs], matrix[jira_rows], [d["payload"] for d in jira_docs]
+                )
+                jira_ids = None
+            else:
+                jira_ids = await qdrant_service.add_documents_batch_async(jira_docs)
             jira_count = len(jira_ids) if jira_ids else len(jira_docs)
             logger.info(f"Stored {jira_count} JIRA vectors in {state['collection_name_jira']}")
         
@@ -422,6 +510,11 @@ class DocumentProcessingNodes:
         state["stats"]["pdf_vectors"] = len(pdf_docs)
         state["stats"]["jira_vectors"] = len(jira_docs)
         
+        # New or replaced chunk text: drop cached rerank scores in every worker
+        if pdf_docs or jira_docs:
+            from .rerank_cache import bump_ingestion_version
+            bump_ingestion_version(reason=f"stored {len(pdf_docs)} pdf / {len(jira_docs)} jira vectors")
+        
         logger.info(f"🗄️ Vector Storage Complete: {len(embeddings)} vectors stored")
         return state
 
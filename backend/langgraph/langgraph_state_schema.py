@@ -6,10 +6,12 @@ Defines the state structure for the LangGraph workflow that processes
 both PDF documents and JIRA tickets with different logic.
 """
 
-from typing import TypedDict, List, Dict, Any, Optional, Literal
+from typing import TypedDict, List, Dict, Any, Optional, Literal, Union
 from dataclasses import dataclass
 from datetime import datetime
 
+import numpy as np
+
 # Document types
 DocumentType = Literal["pdf", "jira"]
 ProcessingStage = Literal["routing", "extraction", "chunking", "embedding", "reranking", "storage", "completed", "error"]
@@ -39,7 +41,7 @@ class ChunkInfo:
 class EmbeddingInfo:
     """Information about generated embeddings"""
     chunk_id: str
-    embedding: List[float]
+    embedding: Union[List[float], np.ndarray]  # float32 row view of embedding_matrix in array mode
     model_name: str
     dimension: int
 
@@ -72,6 +74,7 @@ class DocumentProcessingState(TypedDict):
     extracted_tickets: List[Dict[str, Any]]  # For JIRA
     generated_chunks: List[ChunkInfo]
     generated_embeddings: List[EmbeddingInfo]
+    embedding_matrix: Optional[np.ndarray]  # (n_chunks, dim) float32, set when config["vector_format"] == "ndarray"
     
     # Search and retrieval
     search_query: Optional[str]
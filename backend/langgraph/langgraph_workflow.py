@@ -14,14 +14,16 @@ The workflow:
 6. Support search with cross-encoder reranking
 """
 
+import os
 import logging
 import asyncio
+import time
 from typing import Dict, Any, List
 from datetime import datetime
 
 from langgraph.graph import StateGraph, START, END
 
-from .langgraph_state_schema import DocumentProcessingState
+from .langgraph_state_schema import DocumentProcessingState, SearchResult
 from .langgraph_nodes import DocumentProcessingNodes
 
 logger = logging.getLogger(__name__)
@@ -69,6 +71,11 @@ class DualDocumentProcessingWorkflow:
         
         logger.info("✅ LangGraph workflow initialized and ready!")
     
+    async def close(self):
+        """Release the async Qdrant clients of the workflow services"""
+        if self.nodes.qdrant_service is not None:
+            await self.nodes.qdrant_service.close()
+    
     async def _build_graph(self, services: Dict[str, Any]):
         """Build the LangGraph StateGraph"""
         logger.info("🏗️ Building LangGraph StateGraph...")
@@ -170,6 +177,7 @@ class DualDocumentProcessingWorkflow:
             "extracted_tickets": [],
             "generated_chunks": [],
             "generated_embeddings": [],
+            "embedding_matrix": None,
             
             # Search
             "search_query": kwargs.get("search_query"),
@@ -194,6 +202,8 @@ class DualDocumentProcessingWorkflow:
             # Configuration
             "config": {
                 "embedding_batch_size": 64,
+                # "ndarray" keeps vectors as one float32 matrix from encoder to Qdrant upsert
+                "vector_format": os.getenv("EMBEDDING_VECTOR_FORMAT", "list"),
                 "rerank_top_k": 10,
                 "enable_reranking": True,
                 **kwargs.get("config", {})
@@ -222,10 +232,12 @@ class DualDocumentProcessingWorkflow:
         initial_state = self._create_initial_state(**kwargs)
         initial_state["services"] = {
             "embedding_service": self.nodes.embedding_service,
+            "embedding_pool": self.nodes.embedding_pool,
             "qdrant_service": self.nodes.qdrant_service,
             "pdf_processor": self.nodes.pdf_processor,
             "jira_processor": self.nodes.jira_processor,
-            "reranker": self.nodes.reranker
+            "reranker": self.nodes.reranker,
+            "chunker": self.nodes.chunker
         }
         
         # Execute the workflow
@@ -388,7 +400,11 @@ class DualDocumentProcessingWorkflow:
         # Create search state
         search_state = self._create_initial_state(
             search_query=query,
-            config={"rerank_top_k": limit}
+            config={
+                "rerank_top_k": limit,
+                "search_collections": [c for c in (self.collection_name_pdf, self.collection_name_jira)
+                                       if collection in (None, "both", c)]
+            }
         )
         search_state["services"] = {
             "embedding_service": self.nodes.embedding_service,
@@ -403,58 +419,42 @@ class DualDocumentProcessingWorkflow:
         return final_state
     
     async def _search_node(self, state: DocumentProcessingState) -> DocumentProcessingState:
-        """Search node for finding similar documents"""
+        """Search node: embed the query once, search the collections concurrently, merge hits by score"""
         logger.info("🔍 LangGraph Node: Document Search")
         
         query = state["search_query"]
         qdrant_service = state["services"]["qdrant_service"]
         embedding_service = state["services"]["embedding_service"]
-        
-        # Generate query embedding
-        query_vector = embedding_service.get_embedding(query)
+        collections = state["config"].get("search_collections") or [self.collection_name_pdf, self.collection_name_jira]
+        
+        # Generate query embedding (once, shared by every collection search)
+        start = time.perf_counter()
+        query_vector = await embedding_service.get_embedding_async(query)
+        embed_ms = (time.perf_counter() - start) * 1000
+        
+        # Search all collections concurrently with the same vector
+        start = time.perf_counter()
+        by_collection = await qdrant_service.search_collections(
+            query_vector,
+            collections,
+            limit=15  # Get more for reranking
+        )
+        search_ms = (time.perf_counter() - start) * 1000
         
         search_results = []
-        
-        # Search PDF collection
-        try:
-            pdf_results = await qdrant_service.search_similar_async(
-                collection_name=self.collection_name_pdf,
-                query_vector=query_vector,
-                limit=15  # Get more for reranking
-            )
-            
-            for result in pdf_results:
-                search_result = SearchResult(
-                    chunk_id=result.get("id", ""),
-                    similarity_score=result.get("score", 0.0),
-                    chunk_text=result.get("payload", {}).get("text", ""),
-                    metadata=result.get("payload", {})
-                )
-                search_results.append(search_result)
-                
-        except Exception as e:
-            logger.warning(f"PDF search failed: {e}")
-        
-        # Search JIRA collection
-        try:
-            jira_results = await qdrant_service.search_similar_async(
-                collection_name=self.collection_name_jira,
-                query_vector=query_vector,
-                limit=15  # Get more for reranking
-            )
-            
-            for result in jira_results:
-                search_result = SearchResult(
-                    chunk_id=result.get("id", ""),
-                    similarity_score=result.get("score", 0.0),
-                    chunk_text=result.get("payload", {}).get("text", ""),
-                    metadata=result.get("payload", {})
-                )
-                search_results.append(search_result)
-                
-        except Exception as e:
-            logger.warning(f"JIRA search failed: {e}")
-        
+        for hit in qdrant_service.merge_collection_results(by_collection):
+            payload = hit.get("payload") or {}
+            search_results.append(SearchResult(
+                chunk_id=str(hit.get("id", "")),
+                similarity_score=hit.get("score", 0.0),
+                chunk_text=payload.get("text") or payload.get("chunk_text", ""),
+                metadata={**payload, "collection": hit["collection"], "normalized_score": hit["normalized_score"]}
+            ))
+        
+        state["stats"]["search_timings_ms"] = {"embed": round(embed_ms, 2), "search": round(search_ms, 2)}
+        logger.info(f"Found {len(search_results)} results "
+                    f"({', '.join(f'{c}={len(h)}' for c, h in by_collection.items())}) "
+                    f"embed={embed_ms:.1f}ms search={search_ms:.1f}ms")
         state["search_results"] = search_results
         return state
     
@@ -0,0 +1,88 @@
+"""
+Length Bucketing
+================
+
+Helpers for batching variable-length inputs by tokenized length.
+
+Batches built in input order pad every member to the longest one; sorting by
+length first and batching neighbours keeps each batch close to uniform, and the
+caller scatters results back to the original positions.
+
+Environment Variables:
+  LENGTH_BUCKETING_ENABLED: Set to false/0 to batch in input order (default true)
+  EMBEDDING_LENGTH_BUCKETING: Embedding-only override of LENGTH_BUCKETING_ENABLED
+                              (set by the embedding tuning file; rerankers ignore it)
+"""
+from __future__ import annotations
+import os
+from typing import List, Optional, Sequence
+
+
+def length_bucketing_enabled() -> bool:
+    return os.getenv("LENGTH_BUCKETING_ENABLED", "true").lower() in {"1", "true", "yes", "on"}
+
+
+def embedding_length_bucketing_enabled() -> bool:
+    value = os.getenv("EMBEDDING_LENGTH_BUCKETING")
+    if value is None:
+        return length_bucketing_enabled()
+    return value.lower() in {"1", "true", "yes", "on"}
+
+
+def token_lengths(tokenizer, texts: Sequence[str], max_length: Optional[int] = None,
+                  text_pairs: Optional[Sequence[str]] = None) -> List[int]:
+    """Tokenized length per input (truncated like the model sees it); character length without a tokenizer."""
+    if tokenizer is None:
+        lengths = [len(t) for t in texts]
+        if text_pairs is not None:
+            lengths = [a + len(b) for a, b in zip(lengths, text_pairs)]
+        return lengths
+    kwargs = {"truncation": True, "add_special_tokens": True}
+    if max_length:
+        kwargs["max_length"] = max_length
+    enc = tokenizer(list(texts), list(text_pairs), **kwargs) if text_pairs is not None else tokenizer(list(texts), **kwargs)
+    return [len(ids) for ids in enc["input_ids"]]
+
+
+def length_buckets(lengths: Sequence[int], batch_size: int, enabled: bool = True) -> List[List[int]]:
+    """Index batches: longest-first when enabled (peak memory shows up on the first batch), else input order."""
+    order = list(range(len(lengths)))
+    if enabled:
+        order.sort(key=lambda i: lengths[i], reverse=True)
+    batch_size = max(1, batch_size)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def token_budget_buckets(lengths: Sequence[int], max_tokens: int, max_rows: Optional[int] = None,
+                         order: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """Consecutive index batches (longest-first unless order is given) whose padded size
+    (rows x longest row) stays within max_tokens."""
+    if order is None:
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: List[List[int]] = []
+    current: List[int] = []
+    width = 0
+    for i in order:
+        full = max_rows is not None and len(current) >= max_rows
+        if current and (full or (len(current) + 1) * max(width, lengths[i]) > max_tokens):
+            batches.append(current)
+            current, width = [], 0
+        current.append(i)
+        width = max(width, lengths[i])
+    if current:
+        batches.append(current)
+    return batches
+
+
+def padding_stats(lengths: Sequence[int], batches: Sequence[Sequence[int]]) -> dict:
+    """Real vs padded token counts for a batching plan."""
+    real = sum(lengths[i] for b in batches for i in b)
+    padded = sum(len(b) * max(lengths[i] for i in b) for b in batches if b)
+    return {
+        "real_tokens": real,
+        "padded_tokens": padded,
+        "padding_ratio": round(1 - real / padded, 4) if padded else 0.0,
+    }
+
+
+__all__ = ["length_bucketing_enabled", "embedding_length_bucketing_enabled", "token_lengths", "length_buckets", "token_budget_buckets", "padding_stats"]
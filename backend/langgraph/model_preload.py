@@ -0,0 +1,133 @@
+"""
+Model Preload (multi-worker deployments)
+========================================
+
+Loads the heavy models once in the gunicorn master process, before workers are
+forked, so every worker shares the same weight pages copy-on-write instead of
+holding its own BGE-large and cross-encoder copies.
+
+Flow (see gunicorn_conf.py):
+1. The master imports app_langgraph (preload_app=True); with MODEL_PRELOAD enabled the
+   app calls preload_models(), which loads the embedding backend and the shared
+   cross-encoder engine.
+   Nothing is run through the models here, so torch/OpenMP thread pools are not
+   started before fork.
+2. when_ready -> freeze_for_fork(): move everything allocated so far into the
+   permanent GC generation so collections in the workers do not touch (and copy)
+   the shared pages.
+3. post_fork -> after_fork(): per-worker resets (intra-op thread count, fresh
+   SQLite embedding-cache connection, GC re-enabled).
+
+Workers then pick the preloaded instances up through get_preloaded() in the
+service container loaders and in the workflow node services.
+
+Environment Variables:
+  MODEL_PRELOAD: Load models in the master before fork (default false; gunicorn_conf.py enables it)
+  MODEL_WORKER_THREADS: Intra-op threads per worker (default: CPU count / WEB_CONCURRENCY)
+"""
+from __future__ import annotations
+import gc
+import os
+import time
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# name -> instance loaded in the master
+_PRELOADED: Dict[str, Any] = {}
+
+
+def preload_enabled() -> bool:
+    return os.getenv("MODEL_PRELOAD", "false").lower() in {"1", "true", "yes", "on"}
+
+
+def get_preloaded(name: str) -> Optional[Any]:
+    """Instance loaded before fork, or None (single-process mode / preload failed)."""
+    return _PRELOADED.get(name)
+
+
+def _set_torch_threads(n: int):
+    try:
+        import torch
+        torch.set_num_threads(n)
+    except ImportError:
+        pass
+
+
+def _detach_cache(svc):
+    # An SQLite connection must not be carried across fork; each worker reopens its own
+    cache = getattr(svc, "cache", None)
+    if cache is not None:
+        cache.close()
+        svc.cache = None
+        svc._detached_cache = True
+
+
+def preload_models():
+    """Load embedding backend and cross-encoders into this (master) process."""
+    if _PRELOADED:
+        return
+    started = time.time()
+    # Keep the master single-threaded; workers set their own count after fork
+    _set_torch_threads(1)
+    if os.getenv("EMBEDDING_BACKEND", "sentence-transformers").lower() == "onnx":
+        # ONNX Runtime starts its intra-op threads when the session is created; they do
+        # not survive fork, so each worker builds its own (small, int8) session instead
+        logger.info("📦 EMBEDDING_BACKEND=onnx: embedding sessions are created per worker")
+    else:
+        try:
+            from .embedding_service_factory import create_embedding_backend
+            emb = create_embedding_backend()
+            _detach_cache(emb)
+            _PRELOADED["embedding"] = emb
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding preload failed, workers will load their own copy: {e}")
+    if os.getenv("RERANK_BACKEND", "torch").lower() == "onnx":
+        logger.info("📦 RERANK_BACKEND=onnx: cross-encoder sessions are created per worker")
+    else:
+        try:
+            from .cross_encoder_engine import get_cross_encoder_engine
+            # One model shared by the PDF and ticket rerankers; loaded synchronously, its
+            # inference thread starts lazily in each worker (threads do not survive fork)
+            engine = get_cross_encoder_engine()
+            if engine.load():
+                _PRELOADED["cross_encoder"] = engine
+            else:
+                logger.warning(f"⚠️ Cross-encoder preload failed: {engine.init_error}")
+        except Exception as e:
+            logger.warning(f"⚠️ Cross-encoder preload failed: {e}")
+    logger.info(f"📦 Preloaded {sorted(_PRELOADED)} in master pid={os.getpid()} ({time.time() - started:.1f}s)")
+
+
+def freeze_for_fork():
+    """Call in the master right before workers are forked."""
+    gc.freeze()
+    logger.info(f"🧊 Froze {gc.get_freeze_count()} objects before fork")
+
+
+def worker_threads() -> int:
+    raw = os.getenv("MODEL_WORKER_THREADS")
+    if raw and raw.isdigit():
+        return max(1, int(raw))
+    workers = int(os.getenv("WEB_CONCURRENCY", "1") or 1)
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def after_fork():
+    """Per-worker resets; call in each worker right after fork."""
+    threads = worker_threads()
+    _set_torch_threads(threads)
+    os.environ["ONNX_NUM_THREADS"] = str(threads)
+    for svc in _PRELOADED.values():
+        if getattr(svc, "_detached_cache", False):
+            try:
+                from .embedding_cache import create_embedding_cache
+            except ImportError:  # script mode
+                from embedding_cache import create_embedding_cache
+            svc.cache = create_embedding_cache()
+    gc.enable()
+    logger.info(f"👷 Worker pid={os.getpid()} using {threads} threads, shared models: {sorted(_PRELOADED)}")
+
+
+__all__ = ["preload_enabled", "preload_models", "get_preloaded", "freeze_for_fork", "after_fork", "worker_threads"]
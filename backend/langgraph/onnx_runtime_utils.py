@@ -0,0 +1,117 @@
+"""
+ONNX Runtime Utilities
+======================
+
+Export, quantize and load Hugging Face transformer checkpoints for CPU inference
+with ONNX Runtime. Exported graphs are written once per model into a local cache
+directory and reused on every later start.
+
+Two graph kinds are supported:
+- "encoder": outputs last_hidden_state (embedding models such as BGE)
+- "sequence_classification": outputs logits (cross-encoder rerankers)
+
+Environment Variables:
+  ONNX_MODEL_CACHE_DIR: Where exported graphs are stored (default ~/.cache/combot/onnx)
+  ONNX_NUM_THREADS: intra-op threads per session (default: ONNX Runtime decides)
+"""
+from __future__ import annotations
+import os
+import re
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ONNX_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "combot", "onnx")
+_KINDS = {"encoder", "sequence_classification"}
+
+
+def onnx_model_dir(model_name: str) -> str:
+    """Per-model export directory (model id sanitized into a folder name)."""
+    base = os.getenv("ONNX_MODEL_CACHE_DIR", DEFAULT_ONNX_CACHE_DIR)
+    return os.path.join(base, re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name))
+
+
+def export_transformer_onnx(model_source: str, out_path: str, kind: str = "encoder", opset: int = 17) -> str:
+    """Export a transformer checkpoint to ONNX with dynamic batch and sequence axes."""
+    if kind not in _KINDS:
+        raise ValueError(f"Unsupported ONNX export kind '{kind}'")
+    import torch
+    from transformers import AutoModel, AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_source)
+    model_cls = AutoModel if kind == "encoder" else AutoModelForSequenceClassification
+    model = model_cls.from_pretrained(model_source)
+    model.eval()
+    sample = tokenizer(["onnx export probe", "second probe sentence"], ["query", "passage"] if kind != "encoder" else None,
+                       padding=True, return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    output_name = "last_hidden_state" if kind == "encoder" else "logits"
+    dynamic_axes = {n: {0: "batch", 1: "sequence"} for n in input_names}
+    dynamic_axes[output_name] = {0: "batch", 1: "sequence"} if kind == "encoder" else {0: "batch"}
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[n] for n in input_names),
+            out_path,
+            input_names=input_names,
+            output_names=[output_name],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    tokenizer.save_pretrained(os.path.dirname(os.path.abspath(out_path)))
+    logger.info(f"📦 Exported {model_source} to ONNX ({kind}) at {out_path}")
+    return out_path
+
+
+def quantize_int8(src_path: str, dst_path: str) -> str:
+    """Dynamic int8 weight quantization (activations stay float; no calibration data needed)."""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(src_path, dst_path, weight_type=QuantType.QInt8)
+    logger.info(f"📦 Quantized ONNX graph to int8: {dst_path}")
+    return dst_path
+
+
+def ensure_onnx_model(model_name: str, model_source: Optional[str] = None, kind: str = "encoder",
+                      quantize: Optional[str] = None) -> str:
+    """Return the path of a ready-to-load graph, exporting/quantizing on first use.
+
+    quantize: None/"none" for float32, "int8" for dynamic int8 weights.
+    The tokenizer is saved next to the graph so sessions can load without the original checkpoint.
+    """
+    model_dir = onnx_model_dir(model_name)
+    fp32_path = os.path.join(model_dir, f"{kind}.onnx")
+    if not os.path.exists(fp32_path):
+        export_transformer_onnx(model_source or model_name, fp32_path, kind=kind)
+    if not quantize or quantize == "none":
+        return fp32_path
+    if quantize != "int8":
+        raise ValueError(f"Unsupported ONNX quantization '{quantize}' (expected 'int8' or 'none')")
+    int8_path = os.path.join(model_dir, f"{kind}.int8.onnx")
+    if not os.path.exists(int8_path):
+        quantize_int8(fp32_path, int8_path)
+    return int8_path
+
+
+def create_onnx_session(model_path: str, num_threads: Optional[int] = None):
+    """CPU InferenceSession with full graph optimizations."""
+    import onnxruntime as ort
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if num_threads is None and os.getenv("ONNX_NUM_THREADS", "").isdigit():
+        num_threads = int(os.getenv("ONNX_NUM_THREADS"))
+    if num_threads:
+        opts.intra_op_num_threads = num_threads
+    return ort.InferenceSession(model_path, sess_options=opts, providers=["CPUExecutionProvider"])
+
+
+__all__ = [
+    "onnx_model_dir",
+    "export_transformer_onnx",
+    "quantize_int8",
+    "ensure_onnx_model",
+    "create_onnx_session",
+]
@@ -0,0 +1,127 @@
+"""
+Payload Indexes
+===============
+
+Declares the payload indexes of every Qdrant collection the API filters on and
+reconciles existing collections against them.
+
+Without a payload index a filtered scroll/search (ticket_key, ingestion_version,
+is_resolved, session_id, message_id) checks the payload of every point, so its cost
+grows with the collection. Reconciling creates missing indexes and recreates an index
+whose type differs from the declaration; extra indexes are left alone.
+
+Collection setup (JiraQdrantService, ChatContextService) reconciles the collection
+it creates or finds, and the API reconciles all existing collections once at startup.
+The same migration can be run by hand:
+
+    python -m backend.langgraph.payload_indexes --qdrant-url http://localhost:6333
+    python -m backend.langgraph.payload_indexes --dry-run
+
+Environment Variables:
+  PAYLOAD_INDEX_RECONCILE: Reconcile existing collections at API startup (default true)
+"""
+from __future__ import annotations
+import os
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TICKET_INDEXES = {"ticket_key": "keyword", "ingestion_version": "keyword", "is_resolved": "bool"}
+
+# collection -> {payload field: index type (keyword | bool | datetime)}
+PAYLOAD_INDEXES: Dict[str, Dict[str, str]] = {
+    "jira_tickets": _TICKET_INDEXES,
+    "jira_tickets_global": _TICKET_INDEXES,
+    "chat_sessions": {"session_id": "keyword", "user_id": "keyword", "updated_at": "datetime"},
+    "chat_messages": {"session_id": "keyword", "message_id": "keyword", "timestamp": "datetime"},
+}
+
+
+def payload_index_reconcile_enabled() -> bool:
+    return os.getenv("PAYLOAD_INDEX_RECONCILE", "true").lower() in {"1", "true", "yes", "on"}
+
+
+def indexes_for(collection_name: str) -> Dict[str, str]:
+    """Declared indexes of a collection (per-ticket jira_tickets_* collections share the ticket set)."""
+    if collection_name in PAYLOAD_INDEXES:
+        return PAYLOAD_INDEXES[collection_name]
+    if collection_name.startswith("jira_tickets_"):
+        return _TICKET_INDEXES
+    return {}
+
+
+def plan_index_changes(existing: Dict[str, str], wanted: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """(to_create, to_replace) from the collection's current {field: type} payload schema."""
+    to_create = {f: t for f, t in wanted.items() if f not in existing}
+    to_replace = {f: t for f, t in wanted.items() if f in existing and str(existing[f]).lower() != t}
+    return to_create, to_replace
+
+
+async def reconcile_rest(client, qdrant_url: str, collection_name: str, dry_run: bool = False) -> Dict[str, Any]:
+    """Reconcile one collection over the REST API with an httpx.AsyncClient-like client."""
+    wanted = indexes_for(collection_name)
+    if not wanted:
+        return {"collection": collection_name, "created": [], "replaced": []}
+    base = f"{qdrant_url.rstrip('/')}/collections/{collection_name}"
+    resp = await client.get(base)
+    resp.raise_for_status()
+    schema = resp.json().get("result", {}).get("payload_schema", {}) or {}
+    to_create, to_replace = plan_index_changes({f: s.get("data_type") for f, s in schema.items()}, wanted)
+    if not dry_run:
+        for field in to_replace:
+            resp = await client.delete(f"{base}/index/{field}", params={"wait": "true"})
+            resp.raise_for_status()
+        for field, field_type in {**to_create, **to_replace}.items():
+            resp = await client.put(f"{base}/index", params={"wait": "true"},
+                                    json={"field_name": field, "field_schema": field_type})
+            resp.raise_for_status()
+    report = {"collection": collection_name, "created": sorted(to_create), "replaced": sorted(to_replace)}
+    if to_create or to_replace:
+        logger.info(f"🗂️ Payload indexes {'planned' if dry_run else 'reconciled'} for {collection_name}: "
+                    f"created={report['created']} replaced={report['replaced']}")
+    return report
+
+
+async def reconcile_all_rest(client, qdrant_url: str, dry_run: bool = False) -> List[Dict[str, Any]]:
+    """Reconcile every existing collection that has declared indexes."""
+    resp = await client.get(f"{qdrant_url.rstrip('/')}/collections")
+    resp.raise_for_status()
+    names = [c["name"] for c in resp.json().get("result", {}).get("collections", [])]
+    reports = []
+    for name in names:
+        if indexes_for(name):
+            try:
+                reports.append(await reconcile_rest(client, qdrant_url, name, dry_run=dry_run))
+            except Exception as e:
+                logger.warning(f"⚠️ Payload index reconcile failed for {name}: {e}")
+                reports.append({"collection": name, "error": str(e)})
+    return reports
+
+
+__all__ = ["PAYLOAD_INDEXES", "indexes_for", "plan_index_changes", "payload_index_reconcile_enabled",
+           "reconcile_rest", "reconcile_all_rest"]
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+    import asyncio
+    import json
+    import httpx
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--dry-run", action="store_true", help="Only report the indexes that would change")
+    args = parser.parse_args(argv)
+
+    async def run():
+        async with httpx.AsyncClient(timeout=600.0) as client:
+            return await reconcile_all_rest(client, args.qdrant_url, dry_run=args.dry_run)
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
+
@@ -0,0 +1,133 @@
+"""
+Payload Projection
+==================
+
+Per-path payload field lists for Qdrant reads, plus lazy fetching of large fields.
+
+Ticket chunk payloads carry the full description, concatenated comments, both
+analyses and keywords (tens of KB per point), while the hot paths read a handful of
+short fields. Each retrieval path asks Qdrant only for its declared fields
+(`with_payload: [fields]`); the analyses are fetched afterwards by point id for the
+few hits that actually reach prompt assembly (fetch_payloads / hydrate_payloads).
+Payloads written with the ticket doc store carry a `doc_ref` instead of the heavy
+fields; hydration resolves those from the store (ticket_doc_store.py) and only goes
+back to Qdrant for payloads without one.
+
+Response bytes per path are counted in projection_stats (served with the Qdrant
+HTTP pool stats at /api/debug/qdrant-http).
+
+Environment Variables:
+  PAYLOAD_PROJECTION_ENABLED: Set to false to request full payloads everywhere (default true)
+"""
+from __future__ import annotations
+import os
+import threading
+import logging
+from typing import Any, Dict, Iterable, List, Sequence, Union
+
+try:
+    from .qdrant_http import qdrant_session
+    from .ticket_doc_store import DOC_REF_KEY, fill_from_doc_store
+except ImportError:  # script mode
+    from qdrant_http import qdrant_session
+    from ticket_doc_store import DOC_REF_KEY, fill_from_doc_store
+
+logger = logging.getLogger(__name__)
+
+TICKET_CARD_FIELDS = ("ticket_key", "summary", "status", "priority", "assignee", "issue_type", "components", "is_resolved")
+ANALYSIS_FIELDS = ("l1_l2_analysis", "l3_engineer_analysis")
+POINT_ID_KEY = "_point_id"
+
+# path -> payload fields it reads
+PROJECTIONS: Dict[str, Sequence[str]] = {
+    # ticket-key retrieval builds its prompt blocks straight from the scrolled chunks
+    # (analyses are only inline for chunks ingested before the doc store)
+    "ticket_context": TICKET_CARD_FIELDS + ("chunk_text", "text", DOC_REF_KEY) + ANALYSIS_FIELDS,
+    # semantic search + rerank: analyses are hydrated later for the hits used in the prompt
+    "semantic_search": TICKET_CARD_FIELDS + ("chunk_text", "text", DOC_REF_KEY),
+    # resolved-reference scrolls rank on summary overlap; analyses fetched for the top refs
+    "resolved_refs": ("ticket_key", "status", "summary", DOC_REF_KEY),
+    "resolved_refs_semantic": ("ticket_key", "status", "summary", "labels", "components", DOC_REF_KEY),
+    "analyses": ANALYSIS_FIELDS,
+}
+
+
+def payload_projection_enabled() -> bool:
+    return os.getenv("PAYLOAD_PROJECTION_ENABLED", "true").lower() in {"1", "true", "yes", "on"}
+
+
+def payload_fields(path: str) -> Union[bool, List[str]]:
+    """`with_payload` value for a path: its field list, or True when projection is disabled."""
+    if not payload_projection_enabled():
+        return True
+    return list(PROJECTIONS[path])
+
+
+class ProjectionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.paths: Dict[str, Dict[str, int]] = {}
+
+    def record(self, path: str, nbytes: int, points: int = 0):
+        with self._lock:
+            entry = self.paths.setdefault(path, {"responses": 0, "bytes": 0, "points": 0})
+            entry["responses"] += 1
+            entry["bytes"] += nbytes
+            entry["points"] += points
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": payload_projection_enabled(),
+                "paths": {p: {**e, "bytes_per_response": round(e["bytes"] / e["responses"]) if e["responses"] else 0,
+                              "bytes_per_point": round(e["bytes"] / e["points"]) if e["points"] else 0}
+                          for p, e in self.paths.items()},
+            }
+
+
+projection_stats = ProjectionStats()
+
+
+async def fetch_payloads(qdrant_url: str, collection: str, ids: Iterable[Any], fields: Sequence[str],
+                         timeout: float = 15.0) -> Dict[Any, Dict[str, Any]]:
+    """{point id: payload restricted to fields} for the given points (one request)."""
+    ids = [i for i in dict.fromkeys(ids) if i is not None]
+    if not ids:
+        return {}
+    body = {"ids": ids, "with_payload": list(fields), "with_vector": False}
+    async with qdrant_session(timeout=timeout) as client:
+        resp = await client.post(f"{qdrant_url}/collections/{collection}/points", json=body)
+    if resp.status_code != 200:
+        logger.warning(f"Payload fetch HTTP {resp.status_code}: {resp.text[:160]}")
+        return {}
+    points = resp.json().get("result", []) or []
+    projection_stats.record("lazy_fetch", len(resp.content), len(points))
+    return {p.get("id"): p.get("payload") or {} for p in points}
+
+
+async def hydrate_payloads(qdrant_url: str, collection: str, hits: List[Dict[str, Any]],
+                           fields: Sequence[str] = ANALYSIS_FIELDS) -> List[Dict[str, Any]]:
+    """Fill `fields` into payload dicts read with a projection: from the doc store for
+    payloads with a doc_ref, otherwise by point id (POINT_ID_KEY) from Qdrant."""
+    if not hits:
+        return hits
+    pending = await fill_from_doc_store(hits, fields)
+    if not payload_projection_enabled():
+        return hits
+    pending = [h for h in pending if h.get(POINT_ID_KEY) is not None]
+    if not pending:
+        return hits
+    try:
+        fetched = await fetch_payloads(qdrant_url, collection, [h[POINT_ID_KEY] for h in pending], fields)
+    except Exception as e:
+        logger.warning(f"Payload hydrate failed: {e}")
+        return hits
+    for h in pending:
+        extra = fetched.get(h[POINT_ID_KEY], {})
+        for f in fields:
+            h.setdefault(f, extra.get(f))
+    return hits
+
+
+__all__ = ["TICKET_CARD_FIELDS", "ANALYSIS_FIELDS", "POINT_ID_KEY", "PROJECTIONS", "payload_projection_enabled",
+           "payload_fields", "projection_stats", "fetch_payloads", "hydrate_payloads"]
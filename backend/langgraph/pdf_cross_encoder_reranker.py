@@ -7,93 +7,73 @@ Uses cross-encoder/ms-marco-MiniLM-L6-v2 for better retrieval results
 """
 
 import logging
-import asyncio
 from typing import List, Dict, Any, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import time
 
+try:
+    from .cross_encoder_engine import DEFAULT_RERANK_MODEL, PRIORITY_SEARCH, get_cross_encoder_engine
+    from .length_bucketing import length_bucketing_enabled
+except ImportError:  # script mode
+    from cross_encoder_engine import DEFAULT_RERANK_MODEL, PRIORITY_SEARCH, get_cross_encoder_engine
+    from length_bucketing import length_bucketing_enabled
+
 logger = logging.getLogger(__name__)
 
 class LocalCrossEncoderReranker:
-    """Local reranking service using cross-encoder/ms-marco-MiniLM-L6-v2"""
+    """Local reranking service using cross-encoder/ms-marco-MiniLM-L6-v2
+
+    Model, tokenizer and inference thread belong to the shared CrossEncoderEngine, so
+    every instance (and the ticket reranker) scores on the same loaded model.
+    """
     
-    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, priority: int = PRIORITY_SEARCH):
         self.model_name = model_name
-        self.tokenizer = None
-        self.model = None
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.executor = ThreadPoolExecutor(max_workers=2)
-        self.is_initialized = False
+        self.engine = get_cross_encoder_engine(model_name)
+        self.priority = priority
+        self.length_bucketing = length_bucketing_enabled()
         
-        logger.info(f"Initializing Cross-Encoder Reranker with model: {model_name}")
-        logger.info(f"Using device: {self.device}")
+        logger.info(f"Initializing Cross-Encoder Reranker with model: {model_name} (shared engine)")
+
+    @property
+    def is_initialized(self) -> bool:
+        return self.engine.is_initialized
+
+    @property
+    def tokenizer(self):
+        return self.engine.tokenizer
+
+    @property
+    def model(self):
+        return self.engine.model
+
+    @property
+    def device(self):
+        return self.engine.device
     
     async def initialize(self):
         """Initialize the model and tokenizer"""
         if self.is_initialized:
             return
-            
-        try:
-            # Run model loading in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(self.executor, self._load_model)
-            self.is_initialized = True
-            logger.info("Cross-encoder reranker service initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize cross-encoder reranker: {e}")
-            raise
+        await self.engine.initialize()
+        if not self.is_initialized:
+            logger.error(f"Failed to initialize cross-encoder reranker: {self.engine.init_error}")
+            raise RuntimeError(self.engine.init_error or "cross-encoder failed to load")
+        logger.info("Cross-encoder reranker service initialized successfully")
     
     def _load_model(self):
-        """Load model and tokenizer (runs in thread pool)"""
-        try:
-            logger.info("Loading cross-encoder tokenizer...")
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-            
-            logger.info("Loading cross-encoder model...")
-            self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
-            self.model.to(self.device)
-            self.model.eval()
-            
-            logger.info(f"Cross-encoder model loaded successfully on {self.device}")
-        except Exception as e:
-            logger.error(f"Error loading cross-encoder model: {e}")
-            raise
+        """Load model and tokenizer synchronously (blocking)"""
+        if not self.engine.load():
+            raise RuntimeError(self.engine.init_error or "cross-encoder failed to load")
     
-    def _rerank_batch(self, query: str, documents: List[str]) -> List[float]:
-        """Perform reranking on a batch of documents (runs in thread pool)"""
+    def _rerank_batch(self, query: str, documents: List[str], batch_size: int = 32) -> List[float]:
+        """Score (query, document) pairs on the shared engine, blocking until done
+
+        Pairs are tokenized once without padding, grouped by token length and padded
+        per group, so short chunks are not padded up to the longest one.
+        """
         try:
-            # Prepare input pairs
-            pairs = [[query, doc] for doc in documents]
-            
-            # Tokenize
-            features = self.tokenizer(
-                pairs,
-                padding=True,
-                truncation=True,
-                return_tensors="pt",
-                max_length=512
-            )
-            
-            # Move to device
-            features = {k: v.to(self.device) for k, v in features.items()}
-            
-            # Get predictions
-            with torch.no_grad():
-                scores = self.model(**features).logits
-                
-            # Convert to relevance scores (apply sigmoid for probability)
-            relevance_scores = torch.sigmoid(scores).squeeze().cpu().numpy()
-            
-            # Ensure we return a list even for single item
-            if len(documents) == 1:
-                relevance_scores = [float(relevance_scores)]
-            else:
-                relevance_scores = relevance_scores.tolist()
-            
-            return relevance_scores
-            
+            return self.engine.score_sync(query, documents, priority=self.priority, max_length=512,
+                                          batch_size=batch_size, bucketing=self.length_bucketing)
         except Exception as e:
             logger.error(f"Error in cross-encoder reranking batch: {e}")
             # Return neutral scores as fallback
@@ -107,7 +87,8 @@ class LocalCrossEncoderReranker:
         batch_size: int = 32,
         score_threshold: float = 0.0,
         adaptive_threshold: bool = True,
-        adaptive_ratio: float = 0.6
+        adaptive_ratio: float = 0.6,
+        priority: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Rerank documents using the cross-encoder model
@@ -120,6 +101,7 @@ class LocalCrossEncoderReranker:
             score_threshold: Minimum score threshold for filtering (used as fallback)
             adaptive_threshold: Whether to use adaptive threshold based on top score
             adaptive_ratio: Ratio of top score to use as adaptive threshold (0.6 = 60% of top score)
+            priority: Engine queue priority (lower is served first); defaults to self.priority
             
         Returns:
             List of reranked documents with cross-encoder scores
@@ -146,21 +128,16 @@ class LocalCrossEncoderReranker:
                     content = str(doc)
                 doc_contents.append(content)
             
-            # Process in batches if needed
-            all_scores = []
-            
-            for i in range(0, len(doc_contents), batch_size):
-                batch_docs = doc_contents[i:i + batch_size]
-                
-                # Run reranking in thread pool
-                loop = asyncio.get_event_loop()
-                batch_scores = await loop.run_in_executor(
-                    self.executor, 
-                    self._rerank_batch, 
-                    query, 
-                    batch_docs
-                )
-                all_scores.extend(batch_scores)
+            # Score on the shared engine (batched by token length there); a full queue
+            # raises RerankQueueFull and falls through to the original order below
+            all_scores, cache_info = await self.engine.score_with_info(
+                query,
+                doc_contents,
+                priority=self.priority if priority is None else priority,
+                max_length=512,
+                batch_size=batch_size,
+                bucketing=self.length_bucketing
+            )
             
             # Combine documents with scores
             scored_docs = []
@@ -211,6 +188,8 @@ class LocalCrossEncoderReranker:
                 logger.info(f"Cross-encoder reranking completed in {elapsed:.2f}s")
                 logger.info(f"Score distribution: min={min_score:.4f}, max={max_score:.4f}, avg={avg_score:.4f}")
                 logger.info(f"Returning {len(result)} documents (from {len(documents)} input docs)")
+                logger.info(f"Rerank cache: {cache_info['cached']}/{cache_info['pairs']} pairs cached, "
+                           f"{cache_info['scored']} sent to the cross-encoder")
             
             return result
             
@@ -242,7 +221,6 @@ class LocalCrossEncoderReranker:
             if not self.is_initialized:
                 # Initialize synchronously (blocking)
                 self._load_model()
-                self.is_initialized = True
             
             # Extract content
             doc_contents = []
@@ -276,18 +254,12 @@ class LocalCrossEncoderReranker:
             return documents[:top_k]
     
     def cleanup(self):
-        """Cleanup resources"""
-        if self.executor:
-            self.executor.shutdown(wait=True)
-        if self.model:
-            del self.model
-        if self.tokenizer:
-            del self.tokenizer
-        torch.cuda.empty_cache() if torch.cuda.is_available() else None
+        """Cleanup resources (the model is shared with other rerankers and stays loaded)"""
+        logger.info(f"Cross-encoder reranker released; engine stats: {self.engine.stats()}")
 
 
 # Factory function to create reranker instance
-def create_cross_encoder_reranker(model_name: str = "cross-encoder/ms-marco-MiniLM-L6-v2") -> LocalCrossEncoderReranker:
+def create_cross_encoder_reranker(model_name: str = DEFAULT_RERANK_MODEL) -> LocalCrossEncoderReranker:
     """
     Create a cross-encoder reranker instance
     
@@ -13,6 +13,7 @@ import logging
 import hashlib
 import re
 import asyncio
+import time
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
@@ -22,6 +23,13 @@ from datetime import datetime
 import psutil
 import numpy as np
 
+try:
+    from .rerank_cache import bump_ingestion_version
+    from .token_chunker import TokenSpan, create_token_chunker, token_chunking_enabled, savings_report
+except ImportError:  # script mode
+    from rerank_cache import bump_ingestion_version
+    from token_chunker import TokenSpan, create_token_chunker, token_chunking_enabled, savings_report
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -51,7 +59,8 @@ class PDFProcessor:
                  uploads_path: str = "/home/ubuntu/Ravi/ComBot/uploads/",
                  base_chunk_size: int = 1200,
                  chunk_overlap: int = 200,
-                 min_chunk_size: int = 200):
+                 min_chunk_size: int = 200,
+                 chunker=None):
         """
         Initialize advanced PDF processor
         
@@ -59,9 +68,10 @@ class PDFProcessor:
             embedding_service: BGE embedding service instance
             qdrant_service: Qdrant service for vector storage
             uploads_path: Path to PDF files
-            base_chunk_size: Base size for text chunks (adaptive)
+            base_chunk_size: Base size for text chunks in characters (legacy sizing, CHUNKING_MODE=legacy)
             chunk_overlap: Overlap between chunks
-            min_chunk_size: Minimum chunk size threshold
+            min_chunk_size: Minimum chunk size threshold (characters)
+            chunker: Optional shared TokenChunker (one is created from the embedding tokenizer otherwise)
         """
         self.embedding_service = embedding_service
         self.qdrant_service = qdrant_service
@@ -70,14 +80,20 @@ class PDFProcessor:
         self.chunk_overlap = chunk_overlap
         self.min_chunk_size = min_chunk_size
         self.collection_name = "pdf_documents"
+        # Token-budgeted chunking (CHUNK_MAX_TOKENS / CHUNK_OVERLAP_TOKENS)
+        self.chunker = chunker or create_token_chunker(embedding_service)
         
         # Optimization parameters from existing backend
         cpu_cores = psutil.cpu_count(logical=False) or 4
         self.max_workers = min(cpu_cores, 8)
         
-        # Dynamic batch sizes based on available memory
+        # Dynamic batch sizes based on available memory, unless EMBEDDING_BATCH_SIZE is set
+        # (directly or through the tuning file written by benchmarks/embedding_throughput.py)
         available_memory = psutil.virtual_memory().available / 1024**3
-        if available_memory > 32:
+        env_batch = os.getenv('EMBEDDING_BATCH_SIZE', '')
+        if env_batch.isdigit():
+            self.embedding_batch_size = int(env_batch)
+        elif available_memory > 32:
             self.embedding_batch_size = 128
         elif available_memory > 16:
             self.embedding_batch_size = 96
@@ -244,6 +260,44 @@ class PDFProcessor:
         
         return cleaned_paragraphs
     
+    def _chunk_text_by_tokens(self, text: str, page_number: int = None, document_name: str = None) -> List[Dict[str, Any]]:
+        """
+        Same structure as _chunk_text_intelligently (paragraph groups, sentence groups for
+        oversize paragraphs) but packed to the chunker's token budget; a single sentence
+        over the budget is split into overlapping token windows.
+        """
+        chunker = self.chunker
+        
+        def as_dicts(spans: List[TokenSpan], chunk_type: str) -> List[Dict[str, Any]]:
+            return [{
+                "text": span.text.strip(),
+                "chunk_type": chunk_type,
+                "page_number": page_number,
+                "document_name": document_name,
+                "token_count": span.tokens
+            } for span in spans]
+        
+        whole = chunker.count_tokens(text)
+        if whole <= chunker.max_tokens:
+            return as_dicts([TokenSpan(text=text, tokens=whole)], "complete")
+        
+        chunks = []
+        group = []
+        for paragraph in self._split_into_paragraphs(text):
+            if chunker.count_tokens(paragraph) > chunker.max_tokens:
+                chunks.extend(as_dicts(chunker.pack(group), "paragraph_group"))
+                group = []
+                sentences = re.split(r'(?<=[.!?])\s+', paragraph)
+                chunks.extend(as_dicts(chunker.pack(sentences, separator=" "), "sentence_group"))
+            else:
+                group.append(paragraph)
+        chunks.extend(as_dicts(chunker.pack(group), "paragraph_group"))
+        
+        # Filter out chunks that are too small
+        valid_chunks = [chunk for chunk in chunks if len(chunk["text"]) >= self.min_chunk_size]
+        logger.debug(f"Token chunking: {len(valid_chunks)} chunks created for page {page_number}")
+        return valid_chunks
+    
     def _split_large_paragraph(self, paragraph: str, page_number: int = None, document_name: str = None) -> List[Dict[str, Any]]:
         """Split large paragraphs by sentences while maintaining context"""
         sentences = re.split(r'(?<=[.!?])\s+', paragraph)
@@ -337,8 +391,15 @@ class PDFProcessor:
         if not text.strip():
             return []
         
-        # Use intelligent chunking method
-        chunks = self._chunk_text_intelligently(text, page_number, document_name)
+        if token_chunking_enabled():
+            chunks = self._chunk_text_by_tokens(text, page_number, document_name)
+            baseline = None
+            if self.chunker.report_baseline:
+                baseline = [c["text"] for c in self._chunk_text_intelligently(text, page_number, document_name)]
+            self.chunker.record([TokenSpan(text=c["text"], tokens=c["token_count"]) for c in chunks], baseline)
+        else:
+            # Use intelligent chunking method
+            chunks = self._chunk_text_intelligently(text, page_number, document_name)
         
         logger.debug(f"Page {page_number}: Created {len(chunks)} intelligent chunks")
         return chunks
@@ -400,6 +461,7 @@ class PDFProcessor:
                     "processed_at": datetime.now().isoformat(),
                     "char_count": len(chunk_text),
                     "word_count": len(chunk_text.split()),
+                    **({"token_count": chunk_dict["token_count"]} if "token_count" in chunk_dict else {}),
                     "content_preview": chunk_text[:200] + "..." if len(chunk_text) > 200 else chunk_text,
                     **page_data["metadata"],
                     **page_data.get("document_metadata", {})
@@ -433,6 +495,7 @@ class PDFProcessor:
         try:
             start_time = datetime.now()
             logger.info(f"Processing PDF file: {pdf_path}")
+            self.chunker.reset_stats()
             
             # Extract and create chunks (CPU-bound, run in executor)
             pdf_chunks = await self._run_in_executor(self.create_pdf_chunks, pdf_path)
@@ -453,6 +516,7 @@ class PDFProcessor:
             logger.info(f"Generating embeddings for {total_chunks} chunks in batches of {self.embedding_batch_size}...")
             
             all_embeddings = []
+            encode_start = time.perf_counter()
             
             # Process embeddings in batches
             for i in range(0, total_chunks, self.embedding_batch_size):
@@ -468,6 +532,9 @@ class PDFProcessor:
                 # Yield control to prevent blocking
                 await asyncio.sleep(0.01)
             
+            chunking = self.chunker.stats()
+            chunking["savings"] = savings_report(chunking, time.perf_counter() - encode_start)
+            
             # Prepare documents for storage
             documents_to_add = []
             for chunk, embedding in zip(pdf_chunks, all_embeddings):
@@ -485,11 +552,16 @@ class PDFProcessor:
             
             point_ids = await self.qdrant_service.add_documents_batch_async(documents_to_add)
             
+            bump_ingestion_version(reason=f"pdf {Path(pdf_path).name}")
+            
             processing_time = (datetime.now() - start_time).total_seconds()
             
             logger.info(f"✅ Successfully processed PDF: {Path(pdf_path).name} in {processing_time:.2f}s")
             logger.info(f"   Created {len(pdf_chunks)} intelligent chunks")
             logger.info(f"   Generated {len(all_embeddings)} embeddings")
+            if "vectors_saved" in chunking["savings"]:
+                logger.info(f"   Token chunking saved {chunking['savings']['vectors_saved']} vectors, "
+                            f"~{chunking['savings']['encode_seconds_saved_est']}s encode vs legacy sizing")
             logger.info(f"   Stored {len(point_ids)} vectors in collection: {self.collection_name}")
             
             return {
@@ -500,7 +572,8 @@ class PDFProcessor:
                 "collection_name": self.collection_name,
                 "embeddings_generated": len(all_embeddings),
                 "processing_time": processing_time,
-                "chunk_types": list(set(chunk.metadata['chunk_type'] for chunk in pdf_chunks))
+                "chunk_types": list(set(chunk.metadata['chunk_type'] for chunk in pdf_chunks)),
+                "chunking": chunking
             }
             
         except Exception as e:
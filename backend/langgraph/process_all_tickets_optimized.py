@@ -78,11 +78,15 @@ async def process_all_tickets():
     print(f"\n⚙️ Production Settings:")
     print(f"   🔄 Embedding batch size: 32 (optimized for throughput)")
     print(f"   🧠 Memory efficient processing")
-    print(f"   ⚡ Parallel embedding generation enabled")
+    print(f"   ⚡ Parallel embedding generation enabled (EMBEDDING_WORKERS, default auto)")
     
     try:
         # Set production environment variables (reduced for stability)
-        os.environ['EMBEDDING_BATCH_SIZE'] = '16'   # Reduced batch for stability
+        os.environ.setdefault('EMBEDDING_BATCH_SIZE', '16')   # Reduced batch for stability
+        # Shard encoding across worker processes (one pinned model replica per core group)
+        os.environ.setdefault('EMBEDDING_WORKERS', 'auto')
+        from embedding_worker_pool import resolve_worker_count
+        print(f"   🏭 Embedding workers: {resolve_worker_count()} x {os.getenv('EMBEDDING_WORKER_THREADS', '2')} threads")
         os.environ['JIRA_CHUNK_SIZE'] = '8'         # Smaller chunks to prevent timeouts
         
         # Import and initialize workflow after env vars are set
@@ -117,6 +121,10 @@ async def process_all_tickets():
         print(f"🗄️  Vectors stored in Qdrant: {stats.get('vectors_stored', 0)}")
         print(f"🎫 JIRA vectors: {stats.get('jira_vectors', 0)}")
         print(f"⚡ Processing rate: {ticket_count/processing_time:.1f} tickets/minute")
+        cache_stats = stats.get('embedding_cache')
+        if cache_stats:
+            print(f"🗃️  Embedding cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                  f"({cache_stats['hit_rate']:.1%} hit rate, {cache_stats['size_mb']} MB on disk)")
         
         if result.get('errors'):
             print(f"\n⚠️  Errors encountered: {len(result['errors'])}")
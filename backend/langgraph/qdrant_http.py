@@ -0,0 +1,172 @@
+"""
+Qdrant HTTP Pool
+================
+
+One pooled httpx.AsyncClient per worker process for all Qdrant REST calls (ticket
+retrieval, semantic search, resolution assist, chat history).
+
+Creating a client per call opens a fresh TCP connection (and pool) every time; the
+shared client keeps connections alive between requests, so in steady state a chat
+turn reuses pooled connections instead of opening new ones. The client is created
+lazily on first use (per process, so it is safe across gunicorn forks) and closed by
+the app's shutdown hook.
+
+    async with qdrant_session(timeout=15.0) as client:
+        resp = await client.post(f"{qdrant_url}/collections/...", json=body)
+
+The session never closes the shared client; `timeout` only overrides the pool
+default for calls made through it.
+
+Environment Variables:
+  QDRANT_HTTP_MAX_CONNECTIONS: Pool size (default 32)
+  QDRANT_HTTP_MAX_KEEPALIVE: Idle connections kept open (default 16)
+  QDRANT_HTTP_KEEPALIVE_EXPIRY: Seconds an idle connection is kept (default 30)
+  QDRANT_HTTP_TIMEOUT: Default read/write/pool timeout in seconds (default 20)
+  QDRANT_HTTP_CONNECT_TIMEOUT: Connect timeout in seconds (default 5)
+  QDRANT_HTTP2: Use HTTP/2 when the h2 package is installed (default false)
+"""
+from __future__ import annotations
+import os
+import time
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_REQUEST_METHODS = {"get", "post", "put", "patch", "delete", "request"}
+
+
+class _ClientView:
+    """Shared client with a per-session default timeout."""
+
+    def __init__(self, client: httpx.AsyncClient, timeout: float):
+        self._client = client
+        self._timeout = timeout
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name not in _REQUEST_METHODS:
+            return attr
+
+        def call(*args, **kwargs):
+            kwargs.setdefault("timeout", self._timeout)
+            return attr(*args, **kwargs)
+        return call
+
+
+class QdrantHTTPPool:
+    def __init__(self):
+        self.max_connections = int(os.getenv("QDRANT_HTTP_MAX_CONNECTIONS", "32"))
+        self.max_keepalive = int(os.getenv("QDRANT_HTTP_MAX_KEEPALIVE", "16"))
+        self.keepalive_expiry = float(os.getenv("QDRANT_HTTP_KEEPALIVE_EXPIRY", "30"))
+        self.timeout = float(os.getenv("QDRANT_HTTP_TIMEOUT", "20"))
+        self.connect_timeout = float(os.getenv("QDRANT_HTTP_CONNECT_TIMEOUT", "5"))
+        self.http2 = os.getenv("QDRANT_HTTP2", "false").lower() in {"1", "true", "yes", "on"}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._pid: Optional[int] = None
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.requests = 0
+        self.errors = 0
+        self.connections_opened = 0
+        self.clients_created = 0
+        self.headers_s = 0.0
+
+    def _create_client(self) -> httpx.AsyncClient:
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("⚠️ QDRANT_HTTP2 set but h2 is not installed; using HTTP/1.1 keep-alive")
+                http2 = False
+        limits = httpx.Limits(max_connections=self.max_connections,
+                              max_keepalive_connections=self.max_keepalive,
+                              keepalive_expiry=self.keepalive_expiry)
+        timeout = httpx.Timeout(self.timeout, connect=self.connect_timeout)
+        client = httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2,
+                                   event_hooks={"request": [self._on_request], "response": [self._on_response]})
+        self.clients_created += 1
+        logger.info(f"🔌 Qdrant HTTP pool created (max_connections={self.max_connections}, "
+                    f"keepalive={self.max_keepalive}, http2={http2})")
+        return client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        pid = os.getpid()
+        if self._client is None or self._client.is_closed or self._pid != pid:
+            # A client inherited across fork shares sockets with the parent: never reuse it
+            self._client = self._create_client()
+            self._pid = pid
+        return self._client
+
+    async def _trace(self, event: str, info: Dict[str, Any]):
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    async def _on_request(self, request: httpx.Request):
+        request.extensions["trace"] = self._trace
+        request.extensions["pool_start"] = time.perf_counter()
+        self.requests += 1
+
+    async def _on_response(self, response: httpx.Response):
+        if response.status_code >= 500:
+            self.errors += 1
+        start = response.request.extensions.get("pool_start")
+        if start is not None:
+            self.headers_s += time.perf_counter() - start
+
+    @asynccontextmanager
+    async def session(self, timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        client = self.client
+        try:
+            yield client if timeout is None else _ClientView(client, timeout)
+        except httpx.TransportError:
+            self.errors += 1
+            raise
+
+    async def aclose(self):
+        if self._client is not None and self._pid == os.getpid() and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("🔌 Qdrant HTTP pool closed")
+        self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        open_connections = None
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        if pool is not None:
+            open_connections = len(getattr(pool, "connections", []))
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "connections_opened": self.connections_opened,
+            "connections_per_request": round(self.connections_opened / self.requests, 4) if self.requests else 0.0,
+            "open_connections": open_connections,
+            "clients_created": self.clients_created,
+            "time_to_headers_ms_avg": round(self.headers_s * 1000 / self.requests, 2) if self.requests else 0.0,
+            "max_connections": self.max_connections,
+            "http2": self.http2,
+        }
+
+
+def create_qdrant_http_pool() -> QdrantHTTPPool:
+    return QdrantHTTPPool()
+
+
+# Module-level singleton shared by the API and services
+qdrant_http_pool = create_qdrant_http_pool()
+
+
+def qdrant_session(timeout: Optional[float] = None):
+    return qdrant_http_pool.session(timeout)
+
+
+async def close_qdrant_http():
+    await qdrant_http_pool.aclose()
+
+
+__all__ = ["QdrantHTTPPool", "create_qdrant_http_pool", "qdrant_http_pool", "qdrant_session", "close_qdrant_http"]
@@ -0,0 +1,193 @@
+"""
+Rerank Score Cache
+==================
+
+In-memory LRU + TTL cache of cross-encoder scores, consulted by CrossEncoderEngine
+before queueing a job so only uncached (query, document) pairs reach the model.
+
+Entries are keyed by hash(model, max_length, normalized query) + hash(document text).
+Query normalization only folds differences the cross-encoder cannot see: surrounding
+and repeated whitespace always, letter case only when the tokenizer lowercases (the
+default ms-marco MiniLM tokenizer does).
+
+Scores of unchanged text do not go stale, but the cache is still dropped whenever the
+ingestion version changes, so re-ingested tickets are never ranked with scores of the
+text they replaced. The version lives in the shared state store (visible to every
+worker); ingestion calls bump_ingestion_version() after storing vectors and caches pick
+the change up within RERANK_CACHE_VERSION_CHECK_SECONDS. The version is read on a
+short-lived background thread, so lookups on the event loop never wait on the store.
+
+Environment Variables:
+  RERANK_CACHE_ENABLED: Set to false/0 to disable the cache (default true)
+  RERANK_CACHE_MAX_ENTRIES: Pairs kept before LRU eviction (default 50000)
+  RERANK_CACHE_TTL_SECONDS: Lifetime of one cached score (default 3600)
+  RERANK_CACHE_VERSION_CHECK_SECONDS: How often the ingestion version is re-read (default 10)
+"""
+from __future__ import annotations
+import os
+import re
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .shared_state import shared_state
+except ImportError:  # script mode
+    from shared_state import shared_state
+
+logger = logging.getLogger(__name__)
+
+INGESTION_VERSION_KEY = "ingestion_version"
+
+_WS_RE = re.compile(r"\s+")
+
+
+def _digest(*parts: str) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        h.update(p.encode("utf-8", errors="surrogatepass"))
+        h.update(b"\x00")
+    return h.digest()
+
+
+def normalize_query(query: str, lowercase: bool = False) -> str:
+    query = _WS_RE.sub(" ", query or "").strip()
+    return query.lower() if lowercase else query
+
+
+def current_ingestion_version() -> Optional[str]:
+    return shared_state.get(INGESTION_VERSION_KEY).get("version")
+
+
+def bump_ingestion_version(reason: str = "") -> str:
+    """Record a new ingestion version; every worker's rerank cache is dropped on its next check."""
+    version = uuid.uuid4().hex
+    shared_state.set(INGESTION_VERSION_KEY, {"version": version, "reason": reason,
+                                             "updated_at": datetime.now().isoformat()})
+    logger.info(f"🔖 Ingestion version bumped to {version} ({reason or 'unspecified'})")
+    return version
+
+
+class RerankScoreCache:
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 version_check_seconds: Optional[float] = None):
+        self.max_entries = int(max_entries or os.getenv("RERANK_CACHE_MAX_ENTRIES", "50000"))
+        self.ttl = float(ttl_seconds or os.getenv("RERANK_CACHE_TTL_SECONDS", "3600"))
+        self.version_check_seconds = float(version_check_seconds if version_check_seconds is not None
+                                           else os.getenv("RERANK_CACHE_VERSION_CHECK_SECONDS", "10"))
+        self._entries: "OrderedDict[Tuple[bytes, bytes], Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._version_checked = 0.0
+        self._version_refreshing = False
+        self.invalidations = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+
+    def _schedule_version_check(self):
+        """Start a background version read when one is due (never blocks the caller)."""
+        now = time.monotonic()
+        with self._lock:
+            if self._version_refreshing or now - self._version_checked < self.version_check_seconds:
+                return
+            self._version_checked = now
+            self._version_refreshing = True
+        threading.Thread(target=self._check_version, name="rerank-cache-version", daemon=True).start()
+
+    def _check_version(self):
+        """Read the ingestion version from the shared state store (blocking) and apply it."""
+        try:
+            version = current_ingestion_version()
+        except Exception as e:
+            logger.warning(f"⚠️ Rerank cache could not read ingestion version: {e}")
+            return
+        finally:
+            with self._lock:
+                self._version_refreshing = False
+        with self._lock:
+            if version != self._version:
+                if self._entries:
+                    self.invalidations += 1
+                    logger.info(f"🧹 Rerank cache cleared ({len(self._entries)} pairs): ingestion version {self._version} -> {version}")
+                self._entries.clear()
+                self._version = version
+
+    def query_key(self, model_name: str, max_length: int, query: str, lowercase: bool = False) -> bytes:
+        return _digest(model_name, str(max_length), normalize_query(query, lowercase))
+
+    def get_many(self, query_key: bytes, docs: Sequence[str]) -> List[Optional[float]]:
+        self._schedule_version_check()
+        now = time.monotonic()
+        out: List[Optional[float]] = []
+        with self._lock:
+            for d in docs:
+                key = (query_key, _digest(d))
+                hit = self._entries.get(key)
+                if hit is not None and hit[1] > now:
+                    self._entries.move_to_end(key)
+                    out.append(hit[0])
+                else:
+                    if hit is not None:
+                        del self._entries[key]
+                    out.append(None)
+            hits = sum(s is not None for s in out)
+            self.hits += hits
+            self.misses += len(out) - hits
+            self.requests += 1
+        return out
+
+    def put_many(self, query_key: bytes, docs: Sequence[str], scores: Sequence[float]):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for d, s in zip(docs, scores):
+                key = (query_key, _digest(d))
+                self._entries[key] = (float(s), expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "requests": self.requests,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "pairs_saved": self.hits,
+                "invalidations": self.invalidations,
+                "ingestion_version": self._version,
+            }
+
+
+def create_rerank_cache() -> Optional[RerankScoreCache]:
+    if os.getenv("RERANK_CACHE_ENABLED", "true").lower() not in {"1", "true", "yes", "on"}:
+        logger.info("Rerank score cache disabled (RERANK_CACHE_ENABLED=false)")
+        return None
+    return RerankScoreCache()
+
+
+__all__ = [
+    "RerankScoreCache",
+    "create_rerank_cache",
+    "normalize_query",
+    "bump_ingestion_version",
+    "current_ingestion_version",
+    "INGESTION_VERSION_KEY",
+]
@@ -0,0 +1,176 @@
+"""
+Rerank Cascade
+==============
+
+Decides, per search request, whether the cross-encoder is worth running after the
+composite (semantic + lexical) ranking and how many candidates it may see:
+
+1. Margin exit: when the composite score of the best candidate leads the runner-up by
+   at least RERANK_CASCADE_MARGIN (relative to the best score), composite order stands.
+2. Budget sizing: the rerank set is the largest prefix of the composite ranking the
+   cross-encoder can score within RERANK_LATENCY_BUDGET_MS, using a running estimate
+   of milliseconds per scored pair (score-cache hits excluded) plus per-job overhead
+   (queue wait included). If not even top_k pairs fit, the request keeps composite
+   order ("over_budget").
+3. Deadline: the rerank call itself is bounded by the budget; if it overruns, the
+   request degrades to composite ranking ("timeout") and the queued job is cancelled
+   when it has not started yet.
+
+Every request records the path taken and the estimated rerank time saved against
+always scoring the full candidate set.
+
+Environment Variables:
+  RERANK_CASCADE_ENABLED: Enable the cascade (default false: always rerank the full set)
+  RERANK_CASCADE_MARGIN: Relative top-1 vs top-2 composite gap that skips reranking (default 0.15)
+  RERANK_LATENCY_BUDGET_MS: Rerank time budget per request (default 150)
+  RERANK_CASCADE_PAIR_MS: Initial per-pair cost estimate before any measurement (default 6)
+"""
+from __future__ import annotations
+import os
+import time
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+PATHS = ("full", "rerank", "margin_skip", "over_budget", "timeout")
+
+
+@dataclass
+class CascadeDecision:
+    path: str
+    pairs: int
+    full_pairs: int
+    margin: float
+    budget_ms: Optional[float]
+    est_pair_ms: float
+    rerank_ms: float = 0.0
+    saved_ms_est: float = 0.0
+
+    @property
+    def rerank(self) -> bool:
+        return self.path in {"full", "rerank"}
+
+
+class RerankCascade:
+    def __init__(self, enabled: Optional[bool] = None, margin: Optional[float] = None,
+                 budget_ms: Optional[float] = None, pair_ms: Optional[float] = None):
+        if enabled is None:
+            enabled = os.getenv("RERANK_CASCADE_ENABLED", "false").lower() in {"1", "true", "yes", "on"}
+        self.enabled = enabled
+        self.margin = float(margin if margin is not None else os.getenv("RERANK_CASCADE_MARGIN", "0.15"))
+        self.budget_ms = float(budget_ms if budget_ms is not None else os.getenv("RERANK_LATENCY_BUDGET_MS", "150"))
+        # Running cost model: per-call overhead + per-pair time (exponentially weighted)
+        self.pair_ms = float(pair_ms if pair_ms is not None else os.getenv("RERANK_CASCADE_PAIR_MS", "6"))
+        self.overhead_ms = 5.0
+        self._alpha = 0.2
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.paths: Dict[str, int] = {p: 0 for p in PATHS}
+            self.saved_ms_est = 0.0
+            self.rerank_ms = 0.0
+            self.requests = 0
+
+    @staticmethod
+    def top_margin(scores: Sequence[float]) -> float:
+        """Relative lead of the best score over the runner-up (scores sorted descending)."""
+        if len(scores) < 2 or scores[0] <= 0:
+            return 0.0
+        return (scores[0] - scores[1]) / scores[0]
+
+    def decide(self, composite_scores: Sequence[float], top_k: int, full_pairs: int) -> CascadeDecision:
+        """Plan one request; composite_scores must be sorted descending."""
+        full_pairs = min(full_pairs, len(composite_scores))
+        margin = self.top_margin(composite_scores)
+        est = self.pair_ms
+        if not self.enabled:
+            return CascadeDecision("full", full_pairs, full_pairs, margin, None, est)
+        if full_pairs <= 1 or margin >= self.margin:
+            return CascadeDecision("margin_skip", 0, full_pairs, margin, self.budget_ms, est,
+                                   saved_ms_est=self._cost(full_pairs))
+        affordable = int((self.budget_ms - self.overhead_ms) // max(est, 1e-3))
+        pairs = min(full_pairs, affordable)
+        if pairs < min(top_k, full_pairs):
+            return CascadeDecision("over_budget", 0, full_pairs, margin, self.budget_ms, est,
+                                   saved_ms_est=self._cost(full_pairs))
+        return CascadeDecision("rerank", pairs, full_pairs, margin, self.budget_ms, est,
+                               saved_ms_est=self._cost(full_pairs) - self._cost(pairs))
+
+    def _cost(self, pairs: int) -> float:
+        return self.overhead_ms + self.pair_ms * pairs if pairs else 0.0
+
+    def _observe(self, pairs: int, elapsed_ms: float):
+        if pairs <= 0:
+            return
+        with self._lock:
+            per_pair = max(0.0, elapsed_ms - self.overhead_ms) / pairs
+            self.pair_ms = (1 - self._alpha) * self.pair_ms + self._alpha * per_pair
+
+    async def run(self, decision: CascadeDecision, call: Awaitable[Any],
+                  info: Optional[Dict[str, int]] = None) -> Optional[Any]:
+        """Await the rerank call within the budget; None (and path "timeout") when it overruns.
+
+        info is the call's {"scored": ...} counts once it completes: only pairs the model
+        actually scored (not score-cache hits) feed the per-pair cost estimate.
+        """
+        timeout = decision.budget_ms / 1000.0 if decision.budget_ms else None
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError:
+            decision.rerank_ms = (time.perf_counter() - start) * 1000
+            decision.path = "timeout"
+            # Elapsed time is only a lower bound of the job's cost: never estimate below it
+            if decision.pairs:
+                with self._lock:
+                    self.pair_ms = max(self.pair_ms, (decision.rerank_ms - self.overhead_ms) / decision.pairs)
+            decision.saved_ms_est = max(0.0, self._cost(decision.full_pairs) - decision.rerank_ms)
+            return None
+        decision.rerank_ms = (time.perf_counter() - start) * 1000
+        scored = decision.pairs if info is None else int(info.get("scored", 0))
+        self._observe(scored, decision.rerank_ms)
+        if decision.path == "full":
+            decision.saved_ms_est = 0.0
+        return result
+
+    def record(self, decision: CascadeDecision) -> Dict[str, Any]:
+        with self._lock:
+            self.requests += 1
+            self.paths[decision.path] = self.paths.get(decision.path, 0) + 1
+            self.saved_ms_est += decision.saved_ms_est
+            self.rerank_ms += decision.rerank_ms
+        info = asdict(decision)
+        for k in ("margin", "est_pair_ms", "rerank_ms", "saved_ms_est"):
+            info[k] = round(info[k], 3)
+        logger.info(f"🪜 Rerank cascade: path={decision.path} pairs={decision.pairs}/{decision.full_pairs} "
+                    f"margin={decision.margin:.3f} rerank={decision.rerank_ms:.0f}ms saved≈{decision.saved_ms_est:.0f}ms")
+        return info
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "margin": self.margin,
+                "budget_ms": self.budget_ms,
+                "est_pair_ms": round(self.pair_ms, 3),
+                "requests": self.requests,
+                "paths": dict(self.paths),
+                "rerank_ms_total": round(self.rerank_ms, 1),
+                "saved_ms_est_total": round(self.saved_ms_est, 1),
+            }
+
+
+def create_rerank_cascade() -> RerankCascade:
+    return RerankCascade()
+
+
+# Module-level singleton used by the API
+rerank_cascade = create_rerank_cascade()
+
+__all__ = ["RerankCascade", "CascadeDecision", "create_rerank_cascade", "rerank_cascade"]
@@ -30,13 +30,21 @@ from __future__ import annotations
 import os
 import logging
 from typing import List, Dict, Any, Optional
-import httpx
+try:
+    from .shared_state import shared_state
+    from .qdrant_http import qdrant_session
+    from .payload_projection import (ANALYSIS_FIELDS, POINT_ID_KEY, hydrate_payloads, payload_fields,
+                                     payload_projection_enabled, projection_stats)
+    from .ticket_doc_store import fill_from_doc_store
+except ImportError:  # script mode
+    from shared_state import shared_state
+    from qdrant_http import qdrant_session
+    from payload_projection import (ANALYSIS_FIELDS, POINT_ID_KEY, hydrate_payloads, payload_fields,
+                                    payload_projection_enabled, projection_stats)
+    from ticket_doc_store import fill_from_doc_store
 
 logger = logging.getLogger(__name__)
 
-# Debug storage for last assist call
-_LAST_ASSIST_DEBUG: Dict[str, Any] = {}
-
 class ResolutionAssistService:
     def __init__(
         self,
@@ -85,9 +93,9 @@ class ResolutionAssistService:
                 refs = await self._retrieve_resolved_references_lexical(details, max_refs)
         else:
             refs = await self._retrieve_resolved_references_lexical(details, max_refs)
-        # Store debug info
+        # Store debug info (shared across API workers)
         try:
-            _LAST_ASSIST_DEBUG.update({
+            await shared_state.aset('last_assist', {
                 'ticket_key': ticket_key,
                 'status': status,
                 'semantic_enabled': self.semantic_enabled,
@@ -124,10 +132,10 @@ class ResolutionAssistService:
         """Existing scroll + lexical overlap heuristic."""
         refs: List[Dict[str, Any]] = []
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
+            async with qdrant_session(timeout=15.0) as client:
                 body = {
                     "limit": 300,
-                    "with_payload": True,
+                    "with_payload": payload_fields("resolved_refs"),
                     "filter": {"must": [
                         {"key": "is_resolved", "match": {"value": True}},
                         {"key": "ingestion_version", "match": {"value": self.ingestion_version}}
@@ -136,6 +144,7 @@ class ResolutionAssistService:
                 resp = await client.post(f"{self.qdrant_url}/collections/jira_tickets/points/scroll", json=body)
                 if resp.status_code == 200:
                     points = resp.json().get('result', {}).get('points', [])
+                    projection_stats.record("resolved_refs", len(resp.content), len(points))
                     target_words = set(details.get('summary','').lower().split())
                     scored = []
                     for p in points:
@@ -143,9 +152,11 @@ class ResolutionAssistService:
                         summary = (pl.get('summary') or '').lower()
                         overlap = len(target_words & set(summary.split()))
                         if overlap >= self.min_overlap:
-                            scored.append((overlap, pl))
+                            scored.append((overlap, p.get('id'), pl))
                     scored.sort(key=lambda x: x[0], reverse=True)
-                    for overlap, pl in scored[:max_refs]:
+                    top = [(overlap, {**pl, POINT_ID_KEY: pid}) for overlap, pid, pl in scored[:max_refs]]
+                    await hydrate_payloads(self.qdrant_url, "jira_tickets", [pl for _, pl in top], ANALYSIS_FIELDS)
+                    for overlap, pl in top:
                         refs.append({
                             'ticket_key': pl.get('ticket_key'),
                             'status': pl.get('status'),
@@ -169,14 +180,15 @@ class ResolutionAssistService:
             description = (details.get('description') or '')[:1500]
             query_text = f"{summary}\n{description}".strip()
             # Generate embedding
-            vector = self.embedding_service.get_embedding(query_text)  # synchronous call
+            vector = await self.embedding_service.get_embedding_async(query_text)
             # Perform search with filters
             filters = {"is_resolved": True, "ingestion_version": self.ingestion_version}
             results = await self.qdrant_service.search_all_tickets(
                 query_vector=vector,
                 limit=max_refs * 3,  # over-fetch for re-rank
                 score_threshold=self.semantic_threshold,
-                filters=filters
+                filters=filters,
+                with_payload=payload_fields("resolved_refs_semantic")
             )
             if not results:
                 return []
@@ -193,6 +205,7 @@ class ResolutionAssistService:
                 base_score = r.get('score', 0.0)
                 adjusted = base_score * (1 + 0.05 * label_overlap + 0.07 * component_overlap)
                 enriched.append({
+                    'id': r.get('id'),
                     'payload': pl,
                     'score': base_score,
                     'adjusted_score': adjusted,
@@ -200,9 +213,17 @@ class ResolutionAssistService:
                     'component_overlap': component_overlap
                 })
             enriched.sort(key=lambda x: x['adjusted_score'], reverse=True)
+            top = [{**item['payload'], POINT_ID_KEY: item['id']} for item in enriched[:max_refs]]
+            # Analyses: doc store for doc_ref payloads, lazy Qdrant fetch for the rest
+            missing = await fill_from_doc_store(top, ANALYSIS_FIELDS)
+            if missing and payload_projection_enabled():
+                analyses = await self.qdrant_service.retrieve_payloads(
+                    self.qdrant_service.global_collection_name, [pl[POINT_ID_KEY] for pl in missing],
+                    list(ANALYSIS_FIELDS))
+                for pl in missing:
+                    pl.update(analyses.get(pl[POINT_ID_KEY], {}))
             refs: List[Dict[str, Any]] = []
-            for item in enriched[:max_refs]:
-                pl = item['payload']
+            for item, pl in zip(enriched[:max_refs], top):
                 # Provide pseudo-overlap integer for backward UI compatibility (scaled)
                 pseudo_overlap = int(round(item['adjusted_score'] * 100))
                 refs.append({
@@ -261,6 +282,6 @@ class ResolutionAssistService:
         )
 
 
-def get_last_assist_debug() -> Dict[str, Any]:
+async def get_last_assist_debug() -> Dict[str, Any]:
     """Accessor for last assist debug info."""
-    return dict(_LAST_ASSIST_DEBUG) if _LAST_ASSIST_DEBUG else {}
+    return await shared_state.aget('last_assist')
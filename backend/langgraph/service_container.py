@@ -0,0 +1,151 @@
+"""
+Service Container
+=================
+
+Lazily loads application components in background tasks and tracks per-component
+readiness, so the API can answer /health immediately while heavy models
+(BGE, cross-encoders) and remote connections (Qdrant) come up.
+
+Each component has a loader (sync loaders run in the default executor, async loaders
+are awaited), optional dependencies that must be ready first, and a state:
+pending -> loading -> ready | failed, or disabled when switched off by configuration.
+
+Endpoints declare what they need with ``Depends(container.require("embedding", ...))``;
+a missing dependency yields a fast 503 with Retry-After while it is still loading.
+
+Environment Variables:
+  SERVICE_RETRY_AFTER_SECONDS: Retry-After value for components still loading (default 5)
+"""
+from __future__ import annotations
+import os
+import time
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+PENDING, LOADING, READY, FAILED, DISABLED = "pending", "loading", "ready", "failed", "disabled"
+
+
+@dataclass
+class _Component:
+    name: str
+    loader: Optional[Callable[[], Any]]
+    depends_on: Sequence[str] = ()
+    registry_key: Optional[str] = None
+    state: str = PENDING
+    instance: Any = None
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    load_seconds: Optional[float] = None
+    event: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class ServiceContainer:
+    def __init__(self, registry: Optional[Dict[str, Any]] = None, retry_after: Optional[int] = None):
+        # Loaded instances are also published into ``registry`` (the app's services dict)
+        self.registry = registry if registry is not None else {}
+        self.retry_after = int(retry_after or os.getenv("SERVICE_RETRY_AFTER_SECONDS", "5"))
+        self._components: Dict[str, _Component] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def register(self, name: str, loader: Callable[[], Any], depends_on: Sequence[str] = (),
+                 registry_key: Optional[str] = None):
+        """Add a component; ``registry_key`` overrides the key it is published under in the registry."""
+        self._components[name] = _Component(name=name, loader=loader, depends_on=tuple(depends_on),
+                                            registry_key=registry_key)
+
+    def disable(self, name: str, reason: str):
+        comp = _Component(name=name, loader=None, state=DISABLED, error=reason)
+        comp.event.set()
+        self._components[name] = comp
+
+    def start(self):
+        """Schedule every pending component; returns immediately."""
+        for name, comp in self._components.items():
+            if comp.state == PENDING and name not in self._tasks:
+                self._tasks[name] = asyncio.create_task(self._load(comp))
+
+    async def _load(self, comp: _Component):
+        try:
+            for dep in comp.depends_on:
+                if not await self.wait_ready(dep):
+                    raise RuntimeError(f"dependency '{dep}' unavailable: {self.status(dep).get('error')}")
+            comp.state = LOADING
+            comp.started_at = time.time()
+            if inspect.iscoroutinefunction(comp.loader):
+                instance = await comp.loader()
+            else:
+                instance = await asyncio.get_event_loop().run_in_executor(None, comp.loader)
+            comp.instance = instance
+            if instance is not None:
+                self.registry[comp.registry_key or comp.name] = instance
+            comp.state = READY
+            comp.load_seconds = round(time.time() - comp.started_at, 2)
+            logger.info(f"✅ Component '{comp.name}' ready in {comp.load_seconds}s")
+        except Exception as e:
+            comp.state = FAILED
+            comp.error = str(e)
+            logger.error(f"❌ Component '{comp.name}' failed to load: {e}")
+        finally:
+            comp.event.set()
+
+    async def wait_ready(self, name: str, timeout: Optional[float] = None) -> bool:
+        comp = self._components.get(name)
+        if comp is None:
+            return False
+        try:
+            await asyncio.wait_for(comp.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return comp.state == READY
+
+    def is_ready(self, name: str) -> bool:
+        comp = self._components.get(name)
+        return comp is not None and comp.state == READY
+
+    def get(self, name: str) -> Any:
+        """Loaded instance or None (never blocks)."""
+        comp = self._components.get(name)
+        return comp.instance if comp is not None and comp.state == READY else None
+
+    def status(self, name: str) -> Dict[str, Any]:
+        comp = self._components.get(name)
+        if comp is None:
+            return {"state": "unregistered"}
+        info: Dict[str, Any] = {"state": comp.state}
+        if comp.error:
+            info["error"] = comp.error
+        if comp.load_seconds is not None:
+            info["load_seconds"] = comp.load_seconds
+        elif comp.state == LOADING and comp.started_at:
+            info["loading_for_seconds"] = round(time.time() - comp.started_at, 1)
+        return info
+
+    def readiness(self) -> Dict[str, Dict[str, Any]]:
+        return {name: self.status(name) for name in self._components}
+
+    def require(self, *names: str):
+        """FastAPI dependency: 503 unless every named component is ready.
+
+        Retry-After is only sent while a component is still pending/loading; failed or
+        disabled components return a plain 503 since retrying will not help.
+        """
+        from fastapi import HTTPException
+
+        async def _dependency():
+            not_ready = {n: self.status(n) for n in names if not self.is_ready(n)}
+            if not not_ready:
+                return
+            loading = [n for n, s in not_ready.items() if s["state"] in (PENDING, LOADING)]
+            headers = {"Retry-After": str(self.retry_after)} if loading else None
+            detail = {"message": "Required services not ready", "components": not_ready}
+            raise HTTPException(status_code=503, detail=detail, headers=headers)
+
+        return _dependency
+
+
+__all__ = ["ServiceContainer", "PENDING", "LOADING", "READY", "FAILED", "DISABLED"]
@@ -0,0 +1,109 @@
+"""
+Shared State Store
+==================
+
+Small JSON documents (last prompt / last assist debug records) that must be visible
+to every API worker process, not just the one that handled the request.
+
+Backed by Redis when REDIS_URL is set and the redis package is installed; otherwise
+by one JSON file per key in a local directory, written atomically (temp file +
+rename) so concurrent workers never read a half-written record. Redis errors fall
+back to the file store.
+
+set/get block (Redis round trip or file I/O); async code uses aset/aget, which run
+them on a worker thread so the event loop never waits on the store.
+
+Environment Variables:
+  REDIS_URL: e.g. redis://localhost:6379/0 (optional)
+  SHARED_STATE_DIR: Directory for the file backend (default /tmp/combot_shared_state)
+  SHARED_STATE_TTL_SECONDS: Expiry for Redis keys (default 86400)
+"""
+from __future__ import annotations
+import os
+import json
+import asyncio
+import logging
+import tempfile
+from typing import Any, Dict, Optional
+
+try:
+    import redis  # type: ignore
+except ImportError:  # pragma: no cover
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "combot:state:"
+
+
+class SharedStateStore:
+    def __init__(self, redis_url: Optional[str] = None, directory: Optional[str] = None, ttl: Optional[int] = None):
+        self.directory = directory or os.getenv("SHARED_STATE_DIR", "/tmp/combot_shared_state")
+        self.ttl = int(ttl or os.getenv("SHARED_STATE_TTL_SECONDS", "86400"))
+        os.makedirs(self.directory, exist_ok=True)
+        self._redis = None
+        redis_url = redis_url or os.getenv("REDIS_URL")
+        if redis_url and redis is not None:
+            # Connections are opened lazily (per process), so this is safe to build before fork
+            self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        elif redis_url:
+            logger.warning("⚠️ REDIS_URL set but redis package not installed; using file-backed shared state")
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self._redis is not None else "file"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Replace the record stored under key."""
+        data = json.dumps(value, default=str)
+        if self._redis is not None:
+            try:
+                self._redis.set(KEY_PREFIX + key, data, ex=self.ttl)
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Redis shared state write failed, using file store: {e}")
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def get(self, key: str) -> Dict[str, Any]:
+        """Record stored under key, or {} when absent."""
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(KEY_PREFIX + key)
+                if raw is not None:
+                    return json.loads(raw)
+            except Exception as e:
+                logger.warning(f"⚠️ Redis shared state read failed, using file store: {e}")
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    async def aset(self, key: str, value: Dict[str, Any]):
+        await asyncio.to_thread(self.set, key, value)
+
+    async def aget(self, key: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.get, key)
+
+
+def create_shared_state_store() -> SharedStateStore:
+    return SharedStateStore()
+
+
+# Module-level singleton used by the API and services
+shared_state = create_shared_state_store()
+
+__all__ = ["SharedStateStore", "create_shared_state_store", "shared_state"]
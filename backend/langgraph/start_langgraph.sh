@@ -51,7 +51,7 @@ echo "✅ Docker services check complete"
 
 # Install dependencies if needed
 echo "📦 Checking Python dependencies..."
-pip install -q fastapi uvicorn python-multipart python-dotenv
+pip install -q fastapi uvicorn gunicorn python-multipart python-dotenv
 
 # Start the FastAPI server
 echo "🌟 Starting LangGraph FastAPI server on http://localhost:8000"
@@ -61,5 +61,11 @@ echo ""
 echo "Press Ctrl+C to stop the server"
 echo ""
 
+# Multi-worker: models are preloaded in the gunicorn master and shared copy-on-write
+if [ "${WEB_CONCURRENCY:-1}" -gt 1 ]; then
+    echo "👷 Starting $WEB_CONCURRENCY gunicorn workers (preloaded models)"
+    cd ../.. && exec gunicorn -c backend/langgraph/gunicorn_conf.py backend.langgraph.app_langgraph:app
+fi
+
 # Run with uvicorn
 uvicorn app_langgraph:app --host 0.0.0.0 --port 8000 --reload --log-level info
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Ticket Collapse
+===============
+
+Folds retrieval candidates into one candidate per ticket before cross-encoding.
+
+Semantic search returns several chunks of the same ticket; reranking each of them
+spends pairs on duplicates and makes the ticket's final score depend on which of its
+chunks happened to be scored last. Collapsing keeps the best-scoring chunk as the
+ticket's candidate and attaches all of its chunks (best first) under "chunks", so the
+reranker can score either that chunk ("best") or the ticket's best spans packed up to
+the token window ("concat", see TicketCrossEncoderReranker.pack_spans).
+
+Environment Variables:
+  TICKET_COLLAPSE_MODE: best (default), concat, or off (rerank every chunk)
+"""
+from __future__ import annotations
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+COLLAPSE_MODES = ("best", "concat", "off")
+
+
+def ticket_collapse_mode() -> str:
+    mode = os.getenv("TICKET_COLLAPSE_MODE", "best").strip().lower()
+    return mode if mode in COLLAPSE_MODES else "best"
+
+
+def collapse_by_ticket(candidates: Sequence[Dict[str, Any]], key: Callable[[Dict[str, Any]], Optional[str]],
+                       score_key: str = "composite_score") -> List[Dict[str, Any]]:
+    """One candidate per ticket, ordered by best score; members (best first) under "chunks".
+
+    Candidates without a key are kept as their own group. Ties keep input order, so the
+    result is deterministic for a given retrieval.
+    """
+    ordered = sorted(candidates, key=lambda c: c.get(score_key, 0.0), reverse=True)
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for i, cand in enumerate(ordered):
+        groups.setdefault(key(cand) or ("__unkeyed__", i), []).append(cand)
+    collapsed = []
+    for members in groups.values():
+        best = dict(members[0])
+        best["chunks"] = members
+        collapsed.append(best)
+    return collapsed
+
+
+__all__ = ["COLLAPSE_MODES", "collapse_by_ticket", "ticket_collapse_mode"]
@@ -0,0 +1,91 @@
+"""
+Ticket Context Fetch
+====================
+
+Batched chunk retrieval for the tickets mentioned in a chat message.
+
+Ticket keys are normalized once (upper-case key plus the lower-case and as-written
+variants stored by older ingestions) and every variant of every ticket goes into a
+single filtered scroll (`match: {any: [...]}` on the indexed ticket_key field),
+paginated by next_page_offset until each ticket has its chunks or the pages run
+out. Once a ticket has its chunks its variants leave the filter of the following
+pages, so a ticket with many chunks cannot crowd the others out of the page cap.
+Results are grouped per ticket on the client, so a message mentioning N tickets
+costs one round trip in the common case instead of up to 3*N.
+
+Environment Variables:
+  TICKET_CONTEXT_MAX_PAGES: Scroll pages fetched per message at most (default 4)
+"""
+from __future__ import annotations
+import os
+import re
+import logging
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+try:
+    from .payload_projection import projection_stats
+except ImportError:  # script mode
+    from payload_projection import projection_stats
+
+logger = logging.getLogger(__name__)
+
+# Allow alphanumeric project keys (letters+digits) before dash
+TICKET_KEY_PATTERN = re.compile(r'[A-Z0-9]{2,10}-\d{1,7}')
+_WRITTEN_KEY_PATTERN = re.compile(r'[A-Za-z]{2,10}-\d{1,7}')
+
+
+def mentioned_ticket_keys(message: str, max_tickets: int = 3) -> Dict[str, List[str]]:
+    """{normalized ticket key: stored-key variants} for the tickets mentioned in a message."""
+    mentioned = list(dict.fromkeys(TICKET_KEY_PATTERN.findall(message.upper())))[:max_tickets]
+    written = _WRITTEN_KEY_PATTERN.findall(message)
+    keys: Dict[str, List[str]] = {}
+    for tk in mentioned:
+        variants = [tk, tk.lower()] + [w for w in written if w.upper() == tk]
+        keys[tk] = list(dict.fromkeys(variants))
+    return keys
+
+
+async def scroll_ticket_chunks(client, qdrant_url: str, keys: Dict[str, Sequence[str]], per_ticket_limit: int,
+                               ingestion_version: str, with_payload: Union[bool, List[str]] = True,
+                               collection: str = "jira_tickets") -> Tuple[Dict[str, List[Dict[str, Any]]], int]:
+    """({ticket: up to per_ticket_limit points}, scroll requests) with one MatchAny scroll over all variants."""
+    grouped: Dict[str, List[Dict[str, Any]]] = {tk: [] for tk in keys}
+    variant_to_ticket = {v: tk for tk, variants in keys.items() for v in variants}
+    if not variant_to_ticket:
+        return grouped, 0
+    max_pages = int(os.getenv("TICKET_CONTEXT_MAX_PAGES", "4"))
+    key_match: Dict[str, Any] = {"key": "ticket_key", "match": {"any": list(variant_to_ticket)}}
+    body: Dict[str, Any] = {
+        "limit": per_ticket_limit * len(keys),
+        "with_payload": with_payload,
+        "filter": {"must": [
+            key_match,
+            {"key": "ingestion_version", "match": {"value": ingestion_version}}
+        ]}
+    }
+    requests = 0
+    while requests < max_pages:
+        resp = await client.post(f"{qdrant_url}/collections/{collection}/points/scroll", json=body)
+        requests += 1
+        if resp.status_code != 200:
+            logger.warning(f"Ticket context scroll HTTP {resp.status_code}: {resp.text[:160]}")
+            break
+        result = resp.json().get('result', {}) or {}
+        points = result.get('points', []) or []
+        projection_stats.record("ticket_context", len(resp.content), len(points))
+        for p in points:
+            tk = variant_to_ticket.get((p.get('payload') or {}).get('ticket_key'))
+            if tk is not None and len(grouped[tk]) < per_ticket_limit:
+                grouped[tk].append(p)
+        next_offset = result.get('next_page_offset')
+        open_tickets = [tk for tk, g in grouped.items() if len(g) < per_ticket_limit]
+        if next_offset is None or not open_tickets:
+            break
+        # Scroll order is by point id, so the offset stays valid for the narrowed filter
+        key_match["match"] = {"any": [v for v, tk in variant_to_ticket.items() if tk in open_tickets]}
+        body["limit"] = per_ticket_limit * len(open_tickets)
+        body["offset"] = next_offset
+    return grouped, requests
+
+
+__all__ = ["TICKET_KEY_PATTERN", "mentioned_ticket_keys", "scroll_ticket_chunks"]
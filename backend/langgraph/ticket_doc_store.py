@@ -0,0 +1,240 @@
+"""
+Ticket Document Store
+=====================
+
+Local side store for the heavy text of each JIRA ticket, keyed by ticket_key.
+
+Every chunk of a ticket used to carry the full description, the concatenated
+comments and both analyses in its Qdrant payload (up to ~48 KB repeated per chunk).
+Ingestion now writes those fields once per ticket into a single SQLite file as a
+compressed JSON blob (zstd when the zstandard package is installed, zlib otherwise;
+the codec is recorded per row), and the chunk payload keeps only `doc_ref` plus
+the short fields. Readers resolve `doc_ref`s in one batched lookup (get_many /
+aget_many); payloads without a `doc_ref` (collections ingested before the store)
+still carry the fields inline.
+
+The store is opt-in. Every process that reads ticket payloads (API workers on any host
+or container, resolution assist, analyze) must see the same file the ingestion wrote,
+e.g. a shared volume with TICKET_DOC_STORE_PATH set explicitly. Switching it on only
+affects tickets ingested afterwards: re-ingest the collection into the shared store to
+move existing payloads over. A doc_ref that cannot be resolved (store disabled, or a
+different file) is logged and counted as a miss in stats().
+
+Environment Variables:
+  TICKET_DOC_STORE_ENABLED: Set to true to move heavy fields out of the chunk payloads (default false)
+  TICKET_DOC_STORE_PATH: Location of the store (default ~/.cache/combot/ticket_docs.sqlite3)
+  TICKET_DOC_STORE_LEVEL: Compression level (default 3 for zstd, 6 for zlib)
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import zlib
+import asyncio
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib is used instead
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "combot", "ticket_docs.sqlite3")
+
+# Payload fields moved out of the chunk payloads
+HEAVY_FIELDS = ("description_full", "comments_concat", "l1_l2_analysis", "l3_engineer_analysis")
+DOC_REF_KEY = "doc_ref"
+
+
+def ticket_doc_store_enabled() -> bool:
+    return os.getenv("TICKET_DOC_STORE_ENABLED", "false").lower() in {"1", "true", "yes", "on"}
+
+
+def split_heavy_fields(metadata: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(payload with a doc_ref instead of the heavy fields, heavy fields) for one ticket's metadata."""
+    heavy = {f: metadata[f] for f in HEAVY_FIELDS if f in metadata}
+    light = {k: v for k, v in metadata.items() if k not in heavy}
+    light[DOC_REF_KEY] = metadata.get("ticket_key")
+    return light, heavy
+
+
+class TicketDocStore:
+    """Single-file {ticket_key: compressed JSON of heavy fields} store."""
+
+    def __init__(self, path: str | None = None, level: int | None = None):
+        self.path = path or os.getenv("TICKET_DOC_STORE_PATH", DEFAULT_STORE_PATH)
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        if level is None:
+            level = int(os.getenv("TICKET_DOC_STORE_LEVEL", "3" if self.codec == "zstd" else "6"))
+        self.level = level if self.codec == "zstd" else max(0, min(9, level))
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ticket_docs ("
+            " ticket_key TEXT PRIMARY KEY,"
+            " codec TEXT NOT NULL,"
+            " doc BLOB NOT NULL,"
+            " raw_bytes INTEGER NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+        logger.info(f"🗄️ Ticket doc store at {self.path} ({self.codec}, level {self.level})")
+
+    def _compress(self, raw: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=self.level).compress(raw)
+        return zlib.compress(raw, self.level)
+
+    @staticmethod
+    def _decompress(codec: str, blob: bytes) -> bytes:
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("ticket doc written with zstd but the zstandard package is not installed")
+            return zstandard.ZstdDecompressor().decompress(blob)
+        return zlib.decompress(blob)
+
+    def put_many(self, docs: Dict[str, Dict[str, Any]]):
+        """Store (replace) the heavy fields of each ticket."""
+        if not docs:
+            return
+        now = time.time()
+        rows = []
+        for key, fields in docs.items():
+            raw = json.dumps(fields, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            rows.append((key, self.codec, self._compress(raw), len(raw), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO ticket_docs (ticket_key, codec, doc, raw_bytes, updated_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def get_many(self, keys: Iterable[str], fields: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """{ticket_key: heavy fields (restricted to `fields`)} for the keys present in the store."""
+        unique_keys = [k for k in dict.fromkeys(keys) if k]
+        found: Dict[str, Dict[str, Any]] = {}
+        if not unique_keys:
+            return found
+        rows = []
+        with self._lock:
+            # SQLite caps bound parameters per statement, so look up in slices
+            for i in range(0, len(unique_keys), 500):
+                part = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows.extend(self._conn.execute(
+                    f"SELECT ticket_key, codec, doc FROM ticket_docs WHERE ticket_key IN ({placeholders})", part
+                ).fetchall())
+        for key, codec, blob in rows:
+            doc = json.loads(self._decompress(codec, bytes(blob)))
+            found[key] = {f: doc.get(f) for f in fields} if fields else doc
+        missed = len(unique_keys) - len(found)
+        with self._lock:
+            self.lookups += len(unique_keys)
+            self.hits += len(found)
+            self.misses += missed
+        if missed:
+            sample = [k for k in unique_keys if k not in found][:5]
+            logger.warning(f"⚠️ Ticket doc store {self.path}: {missed} doc_ref(s) not found (e.g. {sample}); "
+                           f"was the ingestion written to a different store?")
+        return found
+
+    async def aget_many(self, keys: Iterable[str], fields: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_many, list(keys), fields)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0), COALESCE(SUM(LENGTH(doc)), 0) FROM ticket_docs"
+            ).fetchone()
+        tickets, raw_bytes, stored_bytes = int(row[0]), int(row[1]), int(row[2])
+        try:
+            file_bytes = os.path.getsize(self.path)
+        except OSError:
+            file_bytes = 0
+        return {
+            "path": self.path,
+            "codec": self.codec,
+            "tickets": tickets,
+            "raw_mb": round(raw_bytes / 1024**2, 2),
+            "stored_mb": round(stored_bytes / 1024**2, 2),
+            "compression_ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else 0.0,
+            "file_mb": round(file_bytes / 1024**2, 2),
+            "lookups": self.lookups,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+
+
+_store: Optional[TicketDocStore] = None
+_store_lock = threading.Lock()
+
+
+def get_ticket_doc_store() -> Optional[TicketDocStore]:
+    """Process-wide store from environment settings; None when disabled or unusable."""
+    global _store
+    if not ticket_doc_store_enabled():
+        return None
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = TicketDocStore()
+            except Exception as e:
+                logger.warning(f"Ticket doc store unavailable, keeping heavy fields in payloads: {e}")
+                return None
+        return _store
+
+
+async def resolve_doc_refs(refs: Sequence[str], fields: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """{doc_ref: heavy fields} in one lookup; logs (never raises) when refs cannot be resolved."""
+    refs = [r for r in refs if r]
+    if not refs:
+        return {}
+    store = get_ticket_doc_store()
+    if store is None:
+        logger.warning(f"⚠️ {len(set(refs))} payload(s) carry a doc_ref but the ticket doc store is disabled "
+                       f"or unavailable; their heavy fields are missing (set TICKET_DOC_STORE_ENABLED/_PATH)")
+        return {}
+    try:
+        return await store.aget_many(refs, fields)
+    except Exception as e:
+        logger.warning(f"Ticket doc store lookup failed: {e}")
+        return {}
+
+
+async def fill_from_doc_store(rows: List[Dict[str, Any]], fields: Sequence[str]) -> List[Dict[str, Any]]:
+    """Fill `fields` into payload dicts that carry a doc_ref (one lookup); returns the rows still missing fields."""
+    pending = [r for r in rows if any(f not in r for f in fields)]
+    refs = [r.get(DOC_REF_KEY) for r in pending if r.get(DOC_REF_KEY)]
+    docs = await resolve_doc_refs(refs, fields)
+    if not docs:
+        return pending
+    missing = []
+    for r in pending:
+        doc = docs.get(r.get(DOC_REF_KEY))
+        if doc is None:
+            missing.append(r)
+            continue
+        for f in fields:
+            r.setdefault(f, doc.get(f))
+    return missing
+
+
+__all__ = ["HEAVY_FIELDS", "DOC_REF_KEY", "TicketDocStore", "ticket_doc_store_enabled", "split_heavy_fields",
+           "get_ticket_doc_store", "resolve_doc_refs", "fill_from_doc_store"]
@@ -1,91 +1,132 @@
 """Ticket Cross-Encoder Reranker Service
 Adapts the old backend LocalHuggingFaceRerankerService for ticket semantic reranking.
-Lightweight wrapper with async API and graceful fallbacks.
+Lightweight wrapper with async API and graceful fallbacks; scoring runs on the shared
+cross-encoder engine (cross_encoder_engine.py) at interactive priority.
+
+pack_spans() builds the rerank text of a ticket collapsed by ticket_collapse.py in
+concat mode: its best chunks in score order, up to the model's token window.
 """
+import os
 import logging
-import asyncio
-from typing import List, Dict, Any, Optional
-from concurrent.futures import ThreadPoolExecutor
-import time
+from typing import Any, Dict, List, Optional, Sequence
 
 try:
-    import torch  # type: ignore
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification  # type: ignore
-except Exception:  # pragma: no cover
-    torch = None  # type: ignore
-    AutoTokenizer = None  # type: ignore
-    AutoModelForSequenceClassification = None  # type: ignore
+    from .cross_encoder_engine import (DEFAULT_RERANK_MODEL, PRIORITY_INTERACTIVE, RerankQueueFull,
+                                       get_cross_encoder_engine)
+    from .length_bucketing import length_bucketing_enabled
+except ImportError:  # script mode
+    from cross_encoder_engine import (DEFAULT_RERANK_MODEL, PRIORITY_INTERACTIVE, RerankQueueFull,
+                                      get_cross_encoder_engine)
+    from length_bucketing import length_bucketing_enabled
 
 logger = logging.getLogger(__name__)
 
-DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L6-v2"
+SPAN_SEPARATOR = "\n...\n"
+
 
 class TicketCrossEncoderReranker:
-    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, max_workers: int = 2):
+    """Ticket rerank API over the shared cross-encoder engine (model loaded once per process)."""
+
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, priority: int = PRIORITY_INTERACTIVE):
         self.model_name = model_name
-        self.tokenizer = None
-        self.model = None
-        self.device = None
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
-        self.is_initialized = False
-        self._init_error: Optional[str] = None
+        self.engine = get_cross_encoder_engine(model_name)
+        self.priority = priority
+        self.batch_size = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+        self.length_bucketing = length_bucketing_enabled()
+        self.max_length = 256
+
+    @property
+    def is_initialized(self) -> bool:
+        return self.engine.is_initialized
+
+    @property
+    def _init_error(self) -> Optional[str]:
+        return self.engine.init_error
+
+    @property
+    def tokenizer(self):
+        return self.engine.tokenizer
+
+    @property
+    def model(self):
+        return self.engine.model
+
+    @property
+    def device(self):
+        return self.engine.device
 
     async def initialize(self):
-        if self.is_initialized or self._init_error:
-            return
-        if torch is None or AutoTokenizer is None:
-            self._init_error = "transformers/torch not available"
-            logger.warning("Reranker unavailable: transformers/torch not installed")
-            return
-        try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(self.executor, self._load_model)
-            self.is_initialized = True
+        await self.engine.initialize()
+        if self.is_initialized:
             logger.info(f"Ticket reranker initialized: {self.model_name} on {self.device}")
-        except Exception as e:  # pragma: no cover
-            self._init_error = str(e)
-            logger.error(f"Ticket reranker init failed: {e}")
-
-    def _load_model(self):
-        self.device = torch.device("cuda" if torch and torch.cuda.is_available() else "cpu")
-        logger.info(f"Loading reranker tokenizer {self.model_name}")
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        logger.info("Loading reranker model ...")
-        self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
-        self.model.to(self.device)
-        self.model.eval()
-
-    def _batch_scores(self, query: str, docs: List[str]):
+
+    def _batch_scores(self, query: str, docs: List[str], use_cache: bool = True) -> Optional[List[float]]:
+        """Scores in input order; None when scoring failed (same contract as rerank_async)."""
         try:
-            pairs = [[query, d] for d in docs]
-            tokens = self.tokenizer(pairs, padding=True, truncation=True, max_length=256, return_tensors="pt")
-            tokens = {k: v.to(self.device) for k,v in tokens.items()}
-            with torch.no_grad():
-                logits = self.model(**tokens).logits
-            scores = torch.sigmoid(logits).squeeze().cpu().numpy()
-            if scores.ndim == 0:
-                scores = [float(scores)]
-            else:
-                scores = scores.tolist()
-            return [float(s) for s in scores]
+            return self.engine.score_sync(query, docs, priority=self.priority, max_length=self.max_length,
+                                          batch_size=self.batch_size, bucketing=self.length_bucketing,
+                                          use_cache=use_cache)
         except Exception as e:  # pragma: no cover
             logger.warning(f"Reranker batch scoring failed: {e}")
-            return [0.5]*len(docs)
+            return None
+
+    def pack_spans(self, query: str, summary: str, spans: Sequence[str]) -> str:
+        """Join the best spans (in order) while query + summary + spans fit max_length tokens.
+
+        The first span is always kept (truncated by the model if it alone is too long).
+        Without a tokenizer, ~4 characters per token is assumed.
+        """
+        spans = [s for s in spans if s and s.strip()]
+        if not spans:
+            return ""
+        tok = self.tokenizer
+        count = (lambda t: len(tok(t, add_special_tokens=False)["input_ids"])) if tok is not None else (lambda t: len(t) // 4 + 1)
+        budget = self.max_length - 3 - count(query) - count(summary + "\n")
+        sep = count(SPAN_SEPARATOR)
+        kept, used = [spans[0]], count(spans[0])
+        for span in spans[1:]:
+            n = count(span) + sep
+            if used + n > budget:
+                break
+            kept.append(span)
+            used += n
+        return SPAN_SEPARATOR.join(kept)
 
-    async def rerank_async(self, query: str, candidates: List[Dict[str, Any]], content_field: str = "chunk_text", top_k: int = 8) -> List[Dict[str, Any]]:
+    async def rerank_async(self, query: str, candidates: List[Dict[str, Any]], content_field: str = "chunk_text", top_k: int = 8,
+                           priority: Optional[int] = None, snippet_chars: Optional[int] = 400,
+                           info: Optional[Dict[str, int]] = None) -> Optional[List[Dict[str, Any]]]:
+        """Top_k candidates with 'rerank_score', best first.
+
+        Returns None when no scores were produced (model unavailable, inference queue full
+        or inference error): callers keep their own retrieval order. When given, info is filled with the
+        engine's {"pairs", "cached", "scored"} counts for this call.
+        """
+        if info is not None:
+            info.update(pairs=len(candidates), cached=0, scored=0)
         if not candidates:
             return []
         await self.initialize()
         if not self.is_initialized:
-            return candidates[:top_k]
+            return None
         # Build documents text (summary + snippet)
         docs = []
         for c in candidates:
             summary = c.get('summary') or c.get('payload', {}).get('summary') or ''
             snippet = c.get(content_field) or c.get('chunk_text') or c.get('text') or ''
-            docs.append(f"{summary}\n{snippet[:400]}")
-        loop = asyncio.get_event_loop()
-        scores = await loop.run_in_executor(self.executor, self._batch_scores, query, docs)
+            docs.append(f"{summary}\n{snippet[:snippet_chars] if snippet_chars else snippet}")
+        cache_info = None
+        try:
+            scores, cache_info = await self.engine.score_with_info(
+                query, docs, priority=self.priority if priority is None else priority,
+                max_length=self.max_length, batch_size=self.batch_size, bucketing=self.length_bucketing)
+        except RerankQueueFull as e:
+            logger.warning(f"TicketReranker: {e}; keeping retrieval order")
+            return None
+        except Exception as e:  # pragma: no cover
+            logger.warning(f"Reranker batch scoring failed: {e}; keeping retrieval order")
+            return None
+        if cache_info and info is not None:
+            info.update(cache_info)
         # Attach scores and sort
         enriched = []
         for c, s in zip(candidates, scores):
@@ -94,6 +135,8 @@ class TicketCrossEncoderReranker:
             enriched.append(c2)
         enriched.sort(key=lambda x: x['rerank_score'], reverse=True)
         logger.info("TicketReranker: top scores=" + ", ".join(f"{e.get('ticket_key')}:{e['rerank_score']:.3f}" for e in enriched[:min(5,len(enriched))]))
+        if cache_info:
+            logger.info(f"TicketReranker: {cache_info['cached']}/{cache_info['pairs']} pairs from cache, {cache_info['scored']} scored")
         return enriched[:top_k]
 
     async def health(self) -> Dict[str, Any]:
@@ -101,7 +144,10 @@ class TicketCrossEncoderReranker:
             "initialized": self.is_initialized,
             "model": self.model_name,
             "error": self._init_error,
+            "engine": self.engine.stats(),
         }
 
 # Convenience global (lazy init)
 ticket_reranker_service = TicketCrossEncoderReranker()
+
+__all__ = ["TicketCrossEncoderReranker", "SPAN_SEPARATOR", "ticket_reranker_service"]
@@ -0,0 +1,297 @@
+"""
+Token Chunker
+=============
+
+Chunk sizing in real tokenizer tokens instead of words or characters.
+
+BGE sees at most 512 tokens per passage (special tokens included); anything longer is
+silently truncated, while chunks far below the window spend a whole vector on little
+text. TokenChunker uses the embedding model's own tokenizer to:
+- count tokens per text (LRU-cached by text, so re-chunking the same ticket is cheap)
+- split long text into windows of at most ``max_tokens`` with ``overlap_tokens`` of
+  token-level overlap, cut on word boundaries and returned as original substrings
+  (offsets, not decode, so casing and whitespace survive)
+- pack short segments (paragraphs, sentences) together up to the budget
+- keep a running distribution of tokens per chunk, plus an optional baseline
+  (the previous word/character sizing) for the vectors-saved report
+
+Without a tokenizer it falls back to counting word/punctuation pieces, which
+undercounts sub-word splits; a warning is logged once.
+
+Environment Variables:
+  CHUNK_MAX_TOKENS: Token budget per chunk including special tokens (default 512)
+  CHUNK_OVERLAP_TOKENS: Overlap between consecutive windows of one text (default 64)
+  CHUNK_TOKEN_CACHE_SIZE: Texts whose token counts are memoized (default 50000)
+  CHUNKING_MODE: tokens (default) or legacy (previous word/character sizing)
+  CHUNK_REPORT_BASELINE: Also size the legacy chunks for the savings report (default true)
+"""
+from __future__ import annotations
+import os
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+@dataclass
+class TokenSpan:
+    """One chunk: its text, token count (special tokens included) and character span in the source."""
+    text: str
+    tokens: int
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+
+def token_chunking_enabled() -> bool:
+    return os.getenv("CHUNKING_MODE", "tokens").lower() != "legacy"
+
+
+def tokenizer_of(embedding_service) -> Any:
+    """Tokenizer of an embedding service (ONNX keeps it on the service, SentenceTransformer on the model)."""
+    if embedding_service is None:
+        return None
+    tok = getattr(embedding_service, "tokenizer", None)
+    if tok is None:
+        tok = getattr(getattr(embedding_service, "model", None), "tokenizer", None)
+    return tok
+
+
+class TokenChunker:
+    def __init__(self, tokenizer=None, max_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None,
+                 cache_size: Optional[int] = None):
+        self.tokenizer = tokenizer
+        self.max_tokens = int(max_tokens or os.getenv("CHUNK_MAX_TOKENS", "512"))
+        overlap = int(overlap_tokens if overlap_tokens is not None else os.getenv("CHUNK_OVERLAP_TOKENS", "64"))
+        self._special = self._count_special_tokens()
+        # Budget for text tokens once [CLS]/[SEP] are added
+        self.content_budget = max(8, self.max_tokens - self._special)
+        self.overlap_tokens = max(0, min(overlap, self.content_budget // 2))
+        self.report_baseline = os.getenv("CHUNK_REPORT_BASELINE", "true").lower() in {"1", "true", "yes", "on"}
+        self._cache_size = int(cache_size or os.getenv("CHUNK_TOKEN_CACHE_SIZE", "50000"))
+        self._counts: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_stats()
+        if tokenizer is None:
+            logger.warning("⚠️ TokenChunker without a tokenizer: token counts are word/punctuation estimates")
+
+    def _count_special_tokens(self) -> int:
+        if self.tokenizer is None:
+            return 0
+        try:
+            return len(self.tokenizer("", add_special_tokens=True)["input_ids"])
+        except Exception:
+            return 2
+
+    # ------------------------------------------------------------------ counting
+    def _key(self, text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+
+    def _raw_counts(self, texts: List[str]) -> List[int]:
+        if self.tokenizer is None:
+            return [len(_PIECE_RE.findall(t)) for t in texts]
+        enc = self.tokenizer(texts, add_special_tokens=True, truncation=False, verbose=False)
+        return [len(ids) for ids in enc["input_ids"]]
+
+    def count_many(self, texts: Sequence[str]) -> List[int]:
+        """Token counts (special tokens included, no truncation); cached per text."""
+        keys = [self._key(t) for t in texts]
+        out: List[Optional[int]] = [None] * len(texts)
+        missing: Dict[bytes, List[int]] = {}
+        with self._lock:
+            for i, k in enumerate(keys):
+                n = self._counts.get(k)
+                if n is None:
+                    missing.setdefault(k, []).append(i)
+                else:
+                    self._counts.move_to_end(k)
+                    out[i] = n
+        if missing:
+            todo = [texts[idx[0]] for idx in missing.values()]
+            counts = self._raw_counts(todo)
+            with self._lock:
+                for (k, idx), n in zip(missing.items(), counts):
+                    for i in idx:
+                        out[i] = n
+                    self._counts[k] = n
+                while len(self._counts) > self._cache_size:
+                    self._counts.popitem(last=False)
+        return out  # type: ignore[return-value]
+
+    def count_tokens(self, text: str) -> int:
+        return self.count_many([text])[0]
+
+    # ------------------------------------------------------------------ splitting
+    def _pieces(self, text: str) -> Tuple[List[Tuple[int, int]], List[Optional[int]]]:
+        """Character offsets and word ids of each content token."""
+        if self.tokenizer is not None:
+            try:
+                enc = self.tokenizer(text, add_special_tokens=False, truncation=False, verbose=False,
+                                     return_offsets_mapping=True)
+                offsets = [tuple(o) for o in enc["offset_mapping"]]
+                try:
+                    word_ids = enc.word_ids()
+                except Exception:
+                    word_ids = [None] * len(offsets)
+                return offsets, word_ids
+            except (NotImplementedError, ValueError, TypeError):
+                pass  # slow tokenizer without offsets -> piece estimate below
+        matches = list(_PIECE_RE.finditer(text))
+        return [m.span() for m in matches], list(range(len(matches)))
+
+    def split(self, text: str) -> List[TokenSpan]:
+        """Split text into windows of at most max_tokens, overlapping by overlap_tokens."""
+        text = text or ""
+        if not text.strip():
+            return []
+        total = self.count_tokens(text)
+        if total <= self.max_tokens:
+            return [TokenSpan(text=text, tokens=total, start=0, end=len(text))]
+        offsets, word_ids = self._pieces(text)
+        n = len(offsets)
+        spans: List[TokenSpan] = []
+        start = 0
+        while start < n:
+            end = min(start + self.content_budget, n)
+            # Do not cut inside a word (word-piece continuation tokens share a word id)
+            if end < n and word_ids[end] is not None:
+                back = end
+                while back > start + 1 and word_ids[back] == word_ids[back - 1]:
+                    back -= 1
+                if back > start + 1:
+                    end = back
+            a, b = offsets[start][0], offsets[end - 1][1]
+            spans.append(TokenSpan(text=text[a:b], tokens=end - start + self._special, start=a, end=b))
+            if end >= n:
+                break
+            next_start = end - self.overlap_tokens
+            # Start the overlap on a word boundary too
+            while next_start > start + 1 and word_ids[next_start] is not None and word_ids[next_start] == word_ids[next_start - 1]:
+                next_start -= 1
+            start = max(next_start, start + 1)
+        return spans
+
+    def pack(self, segments: Sequence[str], separator: str = "\n\n") -> List[TokenSpan]:
+        """Greedily join consecutive segments up to the budget; oversize segments are split."""
+        segments = [s for s in segments if s and s.strip()]
+        if not segments:
+            return []
+        counts = [c - self._special for c in self.count_many(segments)]
+        sep_tokens = self.count_tokens(separator) - self._special if separator.strip() else 0
+        spans: List[TokenSpan] = []
+        current: List[str] = []
+        current_tokens = 0
+
+        def flush():
+            if current:
+                joined = separator.join(current)
+                spans.append(TokenSpan(text=joined, tokens=current_tokens + self._special))
+
+        for seg, n in zip(segments, counts):
+            if n > self.content_budget:
+                flush()
+                current, current_tokens = [], 0
+                spans.extend(self.split(seg))
+                continue
+            extra = n + (sep_tokens if current else 0)
+            if current and current_tokens + extra > self.content_budget:
+                flush()
+                current, current_tokens = [seg], n
+            else:
+                current.append(seg)
+                current_tokens += extra
+        flush()
+        return spans
+
+    # ------------------------------------------------------------------ reporting
+    def reset_stats(self):
+        with self._lock:
+            self._chunk_tokens: List[int] = []
+            self._baseline_tokens: List[int] = []
+
+    def record(self, spans: Sequence[TokenSpan], baseline_texts: Optional[Sequence[str]] = None):
+        """Add produced chunks (and, when given, what the legacy sizing would have produced) to the report."""
+        baseline = self.count_many(list(baseline_texts)) if baseline_texts and self.report_baseline else []
+        with self._lock:
+            self._chunk_tokens.extend(s.tokens for s in spans)
+            self._baseline_tokens.extend(baseline)
+
+    def _distribution(self, counts: List[int]) -> Dict[str, Any]:
+        if not counts:
+            return {"chunks": 0}
+        arr = np.asarray(counts)
+        return {
+            "chunks": int(arr.size),
+            "tokens_total": int(arr.sum()),
+            # What the model actually encodes (everything past the window is truncated)
+            "tokens_encoded": int(np.minimum(arr, self.max_tokens).sum()),
+            "over_limit": int((arr > self.max_tokens).sum()),
+            "min": int(arr.min()),
+            "p50": int(np.percentile(arr, 50)),
+            "p95": int(np.percentile(arr, 95)),
+            "max": int(arr.max()),
+            "mean": round(float(arr.mean()), 1),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            chunks, baseline = list(self._chunk_tokens), list(self._baseline_tokens)
+        report = {"max_tokens": self.max_tokens, "overlap_tokens": self.overlap_tokens,
+                  "tokens_per_chunk": self._distribution(chunks)}
+        if baseline:
+            report["baseline_tokens_per_chunk"] = self._distribution(baseline)
+            report["vectors_saved"] = len(baseline) - len(chunks)
+        return report
+
+
+def savings_report(stats: Dict[str, Any], encode_seconds: float) -> Dict[str, Any]:
+    """Vectors and estimated encode-seconds saved versus the baseline sizing.
+
+    Encode time scales with tokens the model sees, so the estimate applies this
+    run's measured seconds-per-encoded-token to the baseline's encoded tokens.
+    """
+    current = stats.get("tokens_per_chunk", {})
+    baseline = stats.get("baseline_tokens_per_chunk")
+    out = {"encode_seconds": round(encode_seconds, 3)}
+    if not baseline or not current.get("tokens_encoded"):
+        return out
+    per_token = encode_seconds / current["tokens_encoded"]
+    out.update({
+        "vectors": current["chunks"],
+        "baseline_vectors": baseline["chunks"],
+        "vectors_saved": baseline["chunks"] - current["chunks"],
+        "tokens_encoded_saved": baseline["tokens_encoded"] - current["tokens_encoded"],
+        "encode_seconds_saved_est": round(per_token * (baseline["tokens_encoded"] - current["tokens_encoded"]), 3),
+        "baseline_chunks_truncated": baseline["over_limit"],
+    })
+    return out
+
+
+def _load_tokenizer(model_name: str):
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(model_name)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not load tokenizer for '{model_name}': {e}")
+        return None
+
+
+def create_token_chunker(embedding_service=None, **kwargs) -> TokenChunker:
+    """Chunker sized with the embedding service's tokenizer (loaded standalone when there is no service)."""
+    tokenizer = tokenizer_of(embedding_service)
+    if tokenizer is None:
+        model_name = (getattr(embedding_service, "model_name", None) or os.getenv("LOCAL_EMBEDDING_MODEL_DIR")
+                      or os.getenv("EMBEDDING_MODEL_NAME", "BAAI/bge-large-en-v1.5"))
+        tokenizer = _load_tokenizer(model_name)
+    return TokenChunker(tokenizer=tokenizer, **kwargs)
+
+
+__all__ = ["TokenChunker", "TokenSpan", "create_token_chunker", "tokenizer_of", "token_chunking_enabled", "savings_report"]
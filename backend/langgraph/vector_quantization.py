@@ -0,0 +1,163 @@
+"""
+Vector Quantization
+===================
+
+Quantization settings for the large ticket collections (jira_tickets,
+jira_tickets_global).
+
+Raw float32 1024-d vectors cost ~4 KB per chunk in RAM plus the HNSW graph. With
+quantization on, collection setup stores the original vectors on disk and keeps a
+compact copy in RAM: int8 scalar (4x smaller) or binary (32x smaller). Searches
+traverse the quantized copy with `oversampling` times the requested limit and
+rescore those candidates against the originals, so the final ranking uses full
+precision.
+
+New collections pick the settings up at creation. Existing collections are
+converted by hand (Qdrant re-optimizes the segments in the background):
+
+    python -m backend.langgraph.vector_quantization --dry-run
+    python -m backend.langgraph.vector_quantization --qdrant-url http://localhost:6333
+
+Environment Variables:
+  QDRANT_QUANTIZATION: none | int8 | binary (default none)
+  QDRANT_QUANTIZATION_QUANTILE: int8 calibration quantile (default 0.99)
+  QDRANT_QUANTIZATION_ALWAYS_RAM: Keep the quantized vectors in RAM (default true)
+  QDRANT_VECTORS_ON_DISK: Original vectors on disk when quantized (default true)
+  QDRANT_QUANTIZATION_OVERSAMPLING: Candidates per requested hit before rescoring (default 2.0 int8, 3.0 binary)
+  QDRANT_QUANTIZATION_RESCORE: Rescore candidates with the original vectors (default true)
+"""
+from __future__ import annotations
+import os
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+QUANTIZED_COLLECTIONS = ("jira_tickets", "jira_tickets_global")
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in {"1", "true", "yes", "on"}
+
+
+def quantization_mode() -> str:
+    mode = os.getenv("QDRANT_QUANTIZATION", "none").lower()
+    if mode not in QUANTIZATION_MODES:
+        logger.warning(f"⚠️ Unknown QDRANT_QUANTIZATION={mode!r}; using none")
+        return "none"
+    return mode
+
+
+def is_quantized_collection(collection_name: str) -> bool:
+    return collection_name in QUANTIZED_COLLECTIONS
+
+
+def quantization_config_rest(mode: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """`quantization_config` body for the REST API (None when quantization is off)."""
+    mode = mode or quantization_mode()
+    always_ram = _flag("QDRANT_QUANTIZATION_ALWAYS_RAM", "true")
+    if mode == "int8":
+        quantile = float(os.getenv("QDRANT_QUANTIZATION_QUANTILE", "0.99"))
+        return {"scalar": {"type": "int8", "quantile": quantile, "always_ram": always_ram}}
+    if mode == "binary":
+        return {"binary": {"always_ram": always_ram}}
+    return None
+
+
+def search_quantization_rest(mode: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """`params.quantization` for REST searches (oversampling + rescoring)."""
+    mode = mode or quantization_mode()
+    if mode == "none":
+        return None
+    default = "3.0" if mode == "binary" else "2.0"
+    return {
+        "ignore": False,
+        "rescore": _flag("QDRANT_QUANTIZATION_RESCORE", "true"),
+        "oversampling": float(os.getenv("QDRANT_QUANTIZATION_OVERSAMPLING", default)),
+    }
+
+
+def vectors_on_disk(mode: Optional[str] = None) -> Optional[bool]:
+    """on_disk for the original vectors: only set when quantized (Qdrant default otherwise)."""
+    mode = mode or quantization_mode()
+    if mode == "none":
+        return None
+    return _flag("QDRANT_VECTORS_ON_DISK", "true")
+
+
+def quantization_config_models(mode: Optional[str] = None):
+    """qdrant_client model for collection creation (None when quantization is off)."""
+    from qdrant_client.http import models
+    mode = mode or quantization_mode()
+    rest = quantization_config_rest(mode)
+    if rest is None:
+        return None
+    if mode == "int8":
+        cfg = rest["scalar"]
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8, quantile=cfg["quantile"], always_ram=cfg["always_ram"]))
+    return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=rest["binary"]["always_ram"]))
+
+
+def search_quantization_models(mode: Optional[str] = None):
+    """qdrant_client QuantizationSearchParams (None when quantization is off)."""
+    from qdrant_client.http import models
+    rest = search_quantization_rest(mode)
+    return models.QuantizationSearchParams(**rest) if rest else None
+
+
+async def apply_rest(client, qdrant_url: str, collection_name: str, mode: Optional[str] = None,
+                     dry_run: bool = False) -> Dict[str, Any]:
+    """Bring an existing collection's quantization / on_disk settings in line with the configuration."""
+    mode = mode or quantization_mode()
+    base = f"{qdrant_url.rstrip('/')}/collections/{collection_name}"
+    resp = await client.get(base)
+    resp.raise_for_status()
+    params = resp.json().get("result", {}).get("config", {}) or {}
+    current = params.get("quantization_config")
+    wanted = quantization_config_rest(mode)
+    changed = current != wanted
+    if changed and not dry_run:
+        body: Dict[str, Any] = {"quantization_config": wanted if wanted is not None else "Disabled"}
+        on_disk = vectors_on_disk(mode)
+        if on_disk is not None:
+            body["vectors"] = {"": {"on_disk": on_disk}}
+        resp = await client.patch(base, json=body)
+        resp.raise_for_status()
+    if changed:
+        logger.info(f"🗜️ Quantization {'planned' if dry_run else 'applied'} for {collection_name}: {current} -> {wanted}")
+    return {"collection": collection_name, "mode": mode, "current": current, "wanted": wanted, "changed": changed}
+
+
+__all__ = ["QUANTIZATION_MODES", "QUANTIZED_COLLECTIONS", "quantization_mode", "is_quantized_collection",
+           "quantization_config_rest", "search_quantization_rest", "vectors_on_disk", "quantization_config_models",
+           "search_quantization_models", "apply_rest"]
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+    import asyncio
+    import json
+    import httpx
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://localhost:6333"))
+    parser.add_argument("--mode", choices=QUANTIZATION_MODES, help="Override QDRANT_QUANTIZATION")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the collections that would change")
+    args = parser.parse_args(argv)
+
+    async def run():
+        async with httpx.AsyncClient(timeout=600.0) as client:
+            resp = await client.get(f"{args.qdrant_url.rstrip('/')}/collections")
+            resp.raise_for_status()
+            names = [c["name"] for c in resp.json().get("result", {}).get("collections", [])]
+            return [await apply_rest(client, args.qdrant_url, name, args.mode, args.dry_run)
+                    for name in names if is_quantized_collection(name)]
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()